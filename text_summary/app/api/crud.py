@@ -1,35 +1,358 @@
-from typing import List, Optional
+import base64
+from datetime import datetime
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
 
-from app.schemas import SummaryPayloadSchema, SummaryUpdatePayloadSchema
-from app.models import TextSummary
+from tortoise import timezone
+from tortoise.query_utils import Q
+from tortoise.queryset import QuerySet
+from tortoise.transactions import in_transaction
 
+from app import jobs, partitions, search
+from app.schemas import (
+    SUMMARY_FIELDS, SummaryFilterSchema, SummaryPayloadSchema, SummaryUpdatePayloadSchema,
+)
+from app.contents import ArticleSummary
+from app.models import SummaryStatus, TextSummary
+from app.nlp import limit_summary
+from app.notifications import notify_summaries_changed
 
-async def create(payload: SummaryPayloadSchema) -> int:
-    summary = TextSummary(url=payload.url, summary='')
+BULK_INSERT_CHUNK_SIZE = 1000
+INSERT_COLUMNS = 9
+RETURNING_SUMMARY = 'RETURNING ' + ', '.join(
+    f'"textsummary"."{field}"' for field in SUMMARY_FIELDS
+)
+UPDATED_SUMMARY = '"updates"."summary"'
+TO_TSVECTOR = f"to_tsvector('{search.SEARCH_CONFIG}', {{0}})"
+# Summaries are looked up by id within their creation range, so other partitions are skipped.
+CREATED_BETWEEN = '"textsummary"."created_at" >= ${0} AND "textsummary"."created_at" < ${1}'
+# Summaries written by clients are not generated from a fetched article of the page anymore,
+# and they are done even if they were pending or failed.
+CLEARED_FETCH = (
+    '"content_id" = NULL, "fetched_at" = NULL, '
+    f'"status" = \'{SummaryStatus.DONE.value}\', "error" = NULL, "finished_at" = now()'
+)
+UPDATE_SUMMARY_SQL = (
+    'UPDATE "textsummary" SET "url" = $1, "summary" = $2, '  # noqa: S608
+    f'{CLEARED_FETCH}, "search_vector" = {TO_TSVECTOR.format("$2")} '
+    f'WHERE "id" = $3 AND {CREATED_BETWEEN.format(4, 5)} {RETURNING_SUMMARY}'
+)
+UPDATE_SUMMARIES_SQL = (
+    'UPDATE "textsummary" '  # noqa: S608
+    'SET "url" = "updates"."url", "summary" = "updates"."summary", '
+    f'{CLEARED_FETCH}, "search_vector" = {TO_TSVECTOR.format(UPDATED_SUMMARY)} '
+    'FROM unnest($1::int[], $2::text[], $3::text[]) AS "updates" ("id", "url", "summary") '
+    f'WHERE "textsummary"."id" = "updates"."id" AND {CREATED_BETWEEN.format(4, 5)} '
+    f'{RETURNING_SUMMARY}'
+)
+# Jobs don't reference summaries with a foreign key, so they are deleted in the same statement.
+DELETE_SUMMARY_SQL = (
+    'WITH "jobs" AS (DELETE FROM "summaryjob" WHERE "summary_id" = $1) '  # noqa: S608
+    f'DELETE FROM "textsummary" WHERE "id" = $1 AND {CREATED_BETWEEN.format(2, 3)} '
+    f'{RETURNING_SUMMARY}'
+)
+DELETE_SUMMARIES_SQL = (
+    'WITH "jobs" AS (DELETE FROM "summaryjob" WHERE "summary_id" = ANY($1::int[])) '  # noqa: S608
+    'DELETE FROM "textsummary" '
+    f'WHERE "id" = ANY($1::int[]) AND {CREATED_BETWEEN.format(2, 3)} RETURNING "id"'
+)
+
+
+# Created summaries are announced by callers with `notify_summaries_changed` once they are
+# committed, as they may be created in a transaction together with their jobs.
+async def create(
+        payload: SummaryPayloadSchema, cached_summary: Optional[ArticleSummary] = None,
+) -> int:
+    if _supports_returning():
+        # The raw insert stores the search document of a cached summary in the same query.
+        summary_ids = await create_many([payload], [cached_summary])
+        return summary_ids[0]
+
+    summary = TextSummary(
+        url=payload.url,
+        max_sentences=payload.max_sentences,
+        max_chars=payload.max_chars,
+        **_initial_values(payload, cached_summary, timezone.now()),
+    )
     await summary.save()
+    search.index_summaries([(summary.id, summary.summary)])
 
     return summary.id
 
 
+async def create_many(
+        payloads: List[SummaryPayloadSchema], cached_summaries: List[Optional[ArticleSummary]],
+) -> List[int]:
+    if not _supports_returning():
+        async with in_transaction():
+            return [
+                await create(payload, cached_summary)
+                for payload, cached_summary in zip(payloads, cached_summaries)
+            ]
+
+    created_at = timezone.now()
+    rows = [
+        (
+            payload.url,
+            *_initial_values(payload, cached_summary, created_at).values(),
+            created_at,
+            payload.max_sentences,
+            payload.max_chars,
+        )
+        for payload, cached_summary in zip(payloads, cached_summaries)
+    ]
+    summary_ids = []
+    async with in_transaction() as connection:
+        for start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+            chunk = rows[start:start + BULK_INSERT_CHUNK_SIZE]
+            placeholders = ', '.join(
+                _row_placeholders(index * INSERT_COLUMNS + 1) for index in range(len(chunk))
+            )
+            inserted = await connection.execute_query_dict(
+                'INSERT INTO "textsummary" '  # noqa: S608
+                '("url", "summary", "content_id", "status", "finished_at", "fetched_at", '
+                '"created_at", "max_sentences", "max_chars", "search_vector") '
+                f'VALUES {placeholders} RETURNING "id"',
+                [value for row in chunk for value in row],
+            )
+            summary_ids.extend(row['id'] for row in inserted)
+    return summary_ids
+
+
 async def read(summary_id: int) -> Optional[dict]:
-    summary = await TextSummary.filter(id=summary_id).first().values()
+    summary = await partitions.read_by_ids([summary_id], *SUMMARY_FIELDS)
 
     return summary[0] if summary else None
 
 
-async def read_all() -> List[dict]:
-    return await TextSummary.all().values()
+async def read_many(summary_ids: List[int]) -> List[Optional[dict]]:
+    summaries = await partitions.read_by_ids(summary_ids, *SUMMARY_FIELDS)
+    summaries_by_id = {summary['id']: summary for summary in summaries}
+    # Results follow the order of requested ids, with None for missing summaries.
+    return [summaries_by_id.get(summary_id) for summary_id in summary_ids]
+
+
+def encode_cursor(summary: dict) -> str:
+    position = f'{summary["created_at"].isoformat()}|{summary["id"]}'
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    # Malformed cursors raise ValueError (binascii.Error and UnicodeDecodeError included).
+    created_at, summary_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return datetime.fromisoformat(created_at), int(summary_id)
+
+
+async def read_all(
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        filters: Optional[SummaryFilterSchema] = None,
+        fields: Iterable[str] = (),
+) -> List[dict]:
+    summaries = TextSummary.all()
+    if after is not None:
+        created_at, summary_id = after
+        # The plain bound lets Postgres skip newer partitions and scan indexes from the cursor.
+        summaries = summaries.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=summary_id),
+            created_at__lte=created_at,
+        )
+    if filters is not None:
+        summaries = _filter(summaries, filters)
+
+    # Cursor for the next page is built from `id` and `created_at`, so they are always read.
+    fields = {'id', 'created_at', *fields}
+    return await summaries.order_by('-created_at', '-id').limit(limit).values(*fields)
+
+
+async def iterate_all(
+        chunk_size: int, filters: Optional[SummaryFilterSchema] = None,
+) -> AsyncIterator[List[dict]]:
+    # Keyset pagination keeps every query cheap and no transaction open between chunks.
+    # The first chunk is yielded even if it's empty.
+    after = None
+    while True:
+        summaries = await read_all(chunk_size, after, filters, SUMMARY_FIELDS)
+        yield summaries
+        if len(summaries) < chunk_size:
+            return
+        after = summaries[-1]['created_at'], summaries[-1]['id']
+
+
+def _filter(summaries: QuerySet, filters: SummaryFilterSchema) -> QuerySet:
+    conditions = {
+        'url__startswith': filters.url_prefix,
+        'status': filters.status,
+        'created_at__gte': filters.created_after,
+        'created_at__lt': filters.created_before,
+    }
+    summaries = summaries.filter(**{
+        condition: value for condition, value in conditions.items() if value is not None
+    })
+
+    if filters.has_summary is None:
+        return summaries
+    if filters.has_summary:
+        return summaries.exclude(summary='')
+    return summaries.filter(summary='')
 
 
 async def update(summary_id: int, payload: SummaryUpdatePayloadSchema) -> Optional[dict]:
+    summary = await _update(summary_id, payload)
+    if summary is not None:
+        await notify_summaries_changed([summary_id])
+    return summary
+
+
+async def _update(summary_id: int, payload: SummaryUpdatePayloadSchema) -> Optional[dict]:
+    if _supports_returning():
+        updated_summaries = await partitions.find_by_ids(
+            [summary_id],
+            lambda ids, created: TextSummary._meta.db.execute_query_dict(
+                UPDATE_SUMMARY_SQL, [payload.url, payload.summary, summary_id, *created],
+            ),
+        )
+        return updated_summaries[0] if updated_summaries else None
+
     summary = await TextSummary.filter(id=summary_id).first().update(
-        url=payload.url, summary=payload.summary,
+        url=payload.url, summary=payload.summary, **_cleared_fetch(),
     )
     if summary:
-        updated_summary = await TextSummary.filter(id=summary_id).first().values()
+        search.index_summaries([(summary_id, payload.summary)])
+        updated_summary = await TextSummary.filter(id=summary_id).first().values(*SUMMARY_FIELDS)
         return updated_summary[0]
     return None
 
 
+async def update_many(
+        summary_ids: List[int], payloads: List[SummaryUpdatePayloadSchema],
+) -> List[dict]:
+    summaries = await _update_many(summary_ids, payloads)
+    await notify_summaries_changed([summary['id'] for summary in summaries])
+    return summaries
+
+
+async def _update_many(
+        summary_ids: List[int], payloads: List[SummaryUpdatePayloadSchema],
+) -> List[dict]:
+    if _supports_returning():
+        async def update_in_range(ids: List[int], created: partitions.CreationRange) -> List[dict]:
+            queried_ids = set(ids)
+            updates = [
+                (summary_id, payload)
+                for summary_id, payload in zip(summary_ids, payloads) if summary_id in queried_ids
+            ]
+            return await TextSummary._meta.db.execute_query_dict(
+                UPDATE_SUMMARIES_SQL,
+                [
+                    [summary_id for summary_id, _ in updates],
+                    [payload.url for _, payload in updates],
+                    [payload.summary for _, payload in updates],
+                    *created,
+                ],
+            )
+
+        return await partitions.find_by_ids(summary_ids, update_in_range)
+
+    async with in_transaction():
+        for summary_id, payload in zip(summary_ids, payloads):
+            await TextSummary.filter(id=summary_id).update(
+                url=payload.url, summary=payload.summary, **_cleared_fetch(),
+            )
+        search.index_summaries(
+            (summary_id, payload.summary) for summary_id, payload in zip(summary_ids, payloads)
+        )
+        return await TextSummary.filter(id__in=summary_ids).values(*SUMMARY_FIELDS)
+
+
 async def delete(summary_id: int) -> Optional[dict]:
-    return await TextSummary.filter(id=summary_id).first().delete()
+    summary = await _delete(summary_id)
+    if summary is not None:
+        await notify_summaries_changed([summary_id])
+    return summary
+
+
+async def _delete(summary_id: int) -> Optional[dict]:
+    if _supports_returning():
+        deleted_summaries = await partitions.find_by_ids(
+            [summary_id],
+            lambda ids, created: TextSummary._meta.db.execute_query_dict(
+                DELETE_SUMMARY_SQL, [summary_id, *created],
+            ),
+        )
+        return deleted_summaries[0] if deleted_summaries else None
+
+    async with in_transaction():
+        summary = await read(summary_id)
+        if summary is not None:
+            await TextSummary.filter(id=summary_id).delete()
+            await jobs.delete_summary_jobs([summary_id])
+            search.unindex_summaries([summary_id])
+        return summary
+
+
+async def delete_many(summary_ids: List[int]) -> List[int]:
+    deleted_ids = await _delete_many(summary_ids)
+    await notify_summaries_changed(deleted_ids)
+    return deleted_ids
+
+
+async def _delete_many(summary_ids: List[int]) -> List[int]:
+    if _supports_returning():
+        deleted_summaries = await partitions.find_by_ids(
+            summary_ids,
+            lambda ids, created: TextSummary._meta.db.execute_query_dict(
+                DELETE_SUMMARIES_SQL, [ids, *created],
+            ),
+        )
+        return [summary['id'] for summary in deleted_summaries]
+
+    async with in_transaction():
+        existing_ids = await TextSummary.filter(id__in=summary_ids).values_list('id', flat=True)
+        await TextSummary.filter(id__in=existing_ids).delete()
+        await jobs.delete_summary_jobs(existing_ids)
+        search.unindex_summaries(existing_ids)
+        return existing_ids
+
+
+def _initial_values(
+        payload: SummaryPayloadSchema, cached_summary: Optional[ArticleSummary], now: datetime,
+) -> dict:
+    # Summaries found in cache are done right away, others wait to be generated.
+    if cached_summary is None:
+        return {
+            'summary': '',
+            'content_id': None,
+            'status': SummaryStatus.PENDING,
+            'finished_at': None,
+            'fetched_at': None,
+        }
+    return {
+        'summary': limit_summary(cached_summary.summary, payload.max_sentences, payload.max_chars),
+        'content_id': cached_summary.content_hash,
+        'status': SummaryStatus.DONE,
+        'finished_at': now,
+        'fetched_at': now,
+    }
+
+
+def _row_placeholders(first_number: int) -> str:
+    numbers = range(first_number, first_number + INSERT_COLUMNS)
+    # The search document is computed from the summary, the second value of the row.
+    search_vector = TO_TSVECTOR.format(f'${first_number + 1}')
+    return '({0}, {1})'.format(', '.join(f'${number}' for number in numbers), search_vector)
+
+
+def _cleared_fetch() -> dict:
+    # Values of CLEARED_FETCH for the ORM.
+    return {
+        'content_id': None,
+        'fetched_at': None,
+        'status': SummaryStatus.DONE,
+        'error': None,
+        'finished_at': timezone.now(),
+    }
+
+
+def _supports_returning() -> bool:
+    # UPDATE/DELETE ... RETURNING saves a round trip on Postgres.
+    return TextSummary._meta.db.capabilities.dialect == 'postgres'
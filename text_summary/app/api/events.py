@@ -0,0 +1,51 @@
+import asyncio
+import time
+from typing import AsyncIterator, Optional
+
+import orjson
+
+from app.api import crud
+from app.models import SummaryStatus
+from app.notifications import get_notification_hub
+
+MEDIA_TYPE = 'text/event-stream'
+KEEP_ALIVE = ': keep-alive\n\n'
+PENDING_STATUSES = frozenset({SummaryStatus.PENDING, SummaryStatus.RUNNING})
+
+
+async def wait_for_summary(summary_id: int, timeout: float) -> Optional[dict]:
+    with get_notification_hub().subscribe(summary_id) as ready:
+        # Subscribing before the read makes sure a summary generated in between isn't missed.
+        summary = await crud.read(summary_id)
+        if not is_pending(summary) or timeout <= 0:
+            return summary
+        await _wait(ready, timeout)
+    return await crud.read(summary_id)
+
+
+async def summary_events(
+        summary_id: int, timeout: float, keep_alive_interval: float,
+) -> AsyncIterator[str]:
+    deadline = time.monotonic() + timeout
+    with get_notification_hub().subscribe(summary_id) as ready:
+        summary = await crud.read(summary_id)
+        while is_pending(summary) and time.monotonic() < deadline:
+            if await _wait(ready, min(keep_alive_interval, deadline - time.monotonic())):
+                ready.clear()
+                summary = await crud.read(summary_id)
+            else:
+                yield KEEP_ALIVE
+    if summary is not None:
+        yield f'event: summary\ndata: {orjson.dumps(summary).decode()}\n\n'
+
+
+def is_pending(summary: Optional[dict]) -> bool:
+    return summary is not None and summary['status'] in PENDING_STATUSES
+
+
+async def _wait(ready: asyncio.Event, timeout: float) -> bool:
+    try:
+        await asyncio.wait_for(ready.wait(), timeout)
+    except asyncio.TimeoutError:
+        return False
+    return True
@@ -0,0 +1,56 @@
+import csv
+import io
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, List
+
+import orjson
+
+from app.schemas import ExportFormat, SUMMARY_FIELDS
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: 'application/x-ndjson',
+    ExportFormat.CSV: 'text/csv',
+}
+
+
+def to_ndjson(chunks: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+    def format_chunk(summaries: List[dict]) -> bytes:
+        return b''.join(orjson.dumps(summary) + b'\n' for summary in summaries)
+
+    return (format_chunk(summaries) async for summaries in chunks)
+
+
+def to_csv(chunks: AsyncIterator[List[dict]]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=SUMMARY_FIELDS)
+    # The header is sent together with the first chunk.
+    writer.writeheader()
+
+    def format_chunk(summaries: List[dict]) -> str:
+        writer.writerows(_serializable(summary) for summary in summaries)
+        try:
+            return buffer.getvalue()
+        finally:
+            buffer.seek(0)
+            buffer.truncate()
+
+    return (format_chunk(summaries) async for summaries in chunks)
+
+
+def _serializable(summary: dict) -> dict:
+    return {field: _serializable_value(value) for field, value in summary.items()}
+
+
+def _serializable_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+FORMATTERS = {
+    ExportFormat.NDJSON: to_ndjson,
+    ExportFormat.CSV: to_csv,
+}
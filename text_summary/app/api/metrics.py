@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from app import jobs
+from app.config import get_settings, Settings
+from app.metrics import render_metrics
+
+router = APIRouter()
+
+
+@router.get('/metrics', include_in_schema=False)
+async def read_metrics(settings: Settings = Depends(get_settings)) -> Response:  # noqa: B008
+    queued_jobs = await jobs.pending_count() if settings.use_job_queue else None
+    return Response(render_metrics(queued_jobs), media_type=CONTENT_TYPE_LATEST)
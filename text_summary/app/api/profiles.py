@@ -0,0 +1,54 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Response
+
+from app.config import get_settings, Settings
+from app.profiling import get_profiler, Profile, verify_profile_token
+from app.schemas import ProfileSchema
+
+router = APIRouter()
+
+
+def check_profile_token(
+        x_profile_token: Optional[str] = Header(None),  # noqa: B008
+        settings: Settings = Depends(get_settings),  # noqa: B008
+) -> None:
+    # Without a secret nobody can download profiles, so the endpoints don't exist.
+    if not settings.profile_secret:
+        raise HTTPException(status_code=404, detail='Not Found')
+    if not verify_profile_token(settings.profile_secret, x_profile_token):
+        raise HTTPException(status_code=403, detail='Invalid profiling token')
+
+
+@router.get('/', response_model=List[ProfileSchema], dependencies=[Depends(check_profile_token)])
+async def read_profiles() -> List[ProfileSchema]:
+    return [
+        ProfileSchema(**profile._asdict()) for profile in get_profiler().profiles()
+    ]
+
+
+@router.get('/{profile_id}/pstats/', dependencies=[Depends(check_profile_token)])
+async def download_pstats(profile_id: int = Path(..., ge=1)) -> Response:  # noqa: B008
+    profile = _get_profile(profile_id)
+    return Response(
+        profile.stats,
+        media_type='application/octet-stream',
+        headers={'Content-Disposition': f'attachment; filename="profile-{profile.id}.pstats"'},
+    )
+
+
+@router.get('/{profile_id}/folded/', dependencies=[Depends(check_profile_token)])
+async def download_folded_stacks(profile_id: int = Path(..., ge=1)) -> Response:  # noqa: B008
+    profile = _get_profile(profile_id)
+    return Response(
+        profile.folded_stacks(),
+        media_type='text/plain',
+        headers={'Content-Disposition': f'attachment; filename="profile-{profile.id}.folded"'},
+    )
+
+
+def _get_profile(profile_id: int) -> Profile:
+    profile = get_profiler().get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail='Profile not found')
+    return profile
@@ -1,58 +1,327 @@
-from typing import List
+import math
+from itertools import compress
+from typing import Any, List, Optional, Sized
+from urllib.parse import urlencode
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Path
+import orjson
+from fastapi import (
+    APIRouter, Depends, Header, HTTPException, Path, Query, Request, Response,
+)
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import PositiveInt
+from tortoise.transactions import in_transaction
 
-from app.api import crud
+from app import jobs, search
+from app.api import crud, events, export
+from app.cache import get_summary_cache
+from app.config import get_settings, Settings
+from app.metrics import TimedRoute
+from app.notifications import notify_summaries_changed
+from app.response_cache import (
+    CachedResponse,
+    etag_matches,
+    get_response_cache,
+    list_key,
+    make_response,
+    search_key,
+    summary_key,
+)
 from app.schemas import (
-    SummarySchema, SummaryPayloadSchema, SummaryResponseSchema, SummaryUpdatePayloadSchema,
+    ExportFormat,
+    SummaryField,
+    SummaryBatchUpdateItemSchema,
+    SummaryFilterSchema,
+    SummaryIdsSchema,
+    SummaryListItemSchema,
+    SummaryPayloadSchema,
+    SummaryResponseSchema,
+    SummarySchema,
+    SummarySearchResultSchema,
+    SummaryUpdatePayloadSchema,
 )
-from app.summarizer import generate_summary
+from app.scheduler import get_scheduler, Priority, Scheduler, SchedulerBusy
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+NOT_MODIFIED = {304: {'description': 'Not modified since the version with the given ETag'}}
+TOO_MANY_REQUESTS = {429: {'description': 'Scheduler queue is full or client rate limit is hit'}}
 
 
-@router.post('/', response_model=SummaryResponseSchema, status_code=201)
+@router.post(
+    '/', response_model=SummaryResponseSchema, status_code=201, responses=TOO_MANY_REQUESTS,
+)
 async def create_summary(
-        payload: SummaryPayloadSchema, background_tasks: BackgroundTasks,
+        payload: SummaryPayloadSchema,
+        request: Request,
+        settings: Settings = Depends(get_settings),  # noqa: B008
 ) -> SummaryResponseSchema:
-    new_summary_id = await crud.create(payload)
-    background_tasks.add_task(generate_summary, new_summary_id, payload.url)
+    cached_summary = await get_summary_cache().get(payload.url)
+    if cached_summary is not None:
+        new_summary_id = await crud.create(payload, cached_summary)
+        await notify_summaries_changed()
+        return SummaryResponseSchema(id=new_summary_id, url=payload.url)
+
+    scheduler = get_scheduler()
+    await _admit(scheduler, request, 1, settings)
+    if settings.use_job_queue:
+        async with in_transaction():
+            new_summary_id = await crud.create(payload)
+            await jobs.enqueue(new_summary_id, payload.url)
+    else:
+        new_summary_id = await crud.create(payload)
+        scheduler.schedule(Priority.INTERACTIVE, [(new_summary_id, payload.url)])
+    # Lists are dropped after the commit, or lists read before it would be cached as the new ones.
+    await notify_summaries_changed()
 
     return SummaryResponseSchema(id=new_summary_id, url=payload.url)
 
 
-@router.get('/{summary_id}/', response_model=SummarySchema)
-async def read_summary(summary_id: int = Path(..., ge=1)) -> dict:  # noqa: B008
-    summary = await crud.read(summary_id)
+@router.post(
+    '/batch/',
+    response_model=List[SummaryResponseSchema],
+    status_code=201,
+    responses=TOO_MANY_REQUESTS,
+)
+async def create_summaries(
+        payloads: List[SummaryPayloadSchema],
+        request: Request,
+        settings: Settings = Depends(get_settings),  # noqa: B008
+) -> List[SummaryResponseSchema]:
+    _check_batch_size(payloads, settings)
 
-    if summary is None:
+    cached_summaries = await get_summary_cache().get_many([payload.url for payload in payloads])
+    not_cached = [cached_summary is None for cached_summary in cached_summaries]
+    urls_to_summarize = list(compress((payload.url for payload in payloads), not_cached))
+
+    scheduler = get_scheduler()
+    await _admit(scheduler, request, len(urls_to_summarize), settings)
+    if settings.use_job_queue:
+        async with in_transaction():
+            new_summary_ids = await crud.create_many(payloads, cached_summaries)
+            await jobs.enqueue_many(list(compress(new_summary_ids, not_cached)), urls_to_summarize)
+    else:
+        new_summary_ids = await crud.create_many(payloads, cached_summaries)
+        ids_to_summarize = compress(new_summary_ids, not_cached)
+        scheduler.schedule(Priority.BULK, list(zip(ids_to_summarize, urls_to_summarize)))
+    await notify_summaries_changed()
+
+    return [
+        SummaryResponseSchema(id=summary_id, url=payload.url)
+        for summary_id, payload in zip(new_summary_ids, payloads)
+    ]
+
+
+@router.get('/batch/', response_model=List[Optional[SummarySchema]], responses=NOT_MODIFIED)
+async def read_summaries(
+        ids: List[PositiveInt] = Query(...),  # noqa: B008
+        if_none_match: Optional[str] = Header(None),  # noqa: B008
+        settings: Settings = Depends(get_settings),  # noqa: B008
+) -> Response:
+    _check_batch_size(ids, settings)
+
+    summaries = await crud.read_many(ids)
+    return _cached_response(make_response(_render(summaries)), if_none_match)
+
+
+@router.put('/batch/', response_model=List[SummarySchema])
+async def update_summaries(
+        payloads: List[SummaryBatchUpdateItemSchema],
+        settings: Settings = Depends(get_settings),  # noqa: B008
+) -> Response:
+    _check_batch_size(payloads, settings)
+
+    summaries = await crud.update_many([payload.id for payload in payloads], payloads)
+    return ORJSONResponse(summaries)
+
+
+@router.post('/batch/delete/', response_model=SummaryIdsSchema)
+async def delete_summaries(
+        payload: SummaryIdsSchema,
+        settings: Settings = Depends(get_settings),  # noqa: B008
+) -> SummaryIdsSchema:
+    _check_batch_size(payload.ids, settings)
+
+    return SummaryIdsSchema(ids=await crud.delete_many(payload.ids))
+
+
+@router.get('/export/', response_class=StreamingResponse)
+async def export_summaries(
+        export_format: ExportFormat = Query(ExportFormat.NDJSON, alias='format'),  # noqa: B008
+        filters: SummaryFilterSchema = Depends(),  # noqa: B008
+        settings: Settings = Depends(get_settings),  # noqa: B008
+) -> StreamingResponse:
+    chunks = crud.iterate_all(settings.export_chunk_size, filters)
+
+    return StreamingResponse(
+        export.FORMATTERS[export_format](chunks),
+        media_type=export.MEDIA_TYPES[export_format],
+        headers={
+            'Content-Disposition': f'attachment; filename="summaries.{export_format.value}"',
+        },
+    )
+
+
+@router.get(
+    '/search/', response_model=List[SummarySearchResultSchema], responses=NOT_MODIFIED,
+)
+async def search_summaries(
+        q: str = Query(..., min_length=1, max_length=1000),  # noqa: B008
+        limit: int = Query(20, ge=1, le=100),  # noqa: B008
+        offset: int = Query(0, ge=0, le=10000),  # noqa: B008
+        if_none_match: Optional[str] = Header(None),  # noqa: B008
+) -> Response:
+    response_cache = get_response_cache()
+    version = await response_cache.version()
+    key = search_key(urlencode({'q': q, 'limit': limit, 'offset': offset}), version)
+    cached = await response_cache.get(key)
+    if cached is None:
+        cached = make_response(_render(await search.search(q, limit, offset)))
+        await response_cache.set(key, cached, version)
+
+    return _cached_response(cached, if_none_match)
+
+
+@router.get('/{summary_id}/', response_model=SummarySchema, responses=NOT_MODIFIED)
+async def read_summary(
+        summary_id: int = Path(..., ge=1),  # noqa: B008
+        wait: float = Query(0, ge=0),  # noqa: B008
+        if_none_match: Optional[str] = Header(None),  # noqa: B008
+        settings: Settings = Depends(get_settings),  # noqa: B008
+) -> Response:
+    response_cache = get_response_cache()
+    key = summary_key(summary_id)
+    cached = await response_cache.get(key)
+    if cached is None:
+        version = await response_cache.version()
+        summary = await events.wait_for_summary(summary_id, min(wait, settings.summary_wait_max))
+        if summary is None:
+            raise HTTPException(status_code=404, detail='Summary not found')
+        cached = make_response(_render(summary))
+        # Pending summaries are about to change, only generated or failed ones are cached.
+        if not events.is_pending(summary):
+            await response_cache.set(key, cached, version)
+
+    return _cached_response(cached, if_none_match)
+
+
+@router.get('/{summary_id}/events/', response_class=StreamingResponse)
+async def stream_summary_events(
+        summary_id: int = Path(..., ge=1),  # noqa: B008
+        settings: Settings = Depends(get_settings),  # noqa: B008
+) -> StreamingResponse:
+    if await crud.read(summary_id) is None:
         raise HTTPException(status_code=404, detail='Summary not found')
-    return summary
+
+    return StreamingResponse(
+        events.summary_events(
+            summary_id, settings.summary_events_timeout, settings.summary_events_keep_alive,
+        ),
+        media_type=events.MEDIA_TYPE,
+        headers={'Cache-Control': 'no-cache'},
+    )
 
 
-@router.get('/', response_model=List[SummarySchema])
-async def read_all_summaries() -> List[dict]:
-    return await crud.read_all()
+@router.get(
+    '/',
+    response_model=List[SummaryListItemSchema],
+    response_model_exclude_unset=True,
+    responses=NOT_MODIFIED,
+)
+async def read_all_summaries(
+        request: Request,
+        filters: SummaryFilterSchema = Depends(),  # noqa: B008
+        limit: int = Query(100, ge=1, le=1000),  # noqa: B008
+        cursor: Optional[str] = None,
+        fields: Optional[List[SummaryField]] = Query(None),  # noqa: B008
+        if_none_match: Optional[str] = Header(None),  # noqa: B008
+) -> Response:
+    response_cache = get_response_cache()
+    version = await response_cache.version()
+    key = list_key(urlencode(sorted(request.query_params.multi_items())), version)
+    cached = await response_cache.get(key)
+    if cached is None:
+        cached = await _read_page(filters, limit, cursor, fields)
+        await response_cache.set(key, cached, version)
+
+    return _cached_response(cached, if_none_match)
 
 
 @router.put('/{summary_id}/', response_model=SummarySchema)
 async def update_summary(
         payload: SummaryUpdatePayloadSchema,
         summary_id: int = Path(..., ge=1),  # noqa: B008
-) -> dict:
+) -> Response:
     summary = await crud.update(summary_id, payload)
 
     if summary is None:
         raise HTTPException(status_code=404, detail='Summary not found')
-    return summary
+    return ORJSONResponse(summary)
 
 
 @router.delete('/{summary_id}/', response_model=SummarySchema)
-async def delete_summary(summary_id: int = Path(..., ge=1)) -> dict:  # noqa: B008
-    summary = await crud.read(summary_id)
-    if not summary:
+async def delete_summary(summary_id: int = Path(..., ge=1)) -> Response:  # noqa: B008
+    summary = await crud.delete(summary_id)
+
+    if summary is None:
         raise HTTPException(status_code=404, detail='Summary not found')
+    return ORJSONResponse(summary)
+
+
+async def _read_page(
+        filters: SummaryFilterSchema,
+        limit: int,
+        cursor: Optional[str],
+        fields: Optional[List[SummaryField]],
+) -> CachedResponse:
+    try:
+        after = crud.decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=422, detail='Invalid cursor')
+
+    requested_fields = {field.value for field in fields or SummaryField}
+    summaries = await crud.read_all(limit + 1, after, filters, requested_fields)
+    next_cursor = None
+    if len(summaries) > limit:
+        summaries = summaries[:limit]
+        next_cursor = crud.encode_cursor(summaries[-1])
+
+    items = [
+        {field: value for field, value in summary.items() if field in requested_fields}
+        for summary in summaries
+    ]
+    return make_response(_render(items), next_cursor)
+
+
+def _render(content: Any) -> bytes:
+    # Rows read from the DB hold only plain values, datetimes and str enums, which orjson serializes
+    # the same way as response models do, so they aren't validated through the models again.
+    return orjson.dumps(content)
+
+
+def _cached_response(cached: CachedResponse, if_none_match: Optional[str]) -> Response:
+    headers = {'ETag': cached.etag, 'Cache-Control': 'no-cache'}
+    if cached.next_cursor:
+        headers['X-Next-Cursor'] = cached.next_cursor
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type=ORJSONResponse.media_type, headers=headers)
+
+
+async def _admit(scheduler: Scheduler, request: Request, count: int, settings: Settings) -> None:
+    # With the job queue the in-process scheduler stays empty, so pending jobs are bounded instead.
+    queued = await jobs.pending_count() if settings.use_job_queue and count else None
+    # Clients are told to come back when the queue frees up or their bucket refills.
+    try:
+        scheduler.admit(request.client.host, count, queued)
+    except SchedulerBusy as error:
+        raise HTTPException(
+            status_code=429,
+            detail=str(error),
+            headers={'Retry-After': str(math.ceil(error.retry_after))},
+        )
 
-    await crud.delete(summary_id)
 
-    return summary
+def _check_batch_size(items: Sized, settings: Settings) -> None:
+    if len(items) > settings.batch_max_size:
+        raise HTTPException(
+            status_code=422, detail=f'Batch size must not exceed {settings.batch_max_size}',
+        )
@@ -0,0 +1,195 @@
+"""Summary cache keyed by normalized page URL."""
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from functools import lru_cache, partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from tortoise import timezone
+
+from app.config import get_settings
+from app.contents import ArticleSummary
+from app.models import SummaryStatus, TextSummary
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+TRACKING_PARAMS = frozenset({
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid', '_ga', '_hsenc',
+})
+TRACKING_PARAM_PREFIXES = ('utm_',)
+
+
+def normalize_url(url: str) -> str:
+    """Bring equivalent URLs to the same form to use them as a cache key.
+
+    Tracking parameters added by ad networks and mailers don't change the page, so they are dropped.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f'{netloc}:{parts.port}'
+    path = parts.path.rstrip('/')
+    query = urlencode(sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(name)
+    ))
+
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES)
+
+
+class LRUCache:
+    """In-process cache with least-recently-used eviction and per-entry expiration."""
+
+    def __init__(
+            self, maxsize: int, ttl: float, clock: Optional[Callable[[], float]] = None,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock or time.monotonic
+        self._entries: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value if it's present and not expired."""
+        try:
+            expires_at, value = self._entries[key]
+        except KeyError:
+            return default
+        if expires_at < self._clock():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value for `ttl` seconds, or the default TTL.
+
+        The least recently used values are evicted only if the cache is full.
+        """
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Remove a value from the cache."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all values from the cache."""
+        self._entries.clear()
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into a single execution."""
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable]) -> Any:
+        """Run `func` or wait for the result of the call already in flight for `key`."""
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(func())
+            self._calls[key] = call
+            call.add_done_callback(lambda _: self._calls.pop(key, None))
+        # Cancelling one of the waiters must not cancel the call for the others.
+        return await asyncio.shield(call)
+
+
+class SummaryCache:
+    """Two-tier summary cache: in-process LRU and, optionally, already stored summaries."""
+
+    def __init__(self, maxsize: int, ttl: float, use_db: bool) -> None:
+        self.ttl = ttl
+        self.use_db = use_db
+        self._memory = LRUCache(maxsize, ttl)
+        self._flights = SingleFlight()
+
+    async def get(self, url: str) -> Optional[ArticleSummary]:
+        """Get a fresh summary for a web page."""
+        summaries = await self.get_many([url])
+        return summaries[0]
+
+    async def get_many(self, urls: List[str]) -> List[Optional[ArticleSummary]]:
+        """Get fresh summaries for web pages, reading ones missing in memory with a single query."""
+        keys = [normalize_url(url) for url in urls]
+        summaries = {key: self._memory.get(key) for key in keys}
+        missing_urls = [url for url, key in zip(urls, keys) if summaries[key] is None]
+        if missing_urls and self.use_db:
+            stored_summaries = await self._get_stored(missing_urls)
+            for key, summary in stored_summaries.items():
+                self._memory.set(key, summary)
+            summaries.update(stored_summaries)
+        return [summaries[key] for key in keys]
+
+    async def get_or_compute(
+            self, url: str, compute: Callable[[], Awaitable[ArticleSummary]],
+    ) -> ArticleSummary:
+        """Get a summary from the cache or compute it once for all concurrent callers."""
+        summary = await self.get(url)
+        if summary is not None:
+            return summary
+
+        key = normalize_url(url)
+        return await self._flights.do(key, partial(self._compute, key, compute))
+
+    def invalidate(self, url: str) -> None:
+        """Forget the in-process summary for a web page."""
+        self._memory.delete(normalize_url(url))
+
+    async def _compute(
+            self, key: str, compute: Callable[[], Awaitable[ArticleSummary]],
+    ) -> ArticleSummary:
+        summary = await compute()
+        self._memory.set(key, summary)
+
+        return summary
+
+    async def _get_stored(self, urls: List[str]) -> Dict[str, ArticleSummary]:
+        """Get the latest fresh stored summaries of web pages by their normalized URLs."""
+        fresh_since = timezone.now() - timedelta(seconds=self.ttl)
+        # Pages may be stored under the requested URLs or already normalized ones.
+        # Only summaries generated from a fetched article are reused, not ones written by clients,
+        # and summaries cut to a budget of their request are not the full summary of the page.
+        fresh_summaries = TextSummary.filter(
+            url__in={*urls, *(normalize_url(url) for url in urls)},
+            status=SummaryStatus.DONE,
+            content_id__isnull=False,
+            fetched_at__gte=fresh_since,
+            max_sentences__isnull=True,
+            max_chars__isnull=True,
+        ).exclude(summary='')
+        stored_summaries: Dict[str, ArticleSummary] = {}
+        for stored in await fresh_summaries.order_by('-id').values('url', 'summary', 'content_id'):
+            stored_summaries.setdefault(
+                normalize_url(stored['url']),
+                ArticleSummary(stored['summary'], stored['content_id']),
+            )
+        return stored_summaries
+
+
+@lru_cache()
+def get_summary_cache() -> SummaryCache:
+    """Get summary cache configured from environment settings."""
+    settings = get_settings()
+    return SummaryCache(
+        maxsize=settings.summary_cache_size,
+        ttl=settings.summary_cache_ttl,
+        use_db=settings.summary_cache_db,
+    )
@@ -1,17 +1,84 @@
 """Environment-specific settings for the application."""
 import logging
+from enum import Enum
 from functools import lru_cache
+from typing import Optional
 
 from pydantic import BaseSettings, AnyUrl
 
 logger = logging.getLogger('uvicorn')
 
 
+class SummarizerBackendName(str, Enum):
+    """Available summarization algorithms."""
+
+    NEWSPAPER = 'newspaper'
+    NUMPY = 'numpy'
+
+
+class Compression(str, Enum):
+    """Algorithms to compress stored article texts."""
+
+    NONE = 'none'
+    ZLIB = 'zlib'
+    ZSTD = 'zstd'
+
+
 class Settings(BaseSettings):
     """Environment settings for web application."""
     environment: str = 'dev'
     testing: bool = False
     database_url: AnyUrl
+    db_pool_min_size: int = 1
+    db_pool_max_size: int = 5
+    db_statement_cache_size: int = 100
+    db_command_timeout: Optional[float] = None
+    fetch_threads: int = 8
+    fetch_max_connections: int = 100
+    fetch_max_connections_per_host: int = 4
+    fetch_timeout: float = 10
+    fetch_max_body_size: int = 5 * 1024 * 1024
+    fetch_user_agent: str = 'text-summary/0.1'
+    nlp_processes: int = 2
+    nlp_chunk_size: int = 20000
+    article_max_chars: int = 200000
+    summarizer_backend: SummarizerBackendName = SummarizerBackendName.NEWSPAPER
+    use_job_queue: bool = False
+    worker_concurrency: int = 4
+    worker_poll_interval: float = 1.0
+    worker_metrics_port: Optional[int] = None
+    job_lease_timeout: float = 600
+    refresh_stale_after: float = 24 * 60 * 60
+    refresh_interval: float = 60
+    refresh_batch_size: int = 100
+    refresh_concurrency: int = 4
+    partitions_ahead: int = 2
+    retention_months: Optional[int] = None
+    archive_dir: str = 'archive'
+    content_compression: Compression = Compression.ZLIB
+    content_compression_min_size: int = 1024
+    summary_cache_size: int = 1024
+    summary_cache_ttl: float = 3600
+    summary_cache_db: bool = False
+    response_cache_size: int = 10000
+    response_cache_ttl: float = 300
+    response_cache_url: Optional[str] = None
+    summary_max_attempts: int = 3
+    summary_retry_delay: float = 1
+    summary_retry_max_delay: float = 60
+    summary_wait_max: float = 30
+    summary_events_timeout: float = 300
+    summary_events_keep_alive: float = 15
+    batch_max_size: int = 1000
+    scheduler_concurrency: int = 8
+    scheduler_queue_size: int = 10000
+    client_rate_limit: Optional[float] = None
+    client_rate_burst: int = 100
+    export_chunk_size: int = 1000
+    profile_sample_rate: float = 0
+    profile_threshold: float = 1
+    profile_history: int = 20
+    profile_secret: Optional[str] = None
 
 
 @lru_cache()
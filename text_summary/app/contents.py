@@ -0,0 +1,87 @@
+"""Article texts and summaries stored once for every web page with the same content."""
+import hashlib
+import zlib
+from types import ModuleType
+from typing import NamedTuple, Optional, Tuple
+
+from tortoise.exceptions import IntegrityError
+
+from app.config import Compression, get_settings
+from app.models import ArticleContent
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+class ArticleSummary(NamedTuple):
+    """Summary of a web page and the hash of the article text it's made of, if there was any."""
+
+    summary: str
+    content_hash: Optional[str] = None
+
+
+def content_hash(text: str) -> str:
+    """Get a fixed size key of an article text, equal for texts differing only in whitespace."""
+    return hashlib.sha256(' '.join(text.split()).encode()).hexdigest()
+
+
+def compress(text: str, compression: Compression, min_size: int) -> Tuple[bytes, Compression]:
+    """Encode a text, compressing it if it's large enough for compression to pay off."""
+    data = text.encode()
+    if compression == Compression.NONE or len(data) < min_size:
+        return data, Compression.NONE
+    if compression == Compression.ZLIB:
+        compressed = zlib.compress(data, ZLIB_LEVEL)
+    else:
+        compressed = _zstandard().ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if len(compressed) >= len(data):
+        return data, Compression.NONE
+    return compressed, compression
+
+
+def decompress(data: bytes, compression: Compression) -> str:
+    """Decode a stored text."""
+    if compression == Compression.ZLIB:
+        data = zlib.decompress(data)
+    elif compression == Compression.ZSTD:
+        data = _zstandard().ZstdDecompressor().decompress(data)
+    return data.decode()
+
+
+async def get_summary(text_hash: str) -> Optional[str]:
+    """Get the stored summary of an article text."""
+    summaries = await ArticleContent.filter(content_hash=text_hash).values_list(
+        'summary', flat=True,
+    )
+    return summaries[0] if summaries else None
+
+
+async def get_text(text_hash: str) -> Optional[str]:
+    """Get a stored article text."""
+    content = await ArticleContent.get_or_none(content_hash=text_hash)
+    return decompress(content.text, content.compression) if content else None
+
+
+async def save(text_hash: str, text: str, summary: str) -> None:
+    """Store an article text and its summary, unless the same text is already stored."""
+    settings = get_settings()
+    data, compression = compress(
+        text, settings.content_compression, settings.content_compression_min_size,
+    )
+    try:
+        await ArticleContent.create(
+            content_hash=text_hash, text=data, compression=compression, summary=summary,
+        )
+    except IntegrityError:
+        # Another process stored the same text first.
+        return
+
+
+def _zstandard() -> ModuleType:
+    try:
+        import zstandard
+    except ImportError as error:
+        raise RuntimeError(
+            'zstandard is not installed, install text_summary with the `zstd` extra',
+        ) from error
+    return zstandard
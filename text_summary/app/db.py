@@ -3,12 +3,29 @@ import logging
 
 from fastapi import FastAPI
 from tortoise import Tortoise, run_async
+from tortoise.backends.base.config_generator import expand_db_url
 from tortoise.contrib.fastapi import register_tortoise
 
-from app.config import get_settings
+from app.config import get_settings, Settings
+
+ASYNCPG_ENGINE = 'tortoise.backends.asyncpg'
+
+
+def get_connection_config(settings: Settings) -> dict:
+    """Build Tortoise connection config with connection pool settings for Postgres."""
+    config = expand_db_url(settings.database_url)
+    if config['engine'] == ASYNCPG_ENGINE:
+        config['credentials'].update(
+            minsize=settings.db_pool_min_size,
+            maxsize=settings.db_pool_max_size,
+            statement_cache_size=settings.db_statement_cache_size,
+            command_timeout=settings.db_command_timeout,
+        )
+    return config
+
 
 TORTOISE_ORM = {
-    'connections': {'default': get_settings().database_url},
+    'connections': {'default': get_connection_config(get_settings())},
     'apps': {
         'models': {
             'models': ['app.models', 'aerich.models'],
@@ -24,8 +41,10 @@ def init_db(app: FastAPI) -> None:
     """Register Tortoise ORM."""
     register_tortoise(
         app=app,
-        db_url=get_settings().database_url,
-        modules={'models': ['app.models']},
+        config={
+            'connections': {'default': get_connection_config(get_settings())},
+            'apps': {'models': {'models': ['app.models'], 'default_connection': 'default'}},
+        },
         generate_schemas=False,
         add_exception_handlers=True,
     )
@@ -0,0 +1,98 @@
+"""Execution engine that keeps blocking summarization stages off the event loop."""
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable, Optional
+
+from app.config import get_settings
+from app.nlp import warm_up
+
+logger = logging.getLogger('uvicorn')
+
+
+class SummarizationEngine:
+    """Thread pool for network I/O and process pool for CPU-bound parsing and NLP."""
+
+    def __init__(
+            self,
+            fetch_threads: int,
+            nlp_processes: int,
+            initializer: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.fetch_threads = fetch_threads
+        self.nlp_processes = nlp_processes
+        self.initializer = initializer
+        self._io_pool: Optional[ThreadPoolExecutor] = None
+        self._cpu_pool: Optional[Executor] = None
+
+    @property
+    def started(self) -> bool:
+        """Check whether the worker pools are running."""
+        return self._io_pool is not None
+
+    def start(self) -> None:
+        """Create worker pools. CPU stages share the thread pool if no processes are configured.
+
+        The initializer runs in every worker process, or once in the current one.
+        """
+        if self.started:
+            return
+        logger.info(f'Starting summarization engine: {self.fetch_threads=} {self.nlp_processes=}')
+        self._io_pool = ThreadPoolExecutor(
+            max_workers=self.fetch_threads, thread_name_prefix='summary-io',
+        )
+        if self.nlp_processes > 0:
+            self._cpu_pool = ProcessPoolExecutor(
+                max_workers=self.nlp_processes, initializer=self.initializer,
+            )
+        else:
+            self._cpu_pool = self._io_pool
+            if self.initializer:
+                self.initializer()
+
+    async def warm_up(self) -> None:
+        """Start worker pools and wait until worker processes are initialized."""
+        self.start()
+        await self.run_cpu(_ready)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop worker pools."""
+        if not self.started:
+            return
+        logger.info('Shutting down summarization engine...')
+        if self._cpu_pool is not self._io_pool:
+            self._cpu_pool.shutdown(wait=wait)
+        self._io_pool.shutdown(wait=wait)
+        self._io_pool = None
+        self._cpu_pool = None
+
+    async def run_io(self, func: Callable, *args: Any) -> Any:
+        """Run a blocking I/O-bound function in the thread pool."""
+        self.start()
+        return await self._run(self._io_pool, func, *args)
+
+    async def run_cpu(self, func: Callable, *args: Any) -> Any:
+        """Run a CPU-bound function in the process pool. Function and args must be picklable."""
+        self.start()
+        return await self._run(self._cpu_pool, func, *args)
+
+    @staticmethod
+    async def _run(pool: Executor, func: Callable, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, partial(func, *args))
+
+
+def _ready() -> bool:
+    return True
+
+
+@lru_cache()
+def get_engine() -> SummarizationEngine:
+    """Get summarization engine configured from environment settings."""
+    settings = get_settings()
+    return SummarizationEngine(
+        fetch_threads=settings.fetch_threads,
+        nlp_processes=settings.nlp_processes,
+        initializer=partial(warm_up, settings.summarizer_backend),
+    )
@@ -0,0 +1,176 @@
+"""Extractive summarization with TF-IDF weighted TextRank computed in vectorized form.
+
+Sentences of all articles of a batch share one sparse sentence-term matrix stored as
+(sentence, term, weight) arrays, so every scoring step is a handful of NumPy operations
+for the whole batch instead of Python loops over words and sentences.
+"""
+import importlib.util
+import os
+import re
+from functools import lru_cache
+from typing import FrozenSet, List, Sequence, Tuple
+
+import numpy as np
+
+PARAGRAPH_BOUNDARY = re.compile(r'\n\s*\n|\r\n\s*\r\n')
+SENTENCE_BOUNDARY = re.compile(r'(?:(?<=[.!?])|(?<=[.!?]["\')\]]))\s+(?=["\'(\[]*[A-Z0-9])')
+WORD = re.compile(r'\w+')
+NLP_STOPWORDS_PATH = os.path.join('resources', 'misc', 'stopwords-nlp-en.txt')
+DAMPING = 0.85
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-6
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences on paragraph breaks and sentence punctuation."""
+    return [
+        sentence.strip()
+        for paragraph in PARAGRAPH_BOUNDARY.split(text)
+        for sentence in SENTENCE_BOUNDARY.split(paragraph)
+        if sentence.strip()
+    ]
+
+
+@lru_cache()
+def get_stopwords() -> FrozenSet[str]:
+    """Load English stopwords newspaper uses for summarization, without importing newspaper."""
+    spec = importlib.util.find_spec('newspaper')
+    if spec is None or not spec.submodule_search_locations:
+        return frozenset()
+    path = os.path.join(spec.submodule_search_locations[0], NLP_STOPWORDS_PATH)
+    with open(path, encoding='utf-8') as stopwords_file:
+        return frozenset(line.strip() for line in stopwords_file if line.strip())
+
+
+class ExtractiveSummarizer:
+    """Picks the most central sentences of each article of a batch."""
+
+    def __init__(self, max_sentences: int = 5, stopwords: FrozenSet[str] = frozenset()) -> None:
+        self.max_sentences = max_sentences
+        self.stopwords = stopwords
+
+    def summarize_batch(self, texts: Sequence[str]) -> List[str]:
+        """Summarize texts, joining picked sentences in document order with newlines."""
+        sentences = [split_sentences(text) for text in texts]
+        sentence_counts = np.array([len(article) for article in sentences], dtype=np.int64)
+        flat_sentences = [sentence for article in sentences for sentence in article]
+        if not flat_sentences:
+            return [''] * len(texts)
+
+        sentence_articles = np.repeat(np.arange(len(texts)), sentence_counts)
+        scores = self.score_sentences(flat_sentences, sentence_articles, len(texts))
+        picked = _top_per_group(scores, sentence_articles, sentence_counts, self.max_sentences)
+
+        summaries: List[List[str]] = [[] for _ in texts]
+        for sentence_index in picked:
+            summaries[sentence_articles[sentence_index]].append(flat_sentences[sentence_index])
+        return ['\n'.join(summary) for summary in summaries]
+
+    def score_sentences(
+            self,
+            sentences: Sequence[str],
+            sentence_articles: np.ndarray,
+            articles_count: int,
+    ) -> np.ndarray:
+        """Score sentences of many articles with TextRank over TF-IDF cosine similarity."""
+        token_sentences, token_terms = self._tokenize(sentences)
+        sentences_count = len(sentences)
+        if not token_terms.size:
+            return np.zeros(sentences_count)
+
+        # Unique (sentence, term) pairs are non-zero cells of the sentence-term matrix.
+        terms_count = int(token_terms.max()) + 1
+        cells, term_frequencies = np.unique(
+            token_sentences * terms_count + token_terms, return_counts=True,
+        )
+        cell_sentences = cells // terms_count
+        cell_articles = sentence_articles[cell_sentences]
+        # Cells of the same article and term form a column of that article's matrix.
+        _, cell_columns, document_frequencies = np.unique(
+            cell_articles * terms_count + cells % terms_count,
+            return_inverse=True,
+            return_counts=True,
+        )
+
+        article_sizes = np.bincount(sentence_articles, minlength=articles_count)[cell_articles]
+        idf = np.log((1 + article_sizes) / (1 + document_frequencies[cell_columns])) + 1
+        weights = (1 + np.log(term_frequencies)) * idf
+        norms = np.sqrt(np.bincount(cell_sentences, weights * weights, sentences_count))
+        weights /= norms[cell_sentences]
+
+        return _text_rank(
+            _Similarity(weights, cell_sentences, cell_columns, sentences_count),
+            np.bincount(sentence_articles, minlength=articles_count)[sentence_articles],
+        )
+
+    def _tokenize(self, sentences: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Get sentence index and term id of every meaningful word of sentences."""
+        words = [
+            [word for word in WORD.findall(sentence.lower()) if word not in self.stopwords]
+            for sentence in sentences
+        ]
+        lengths = np.array([len(sentence_words) for sentence_words in words], dtype=np.int64)
+        flat_words = np.array([word for sentence_words in words for word in sentence_words])
+        if not flat_words.size:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        _, terms = np.unique(flat_words, return_inverse=True)
+        return np.repeat(np.arange(len(sentences)), lengths), terms.astype(np.int64)
+
+
+class _Similarity:
+    """Cosine similarity of sentences of the same article as a sparse linear operator."""
+
+    def __init__(
+            self,
+            weights: np.ndarray,
+            cell_sentences: np.ndarray,
+            cell_columns: np.ndarray,
+            sentences_count: int,
+    ) -> None:
+        self.weights = weights
+        self.cell_sentences = cell_sentences
+        self.cell_columns = cell_columns
+        self.sentences_count = sentences_count
+        self.columns_count = int(cell_columns.max()) + 1
+        self.self_similarity = np.bincount(cell_sentences, weights * weights, sentences_count)
+
+    def dot(self, vector: np.ndarray) -> np.ndarray:
+        """Multiply similarity matrix without its diagonal by a vector of sentence values."""
+        column_sums = np.bincount(
+            self.cell_columns, self.weights * vector[self.cell_sentences], self.columns_count,
+        )
+        products = np.bincount(
+            self.cell_sentences,
+            self.weights * column_sums[self.cell_columns],
+            self.sentences_count,
+        )
+        return products - self.self_similarity * vector
+
+
+def _text_rank(similarity: _Similarity, article_sizes: np.ndarray) -> np.ndarray:
+    """Run weighted PageRank power iteration for all articles at once."""
+    degrees = similarity.dot(np.ones(similarity.sentences_count))
+    inverse_degrees = np.divide(1, degrees, out=np.zeros_like(degrees), where=degrees > TOLERANCE)
+    teleport = (1 - DAMPING) / article_sizes
+    ranks = 1 / article_sizes
+    for _ in range(MAX_ITERATIONS):
+        updated_ranks = teleport + DAMPING * similarity.dot(ranks * inverse_degrees)
+        converged = np.abs(updated_ranks - ranks).max() < TOLERANCE
+        ranks = updated_ranks
+        if converged:
+            break
+    return ranks
+
+
+def _top_per_group(
+        scores: np.ndarray,
+        groups: np.ndarray,
+        group_sizes: np.ndarray,
+        limit: int,
+) -> np.ndarray:
+    """Get indices of up to `limit` best scored items of each group, in original order."""
+    order = np.lexsort((-scores, groups))
+    group_starts = np.repeat(np.cumsum(group_sizes) - group_sizes, group_sizes)
+    places = np.arange(len(scores)) - group_starts
+    return np.sort(order[places < limit])
@@ -0,0 +1,161 @@
+"""Asynchronous web page fetching over shared keep-alive connections."""
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Dict, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import get_settings
+
+NOT_MODIFIED = 304
+
+
+class FetchError(Exception):
+    """Web page can't be fetched."""
+
+
+class FetchedPage(NamedTuple):
+    """Downloaded web page, or only its validators if it's not modified since the last fetch."""
+
+    html: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+    @property
+    def not_modified(self) -> bool:
+        """Check whether the server confirmed that the stored copy of the page is fresh."""
+        return self.html is None
+
+
+class HostLimiter:
+    """Caps the number of concurrent requests to each host."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._users: Counter = Counter()
+
+    @asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[None]:
+        """Wait for a free request slot of a host."""
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.limit)
+        self._users[host] += 1
+        try:
+            async with semaphore:
+                yield
+        finally:
+            self._users[host] -= 1
+            if not self._users[host]:
+                del self._users[host]
+                del self._semaphores[host]
+
+
+class Fetcher:
+    """Downloads web pages with one connection pool, per-host limits and conditional GETs."""
+
+    def __init__(
+            self,
+            max_connections: int,
+            max_connections_per_host: int,
+            timeout: float,
+            max_body_size: int,
+            user_agent: str,
+    ) -> None:
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_body_size = max_body_size
+        self.user_agent = user_agent
+        self.host_limiter = HostLimiter(max_connections_per_host)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client shared by all fetches, created on first use."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers={'User-Agent': self.user_agent},
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """Close pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch(
+            self,
+            url: str,
+            etag: Optional[str] = None,
+            last_modified: Optional[str] = None,
+    ) -> FetchedPage:
+        """Download a web page, revalidating a stored copy if its validators are given."""
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        async with self.host_limiter.slot(urlsplit(url).netloc.lower()):
+            async with self.client.stream('GET', url, headers=headers) as response:
+                if response.status_code == NOT_MODIFIED:
+                    return FetchedPage(None, etag, last_modified)
+                response.raise_for_status()
+                html = await self._read_text(response)
+
+        return FetchedPage(
+            html, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+        )
+
+    async def _read_text(self, response: httpx.Response) -> str:
+        """Read response body, refusing to load more than the configured size."""
+        declared_size = int(response.headers.get('Content-Length') or 0)
+        if declared_size > self.max_body_size:
+            raise FetchError(f'{response.url} is too large: {declared_size} bytes')
+
+        size_limit = _SizeLimit(self.max_body_size, str(response.url))
+        body = b''.join([size_limit.check(chunk) async for chunk in response.aiter_bytes()])
+        if response.encoding:
+            return body.decode(response.encoding, errors='replace')
+        from bs4 import UnicodeDammit
+
+        return UnicodeDammit(body, is_html=True).unicode_markup
+
+
+class _SizeLimit:
+    """Counts received bytes and stops a download that exceeds the limit."""
+
+    def __init__(self, max_size: int, url: str) -> None:
+        self.max_size = max_size
+        self.url = url
+        self.size = 0
+
+    def check(self, chunk: bytes) -> bytes:
+        """Account for a received chunk."""
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise FetchError(f'{self.url} is larger than {self.max_size} bytes')
+        return chunk
+
+
+@lru_cache()
+def get_fetcher() -> Fetcher:
+    """Get web page fetcher configured from environment settings."""
+    settings = get_settings()
+    return Fetcher(
+        max_connections=settings.fetch_max_connections,
+        max_connections_per_host=settings.fetch_max_connections_per_host,
+        timeout=settings.fetch_timeout,
+        max_body_size=settings.fetch_max_body_size,
+        user_agent=settings.fetch_user_agent,
+    )
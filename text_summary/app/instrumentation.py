@@ -0,0 +1,105 @@
+"""DB round-trip instrumentation of summarizer web app."""
+import importlib
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Awaitable, Callable, Iterator, List, Optional
+
+from fastapi import Request, Response
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.config import get_settings
+from app.metrics import DB_QUERIES, DB_TIME
+
+BACKENDS = ('tortoise.backends.asyncpg', 'tortoise.backends.sqlite', 'tortoise.backends.mysql')
+QUERY_METHODS = (
+    'execute_insert', 'execute_many', 'execute_query', 'execute_query_dict', 'execute_script',
+)
+INSTRUMENTED_ATTR = '__query_stats_instrumented__'
+QUERY_COUNT_HEADER = 'X-DB-Query-Count'
+QUERY_TIME_HEADER = 'X-DB-Query-Time'
+
+
+class QueryStats:
+    """Number of DB queries and total time spent waiting for them."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+
+    def record(self, duration: float) -> None:
+        """Record a finished query."""
+        self.count += 1
+        self.duration += duration
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar('query_stats', default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect stats of DB queries sent by the current task while inside the context."""
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def instrument_db_clients() -> None:
+    """Wrap query methods of all available Tortoise DB clients to record query stats."""
+    _import_backends()
+    for client_class in _subclasses(BaseDBAsyncClient):
+        for method_name in QUERY_METHODS:
+            method = vars(client_class).get(method_name)
+            if method and not getattr(method, INSTRUMENTED_ATTR, False):
+                setattr(client_class, method_name, _timed(method))
+
+
+async def record_query_stats(
+    request: Request,
+    call_next: Callable[[Request], Awaitable[Response]],
+) -> Response:
+    """Report DB query count and time of a request in headers in dev, as metrics otherwise."""
+    with track_queries() as stats:
+        response = await call_next(request)
+    if get_settings().environment == 'dev':
+        response.headers[QUERY_COUNT_HEADER] = str(stats.count)
+        response.headers[QUERY_TIME_HEADER] = f'{stats.duration * 1000:.3f}'
+    else:
+        DB_QUERIES.observe(stats.count)
+        DB_TIME.observe(stats.duration)
+    return response
+
+
+def _timed(method: Callable) -> Callable:
+    @wraps(method)
+    async def timed_method(*args, **kwargs):  # noqa: ANN002, ANN003, ANN202
+        stats = _query_stats.get()
+        if stats is None:
+            return await method(*args, **kwargs)
+        started_at = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            stats.record(time.perf_counter() - started_at)
+
+    setattr(timed_method, INSTRUMENTED_ATTR, True)
+    return timed_method
+
+
+def _import_backends() -> None:
+    for backend in BACKENDS:
+        try:
+            importlib.import_module(backend)
+        except ImportError:
+            continue
+
+
+def _subclasses(cls: type) -> List[type]:
+    subclasses = [cls]
+    for subclass in cls.__subclasses__():
+        subclasses.extend(_subclasses(subclass))
+    return subclasses
@@ -0,0 +1,117 @@
+"""Durable queue of summary generation jobs stored in the summarizer database."""
+from datetime import datetime, timedelta
+from typing import List
+
+from tortoise import timezone
+from tortoise.query_utils import Q
+
+from app.models import JobStatus, Priority, SummaryJob
+
+CLAIM_JOBS_SQL = (
+    'WITH "claimable" AS ('
+    ' SELECT "id" FROM "summaryjob"'
+    ' WHERE ("status" = $3 AND ("run_at" IS NULL OR "run_at" <= $2))'
+    ' OR ("status" = $1 AND "locked_at" < $4)'
+    ' ORDER BY "priority", "id" LIMIT $5 FOR UPDATE SKIP LOCKED'
+    ') '
+    'UPDATE "summaryjob" SET "status" = $1, "locked_at" = $2, "attempts" = "attempts" + 1 '
+    'FROM "claimable" WHERE "summaryjob"."id" = "claimable"."id" '
+    'RETURNING "summaryjob"."id", "summary_id", "url", "attempts"'
+)
+DELETE_ORPHANED_JOBS_SQL = (
+    'DELETE FROM "summaryjob" WHERE NOT EXISTS ('
+    ' SELECT 1 FROM "textsummary" WHERE "textsummary"."id" = "summaryjob"."summary_id"'
+    ')'
+)
+
+
+async def enqueue(summary_id: int, url: str) -> int:
+    """Add a generation job of a summary created by itself to the queue."""
+    job = await SummaryJob.create(summary_id=summary_id, url=url, priority=Priority.INTERACTIVE)
+
+    return job.id
+
+
+async def enqueue_many(summary_ids: List[int], urls: List[str]) -> None:
+    """Add generation jobs of summaries created in a batch with a single insert.
+
+    Batch jobs are claimed after all pending jobs of summaries created by themselves.
+    """
+    await SummaryJob.bulk_create([
+        SummaryJob(summary_id=summary_id, url=url, priority=Priority.BULK)
+        for summary_id, url in zip(summary_ids, urls)
+    ])
+
+
+async def claim(limit: int, lease_timeout: float) -> List[dict]:
+    """Lock up to `limit` pending jobs for the current worker.
+
+    Jobs that stay running longer than `lease_timeout` seconds are considered abandoned
+    by a dead worker and are claimed again.
+    """
+    now = timezone.now()
+    lease_expired_at = now - timedelta(seconds=lease_timeout)
+
+    db = SummaryJob._meta.db
+    if db.capabilities.dialect == 'postgres':
+        return await db.execute_query_dict(
+            CLAIM_JOBS_SQL,
+            [JobStatus.RUNNING.value, now, JobStatus.PENDING.value, lease_expired_at, limit],
+        )
+    return await _claim_compare_and_set(limit, now, lease_expired_at)
+
+
+async def _claim_compare_and_set(
+        limit: int, now: datetime, lease_expired_at: datetime,
+) -> List[dict]:
+    """Claim jobs on databases without SKIP LOCKED using conditional updates."""
+    claimable = Q(
+        Q(status=JobStatus.PENDING),
+        Q(run_at__isnull=True) | Q(run_at__lte=now),
+    ) | Q(status=JobStatus.RUNNING, locked_at__lt=lease_expired_at)
+    candidates = SummaryJob.filter(claimable).order_by('priority', 'id').limit(limit)
+    claimed_jobs = []
+    for job in await candidates.values('id', 'summary_id', 'url', 'status', 'attempts'):
+        claimed = await SummaryJob.filter(
+            id=job['id'], status=job.pop('status'), attempts=job['attempts'],
+        ).update(status=JobStatus.RUNNING, locked_at=now, attempts=job['attempts'] + 1)
+        if claimed:
+            job['attempts'] += 1
+            claimed_jobs.append(job)
+    return claimed_jobs
+
+
+async def complete(job_id: int) -> None:
+    """Remove a finished job from the queue."""
+    await SummaryJob.filter(id=job_id).delete()
+
+
+async def retry(job_id: int, error: str, delay: float) -> None:
+    """Put a job back into the queue to be claimed again after `delay` seconds."""
+    await SummaryJob.filter(id=job_id).update(
+        status=JobStatus.PENDING,
+        error=error,
+        locked_at=None,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+async def fail(job_id: int, error: str) -> None:
+    """Mark a job as failed, keeping it for inspection."""
+    await SummaryJob.filter(id=job_id).update(status=JobStatus.FAILED, error=error)
+
+
+async def pending_count() -> int:
+    """Count jobs waiting to be processed."""
+    return await SummaryJob.filter(status=JobStatus.PENDING).count()
+
+
+async def delete_summary_jobs(summary_ids: List[int]) -> None:
+    """Remove jobs of deleted summaries."""
+    await SummaryJob.filter(summary_id__in=summary_ids).delete()
+
+
+async def delete_orphaned() -> int:
+    """Remove jobs of summaries that no longer exist, e.g. archived ones, and count them."""
+    deleted, _ = await SummaryJob._meta.db.execute_query(DELETE_ORPHANED_JOBS_SQL)
+    return deleted
@@ -2,9 +2,17 @@
 import logging
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
-from app.api import summaries
-from app.db import init_db
+from app.api import metrics, profiles, summaries
+from app.config import get_settings
+from app.db import get_connection_config, init_db
+from app.engine import get_engine
+from app.fetcher import get_fetcher
+from app.instrumentation import instrument_db_clients, record_query_stats
+from app.notifications import get_notification_hub
+from app.profiling import profile_requests
+from app.scheduler import get_scheduler
 
 
 logger = logging.getLogger('uvicorn')
@@ -12,8 +20,17 @@ logger = logging.getLogger('uvicorn')
 
 def create_application() -> FastAPI:
     """Create summarizer web application and register it's URLs."""
-    application = FastAPI()
+    settings = get_settings()
+    application = FastAPI(default_response_class=ORJSONResponse)
     application.include_router(summaries.router, prefix='/summaries', tags=['summaries'])
+    application.include_router(metrics.router)
+    application.include_router(profiles.router, prefix='/admin/profiles', tags=['admin'])
+
+    instrument_db_clients()
+    application.middleware('http')(record_query_stats)
+    # Requests aren't checked for profiling tokens unless profiling is enabled.
+    if settings.profile_sample_rate or settings.profile_secret:
+        application.middleware('http')(profile_requests)
 
     return application
 
@@ -23,6 +40,21 @@ app = create_application()
 
 @app.on_event('startup')
 async def startup_event() -> None:
-    """Initialize ORM for summarizer web app."""
+    """Initialize ORM, summary notifications and, unless workers do it, summarization."""
     logger.info('Starting up...')
+    settings = get_settings()
     init_db(app)
+    await get_notification_hub().start(get_connection_config(settings))
+    if not settings.use_job_queue:
+        await get_engine().warm_up()
+        get_scheduler().start()
+
+
+@app.on_event('shutdown')
+async def shutdown_event() -> None:
+    """Stop summarization and close connections to web sites and notifications."""
+    logger.info('Shutting down...')
+    await get_scheduler().stop()
+    get_engine().shutdown()
+    await get_fetcher().close()
+    await get_notification_hub().stop()
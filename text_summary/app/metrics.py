@@ -0,0 +1,148 @@
+"""Prometheus metrics of summarizer web app."""
+import os
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Iterator, Optional
+
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    generate_latest,
+    Histogram,
+    multiprocess,
+    REGISTRY,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+MULTIPROCESS_DIR_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+DB_QUERIES = Histogram(
+    'summarizer_db_queries_per_request',
+    'Number of DB queries sent while handling a request.',
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_TIME = Histogram(
+    'summarizer_db_time_per_request_seconds',
+    'Time spent waiting for DB queries while handling a request.',
+)
+REQUEST_LATENCY = Histogram(
+    'summarizer_request_duration_seconds',
+    'Time to handle a request, by route and response status.',
+    ['method', 'route', 'status'],
+)
+STAGE_DURATION = Histogram(
+    'summarizer_stage_duration_seconds',
+    'Time spent in a summarization pipeline stage.',
+    ['stage'],
+    buckets=STAGE_BUCKETS,
+)
+STAGE_ERRORS = Counter(
+    'summarizer_stage_errors',
+    'Number of failed summarization pipeline stages.',
+    ['stage'],
+)
+NOT_MODIFIED_PAGES = Counter(
+    'summarizer_not_modified_pages',
+    'Number of fetched web pages that were not modified since the last fetch.',
+)
+DUPLICATE_CONTENTS = Counter(
+    'summarizer_duplicate_contents',
+    'Number of web pages whose article text was already summarized for another page.',
+)
+SUMMARIES_IN_PROGRESS = Gauge(
+    'summarizer_summaries_in_progress',
+    'Number of summaries being generated by this process.',
+    multiprocess_mode='livesum',
+)
+SCHEDULED_SUMMARIES = Gauge(
+    'summarizer_scheduled_summaries',
+    'Number of summaries waiting in the scheduler of this process, by priority.',
+    ['priority'],
+    multiprocess_mode='livesum',
+)
+REFRESHED_PAGES = Counter(
+    'summarizer_refreshed_pages',
+    'Number of web pages of stale summaries revalidated by the refresher, by result.',
+    ['result'],
+)
+REJECTED_SUMMARIES = Counter(
+    'summarizer_rejected_summaries',
+    'Number of summaries not created because of a full scheduler queue or a client rate limit.',
+    ['reason'],
+)
+
+
+class TimedRoute(APIRoute):
+    """API route that records request latency by route path and response status."""
+
+    def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+        """Wrap route handler to measure its latency."""
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            started_at = time.perf_counter()
+            status = 500
+            try:
+                response = await handler(request)
+                status = response.status_code
+                return response
+            except HTTPException as error:
+                status = error.status_code
+                raise
+            finally:
+                REQUEST_LATENCY.labels(request.method, self.path, status).observe(
+                    time.perf_counter() - started_at,
+                )
+
+        return timed_handler
+
+
+@contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """Measure duration of a pipeline stage and count its failures."""
+    started_at = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        STAGE_DURATION.labels(stage).observe(time.perf_counter() - started_at)
+
+
+def get_registry() -> CollectorRegistry:
+    """Get registry to expose, merging metrics of all gunicorn workers if needed."""
+    if MULTIPROCESS_DIR_ENV not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_metrics(queued_jobs: Optional[int] = None) -> bytes:
+    """Render metrics of this app and the current depth of the summary job queue if known."""
+    metrics = generate_latest(get_registry())
+    if queued_jobs is None:
+        return metrics
+    queue_registry = CollectorRegistry()
+    queue_registry.register(_QueueDepthCollector(queued_jobs))
+    return metrics + generate_latest(queue_registry)
+
+
+class _QueueDepthCollector:
+    """Reports a queue depth read from the DB at scrape time, shared by all workers."""
+
+    def __init__(self, queued_jobs: int) -> None:
+        self.queued_jobs = queued_jobs
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        """Yield queue depth metric."""
+        yield GaugeMetricFamily(
+            'summarizer_queued_jobs',
+            'Number of summary jobs waiting in the job queue.',
+            value=self.queued_jobs,
+        )
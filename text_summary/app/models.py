@@ -1,13 +1,121 @@
 """ORM models for summarizer app."""
+from enum import Enum, IntEnum
+
 from tortoise import fields, models
 
+from app.config import Compression
+
+
+class ArticleContent(models.Model):
+    """Extracted article text and its summary, stored once for all pages with the same text."""
+    content_hash = fields.CharField(max_length=64, pk=True)
+    text = fields.BinaryField()
+    compression = fields.CharEnumField(Compression, default=Compression.NONE)
+    summary = fields.TextField()
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return self.content_hash
+
+
+class SummaryStatus(str, Enum):
+    """Stage of a summary lifecycle."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+class TSVectorField(fields.Field, str):  # type: ignore
+    """Postgres full-text search document of a text, unused on other databases."""
+
+    indexable = False
+    SQL_TYPE = 'TEXT'
+
+    class _db_postgres:  # noqa: N801
+        SQL_TYPE = 'TSVECTOR'
+
 
 class TextSummary(models.Model):
     """Summary for a web page."""
     id = fields.IntField(pk=True)  # noqa: VNE003
     url = fields.TextField()
     summary = fields.TextField()
+    status = fields.CharEnumField(SummaryStatus, default=SummaryStatus.PENDING)
+    error = fields.TextField(null=True)
+    attempts = fields.IntField(default=0)
+    started_at = fields.DatetimeField(null=True)
+    finished_at = fields.DatetimeField(null=True)
+    # When the page was last fetched or revalidated, `content` holds the hash of its article text.
+    fetched_at = fields.DatetimeField(null=True)
+    content = fields.ForeignKeyField(
+        'models.ArticleContent',
+        related_name='summaries',
+        null=True,
+        on_delete=fields.SET_NULL,
+        index=True,
+    )
+    # Budget the generated summary is cut to, the shared summary of the page is stored uncut.
+    max_sentences = fields.SmallIntField(null=True)
+    max_chars = fields.IntField(null=True)
+    # Kept up to date by every write of `summary`, indexed with GIN by a migration.
+    search_vector = TSVectorField(null=True)
     created_at = fields.DatetimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = (('created_at', 'id'), ('status', 'id'), ('status', 'fetched_at'))
+
     def __str__(self) -> str:
         return self.url
+
+
+class Page(models.Model):
+    """Validators of the last fetched version of a web page and its summary."""
+    url_hash = fields.CharField(max_length=64, pk=True)
+    url = fields.TextField()
+    etag = fields.TextField(null=True)
+    last_modified = fields.TextField(null=True)
+    summary = fields.TextField()
+    content = fields.ForeignKeyField(
+        'models.ArticleContent', related_name='pages', null=True, on_delete=fields.SET_NULL,
+    )
+    fetched_at = fields.DatetimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return self.url
+
+
+class JobStatus(str, Enum):
+    """State of a summary generation job."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+
+
+class Priority(IntEnum):
+    """Priority class of scheduled summaries, lower values are generated first."""
+
+    INTERACTIVE = 0
+    BULK = 1
+
+
+class SummaryJob(models.Model):
+    """Queued summary generation for a web page."""
+    id = fields.IntField(pk=True)  # noqa: VNE003
+    # Not a foreign key: keys can't reference summaries partitioned by creation time on Postgres.
+    summary_id = fields.IntField(index=True)
+    url = fields.TextField()
+    status = fields.CharEnumField(JobStatus, default=JobStatus.PENDING)
+    # Jobs of summaries created one by one are claimed before ones created in batches.
+    priority = fields.SmallIntField(default=int(Priority.INTERACTIVE))
+    attempts = fields.IntField(default=0)
+    error = fields.TextField(null=True)
+    locked_at = fields.DatetimeField(null=True)
+    run_at = fields.DatetimeField(null=True)
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = (('status', 'priority', 'id'),)
+
+    def __str__(self) -> str:
+        return f'{self.url} ({self.status})'
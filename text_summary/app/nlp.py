@@ -0,0 +1,191 @@
+"""CPU-bound article parsing and summarization, run in summarization engine workers.
+
+Newspaper, NLTK and NumPy take most of the app import time, so they are imported
+when a worker warms up or first needs them rather than with the web app.
+"""
+import logging
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Sequence
+
+from app.config import SummarizerBackendName
+
+logger = logging.getLogger('uvicorn')
+
+PUNKT_TOKENIZER = 'tokenizers/punkt/english.pickle'
+WARM_UP_HTML = '<html><head><title>Warm up</title></head><body><p>Warm up.</p></body></html>'
+SUMMARY_SENTENCES = 5
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+
+
+class ParsedArticle(NamedTuple):
+    """Title and main text extracted from a web page."""
+
+    title: str
+    text: str
+
+
+class SummarizerBackend(ABC):
+    """Summarization algorithm applied to parsed articles."""
+
+    @abstractmethod
+    def summarize_batch(self, articles: Sequence[ParsedArticle]) -> List[str]:
+        """Summarize many articles at once."""
+
+    def summarize(self, article: ParsedArticle) -> str:
+        """Summarize an article."""
+        return self.summarize_batch([article])[0]
+
+
+class NewspaperBackend(SummarizerBackend):
+    """Newspaper's sentence scoring by title words, keywords, length and position."""
+
+    def __init__(self, max_sentences: int) -> None:
+        from newspaper import nlp
+
+        self.max_sentences = max_sentences
+        self.nlp = nlp
+        load_punkt()
+        nlp.load_stopwords('en')
+
+    def summarize_batch(self, articles: Sequence[ParsedArticle]) -> List[str]:
+        """Summarize articles one by one."""
+        return [
+            '\n'.join(self.nlp.summarize(
+                title=article.title, text=article.text, max_sents=self.max_sentences,
+            ))
+            for article in articles
+        ]
+
+
+class NumpyBackend(SummarizerBackend):
+    """Vectorized TF-IDF TextRank scoring of all sentences of a batch."""
+
+    def __init__(self, max_sentences: int) -> None:
+        from app.extractive import ExtractiveSummarizer, get_stopwords
+
+        self.summarizer = ExtractiveSummarizer(max_sentences, get_stopwords())
+
+    def summarize_batch(self, articles: Sequence[ParsedArticle]) -> List[str]:
+        """Summarize articles in one pass."""
+        return self.summarizer.summarize_batch([article.text for article in articles])
+
+
+BACKENDS = {
+    SummarizerBackendName.NEWSPAPER: NewspaperBackend,
+    SummarizerBackendName.NUMPY: NumpyBackend,
+}
+
+
+@lru_cache()
+def get_backend(name: SummarizerBackendName) -> SummarizerBackend:
+    """Get summarizer backend by name."""
+    return BACKENDS[name](max_sentences=SUMMARY_SENTENCES)
+
+
+def parse_article(url: str, html: str, max_chars: Optional[int] = None) -> ParsedArticle:
+    """Extract title and main text of a downloaded web page, keeping up to `max_chars` of text."""
+    from newspaper import Article
+
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+
+    return ParsedArticle(article.title, truncate_text(article.text, max_chars))
+
+
+def summarize_parsed(
+        article: ParsedArticle, backend: SummarizerBackendName, chunk_size: Optional[int] = None,
+) -> str:
+    """Summarize a parsed article with a summarizer backend.
+
+    Articles longer than `chunk_size` characters are split into chunks summarized in one batch,
+    then the summaries of chunks are summarized again, so scoring never sees the whole text.
+    """
+    summarizer = get_backend(backend)
+    if chunk_size is None or len(article.text) <= chunk_size:
+        return summarizer.summarize(article)
+
+    chunks = [
+        ParsedArticle(article.title, chunk) for chunk in split_chunks(article.text, chunk_size)
+    ]
+    chunk_summaries = summarizer.summarize_batch(chunks)
+    return summarizer.summarize(ParsedArticle(article.title, '\n\n'.join(chunk_summaries)))
+
+
+def truncate_text(text: str, max_chars: Optional[int]) -> str:
+    """Cut a text to at most `max_chars` characters at a whitespace if there is one."""
+    if max_chars is None or len(text) <= max_chars:
+        return text
+    cut = max(text.rfind(whitespace, 0, max_chars + 1) for whitespace in ' \n\t')
+    truncated = text[:cut].rstrip() if cut > 0 else ''
+    return truncated or text[:max_chars]
+
+
+def split_chunks(text: str, chunk_size: int) -> List[str]:
+    """Split a text into chunks of up to `chunk_size` characters made of whole paragraphs.
+
+    Paragraphs longer than a chunk are cut at whitespace.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    current_size = 0
+    for paragraph in _paragraphs(text, chunk_size):
+        if current and current_size + len(paragraph) > chunk_size:
+            chunks.append('\n\n'.join(current))
+            current, current_size = [], 0
+        current.append(paragraph)
+        current_size += len(paragraph) + 2
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+
+def _paragraphs(text: str, max_chars: int) -> List[str]:
+    paragraphs = []
+    for paragraph in PARAGRAPH_BREAK.split(text.strip()):
+        while len(paragraph) > max_chars:
+            head = truncate_text(paragraph, max_chars)
+            paragraphs.append(head)
+            rest = paragraph[len(head):]
+            paragraph = rest.lstrip()
+        if paragraph:
+            paragraphs.append(paragraph)
+    return paragraphs
+
+
+def limit_summary(
+        summary: str, max_sentences: Optional[int] = None, max_chars: Optional[int] = None,
+) -> str:
+    """Keep leading sentences of a summary that fit into the sentence and character budgets.
+
+    If even the first sentence doesn't fit into `max_chars`, it's truncated.
+    """
+    sentences = summary.split('\n')[:max_sentences]
+    if max_chars is None:
+        return '\n'.join(sentences)
+    kept: List[str] = []
+    for sentence in sentences:
+        if len('\n'.join([*kept, sentence])) > max_chars:
+            break
+        kept.append(sentence)
+    return '\n'.join(kept) if kept else truncate_text(sentences[0], max_chars)
+
+
+def load_punkt() -> None:
+    """Load NLTK sentence tokenizer into NLTK cache, failing if it's not installed."""
+    import nltk.data
+
+    try:
+        nltk.data.load(PUNKT_TOKENIZER)
+    except LookupError as error:
+        raise RuntimeError(
+            'NLTK punkt tokenizer is not installed, run `python -m nltk.downloader punkt`',
+        ) from error
+
+
+def warm_up(backend: SummarizerBackendName) -> None:
+    """Import parsing libraries and load summarizer models of the current process."""
+    logger.info(f'Warming up {backend.value} summarizer...')
+    summarize_parsed(parse_article('http://localhost/', WARM_UP_HTML), backend)
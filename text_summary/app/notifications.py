@@ -0,0 +1,156 @@
+"""Notifications about generated and changed summaries for all web processes."""
+import asyncio
+import logging
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, Optional, Set
+
+import asyncpg
+
+from app.db import ASYNCPG_ENGINE
+from app.models import TextSummary
+from app.response_cache import get_response_cache
+
+SUMMARY_READY_CHANNEL = 'summary_ready'
+SUMMARIES_CHANGED_CHANNEL = 'summaries_changed'
+# Payloads of notifications are limited to 8000 bytes.
+CHANGED_IDS_PER_NOTIFICATION = 500
+NOTIFY_SQL = 'SELECT pg_notify($1, $2)'
+# Delays between attempts to reconnect for notifications double from the first to the last one.
+RECONNECT_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30
+
+logger = logging.getLogger('uvicorn')
+
+
+class NotificationHub:
+    """Wakes up requests waiting for summaries generated by any process sharing the database."""
+
+    def __init__(self) -> None:
+        self._waiters: Dict[int, Set[asyncio.Event]] = {}
+        self._listener: Optional[asyncpg.Connection] = None
+        self._connection_config: Optional[dict] = None
+        self._reconnecting: Optional[asyncio.Future] = None
+
+    @contextmanager
+    def subscribe(self, summary_id: int) -> Iterator[asyncio.Event]:
+        """Get an event that is set when a summary is generated."""
+        ready = asyncio.Event()
+        self._waiters.setdefault(summary_id, set()).add(ready)
+        try:
+            yield ready
+        finally:
+            waiters = self._waiters[summary_id]
+            waiters.discard(ready)
+            if not waiters:
+                del self._waiters[summary_id]
+
+    def publish(self, summary_id: int) -> None:
+        """Wake up requests waiting for a summary in this process."""
+        for ready in self._waiters.get(summary_id, ()):
+            ready.set()
+
+    async def start(self, connection_config: dict) -> None:
+        """Listen for summaries generated or changed by other processes sharing a Postgres DB."""
+        if connection_config['engine'] != ASYNCPG_ENGINE or self._connection_config is not None:
+            return
+        await self._listen(connection_config)
+        self._connection_config = connection_config
+
+    async def stop(self) -> None:
+        """Stop listening for summaries generated by other processes."""
+        self._connection_config = None
+        if self._reconnecting is not None:
+            self._reconnecting.cancel()
+            self._reconnecting = None
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            await listener.close()
+
+    async def _listen(self, connection_config: dict) -> None:
+        credentials = connection_config['credentials']
+        listener = await asyncpg.connect(
+            host=credentials['host'],
+            port=credentials['port'],
+            user=credentials['user'],
+            password=credentials['password'],
+            database=credentials['database'],
+        )
+        await listener.add_listener(SUMMARY_READY_CHANNEL, self._on_notification)
+        await listener.add_listener(SUMMARIES_CHANGED_CHANNEL, self._on_change)
+        listener.add_termination_listener(self._on_termination)
+        self._listener = listener
+
+    async def _reconnect(self) -> None:
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                await self._listen(self._connection_config)
+            except (OSError, asyncpg.PostgresError) as error:
+                logger.warning(f'Failed to reconnect for summary notifications: {error!r}')
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+            else:
+                break
+        self._reconnecting = None
+        logger.info('Reconnected for summary notifications')
+        # Changes made while disconnected are not notified, so any cached response may be outdated.
+        await get_response_cache().invalidate_all()
+
+    def _on_termination(self, connection: asyncpg.Connection) -> None:
+        # Connections closed by `stop` are not the listener anymore.
+        if connection is not self._listener:
+            return
+        logger.warning('Lost connection for summary notifications, reconnecting')
+        self._listener = None
+        self._reconnecting = asyncio.ensure_future(self._reconnect())
+
+    def _on_notification(
+            self, connection: asyncpg.Connection, pid: int, channel: str, payload: str,
+    ) -> None:
+        try:
+            self.publish(int(payload))
+        except ValueError:
+            logger.warning(f'Invalid {channel} notification: {payload!r}')
+
+    def _on_change(
+            self, connection: asyncpg.Connection, pid: int, channel: str, payload: str,
+    ) -> None:
+        try:
+            summary_ids = [int(summary_id) for summary_id in payload.split(',') if summary_id]
+        except ValueError:
+            logger.warning(f'Invalid {channel} notification: {payload!r}')
+            return
+        asyncio.ensure_future(get_response_cache().invalidate(summary_ids))
+
+
+@lru_cache()
+def get_notification_hub() -> NotificationHub:
+    """Get notification hub of this process."""
+    return NotificationHub()
+
+
+async def notify_summary_ready(summary_id: int) -> None:
+    """Tell requests waiting in all web processes that a summary is generated."""
+    get_notification_hub().publish(summary_id)
+    db = TextSummary._meta.db
+    if db.capabilities.dialect == 'postgres':
+        await db.execute_query(NOTIFY_SQL, [SUMMARY_READY_CHANNEL, str(summary_id)])
+
+
+async def notify_summaries_changed(summary_ids: Iterable[int] = ()) -> None:
+    """Drop cached responses for changed summaries and summary lists in all web processes.
+
+    Without ids only lists are dropped, as it's done when new summaries are created.
+    """
+    summary_ids = list(summary_ids)
+    response_cache = get_response_cache()
+    await response_cache.invalidate(summary_ids)
+    db = TextSummary._meta.db
+    if response_cache.shared or db.capabilities.dialect != 'postgres':
+        return
+    for start in range(0, max(len(summary_ids), 1), CHANGED_IDS_PER_NOTIFICATION):
+        chunk = summary_ids[start:start + CHANGED_IDS_PER_NOTIFICATION]
+        await db.execute_query(
+            NOTIFY_SQL, [SUMMARIES_CHANGED_CHANNEL, ','.join(map(str, chunk))],
+        )
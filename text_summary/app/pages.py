@@ -0,0 +1,41 @@
+"""Last fetched versions of web pages, used to revalidate them with conditional GETs."""
+import hashlib
+from typing import Optional
+
+from tortoise import timezone
+from tortoise.exceptions import IntegrityError
+
+from app.cache import normalize_url
+from app.contents import ArticleSummary
+from app.fetcher import FetchedPage
+from app.models import Page
+
+
+def page_key(url: str) -> str:
+    """Get a fixed size key of a web page, equal for equivalent URLs."""
+    return hashlib.sha256(normalize_url(url).encode()).hexdigest()
+
+
+async def get(url: str) -> Optional[Page]:
+    """Get the last fetched version of a web page."""
+    return await Page.get_or_none(url_hash=page_key(url))
+
+
+async def save(url: str, fetched: FetchedPage, summarized: ArticleSummary) -> None:
+    """Remember validators of a fetched web page with its summary, if the server sent any."""
+    if not fetched.etag and not fetched.last_modified:
+        return
+    url_hash = page_key(url)
+    values = {
+        'etag': fetched.etag,
+        'last_modified': fetched.last_modified,
+        'summary': summarized.summary,
+        'content_id': summarized.content_hash,
+        'fetched_at': timezone.now(),
+    }
+    if await Page.filter(url_hash=url_hash).update(**values):
+        return
+    try:
+        await Page.create(url_hash=url_hash, url=url, **values)
+    except IntegrityError:
+        await Page.filter(url_hash=url_hash).update(**values)
@@ -0,0 +1,313 @@
+"""Monthly partitions of summaries on Postgres and archival of old partitions.
+
+Run as `python -m app.partitions` once a day, e.g. from cron. Partitions are created
+`partitions_ahead` months in advance, so new summaries never land in the default partition.
+With `retention_months` set, partitions of older months are detached, saved to gzip-compressed
+CSV files in `archive_dir` and dropped, which is much cheaper than deleting their rows.
+
+Summaries looked up by id are bounded by the months they may be created in, learned from the last
+ids of partitions of past months, so Postgres skips partitions of other months. Ids missed
+in those months are looked up again in all partitions.
+"""
+import asyncio
+import gzip
+import logging
+import os
+import re
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+from tortoise import Tortoise, timezone
+from tortoise.query_utils import Q
+from tortoise.queryset import QuerySet
+
+from app import jobs
+from app.config import get_settings
+from app.db import TORTOISE_ORM
+from app.models import TextSummary
+
+PARTITION_MONTH = re.compile(r'_(\d{4})_(\d{2})$')
+PARTITIONS_SQL = (
+    'SELECT "child"."relname" AS "name", "inherits"."inhrelid" IS NOT NULL AS "attached" '
+    'FROM "pg_class" AS "child" '
+    'LEFT JOIN "pg_inherits" AS "inherits" ON "inherits"."inhrelid" = "child"."oid" '
+    'WHERE "child"."relkind" = \'r\' AND pg_table_is_visible("child"."oid") '
+    'AND "child"."relname" ~ $1 ORDER BY "child"."relname"'
+)
+PARTITION_IDS_SQL = 'SELECT max("id") AS "last_id" FROM "{partition}"'
+CREATE_PARTITION_SQL = (
+    'CREATE TABLE IF NOT EXISTS "{partition}" PARTITION OF "{table}" '
+    "FOR VALUES FROM ('{start}') TO ('{end}')"
+)
+
+# Month of a partition with the last id in it.
+MonthLastId = Tuple[datetime, int]
+
+logger = logging.getLogger('uvicorn')
+
+
+def month_start(moment: datetime) -> datetime:
+    """Get the start of the month of a moment, in UTC like partition bounds."""
+    moment = moment.astimezone(dt_timezone.utc)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """Get the start of a month `months` after the given month start, or before if negative."""
+    year, month_index = divmod(month.year * 12 + month.month - 1 + months, 12)
+    return month.replace(year=year, month=month_index + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    """Get the name of the partition of a table holding rows created in a month."""
+    return f'{table}_{month:%Y_%m}'
+
+
+def partition_month(partition: str) -> Optional[datetime]:
+    """Get the month of a monthly partition from its name, None for other tables."""
+    match = PARTITION_MONTH.search(partition)
+    if match is None:
+        return None
+    return datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc)
+
+
+async def create_partitions(table: str, first_month: datetime, months: int) -> List[str]:
+    """Create missing partitions of `months` months from the first one, get their names."""
+    existing = {partition['name'] for partition in await _partitions(table)}
+    created = []
+    for offset in range(months):
+        start = add_months(first_month, offset)
+        partition = partition_name(table, start)
+        if partition in existing:
+            continue
+        await TextSummary._meta.db.execute_script(CREATE_PARTITION_SQL.format(
+            partition=partition,
+            table=table,
+            start=start.isoformat(),
+            end=add_months(start, 1).isoformat(),
+        ))
+        created.append(partition)
+    return created
+
+
+async def archive_partitions(table: str, before: datetime, archive_dir: Path) -> List[Path]:
+    """Move partitions of months before `before` into archive files, get the file paths.
+
+    Partitions are detached first, so a run interrupted midway is finished by the next one.
+    """
+    archived = []
+    for partition in await _partitions(table):
+        if partition_month(partition['name']) >= before:
+            continue
+        if partition['attached']:
+            await TextSummary._meta.db.execute_script(
+                f'ALTER TABLE "{table}" DETACH PARTITION "{partition["name"]}"',
+            )
+        archived.append(await _archive(partition['name'], archive_dir))
+    return archived
+
+
+async def maintain_partitions(
+        now: datetime, ahead: int, retention_months: Optional[int], archive_dir: Path,
+) -> None:
+    """Create summary partitions `ahead` months ahead and archive the expired ones."""
+    table = TextSummary._meta.db_table
+    current_month = month_start(now)
+    for partition in await create_partitions(table, current_month, ahead + 1):
+        logger.info(f'Created partition {partition}')
+    if retention_months is None:
+        return
+
+    before = add_months(current_month, -retention_months)
+    for archive in await archive_partitions(table, before, archive_dir):
+        logger.info(f'Archived summaries to {archive}')
+    deleted_jobs = await jobs.delete_orphaned()
+    if deleted_jobs:
+        logger.info(f'Deleted {deleted_jobs} jobs of archived summaries')
+
+
+class CreationRange(NamedTuple):
+    """Range of creation times of rows, from `since` up to but not including `until`."""
+
+    since: datetime
+    until: datetime
+
+
+# Range of creation times that doesn't skip any partition.
+NO_CREATION_RANGE = CreationRange(
+    datetime.min.replace(tzinfo=dt_timezone.utc), datetime.max.replace(tzinfo=dt_timezone.utc),
+)
+
+# Query of summaries with the ids created in the range, getting rows with their ids.
+ByIdsQuery = Callable[[List[int], CreationRange], Awaitable[List[dict]]]
+
+
+class CreationRanges:
+    """Ranges of months rows of a partitioned table are created in, by their ids.
+
+    Ids are taken in order as rows are stored, a moment after they are created. So a row with an id
+    up to the last id of a past month, and above those of earlier months, is created in that month
+    or later, and no later than the next month, as no row is stored a month after its creation.
+    Rows with ids above those of all past months are created in the previous month or later,
+    as only the current and the previous month still get new rows. Last ids of older months
+    never change, so they are loaded once a month.
+    """
+
+    def __init__(self, table: str) -> None:
+        self.table = table
+        self._month: Optional[datetime] = None
+        # Oldest first, None for tables without partitions.
+        self._last_ids: Optional[List[MonthLastId]] = None
+
+    async def creation_range(self, row_ids: Iterable[int], now: datetime) -> CreationRange:
+        """Get the range of creation times of rows with the ids, NO_CREATION_RANGE if unknown."""
+        current_month = month_start(now)
+        if self._month != current_month:
+            self._last_ids = await self._load_last_ids(current_month)
+            self._month = current_month
+        if self._last_ids is None:
+            return NO_CREATION_RANGE
+
+        open_since = add_months(current_month, -1)
+        ranges = [_creation_range(self._last_ids, row_id, open_since) for row_id in row_ids]
+        if not ranges:
+            return NO_CREATION_RANGE
+        return CreationRange(
+            min(created.since for created in ranges), max(created.until for created in ranges),
+        )
+
+    async def _load_last_ids(self, current_month: datetime) -> Optional[List[MonthLastId]]:
+        db = TextSummary._meta.db
+        if db.capabilities.dialect != 'postgres':
+            return None
+        partitions = [
+            partition for partition in await _partitions(self.table) if partition['attached']
+        ]
+        if not partitions:
+            return None
+
+        last_ids = []
+        for partition in partitions:
+            month = partition_month(partition['name'])
+            if month >= add_months(current_month, -1):
+                continue
+            ids = await db.execute_query_dict(PARTITION_IDS_SQL.format(partition=partition['name']))
+            if ids[0]['last_id'] is not None:
+                last_ids.append((month, ids[0]['last_id']))
+        return last_ids
+
+
+@lru_cache()
+def get_creation_ranges() -> CreationRanges:
+    """Get creation ranges of summaries."""
+    return CreationRanges(TextSummary._meta.db_table)
+
+
+async def creation_range(summary_ids: Iterable[int]) -> CreationRange:
+    """Get the range of creation times of summaries with the ids."""
+    return await get_creation_ranges().creation_range(summary_ids, timezone.now())
+
+
+async def find_by_ids(summary_ids: Iterable[int], query: ByIdsQuery) -> List[dict]:
+    """Run a query of summaries with the ids, skipping partitions of other months.
+
+    Creation ranges rely on how rows are stored, so ids the bounded query misses are queried
+    again without the bound rather than taken as missing summaries.
+    """
+    summary_ids = list(summary_ids)
+    created = await creation_range(summary_ids)
+    found = await query(summary_ids, created)
+    if created == NO_CREATION_RANGE:
+        return found
+
+    found_ids = {summary['id'] for summary in found}
+    missing_ids = [summary_id for summary_id in summary_ids if summary_id not in found_ids]
+    if not missing_ids:
+        return found
+    return found + await query(missing_ids, NO_CREATION_RANGE)
+
+
+async def read_by_ids(summary_ids: Iterable[int], *fields: str) -> List[dict]:
+    """Read fields of summaries with the ids, `id` included, skipping partitions of other months."""
+    fields = tuple(dict.fromkeys(('id', *fields)))
+    return await find_by_ids(
+        summary_ids, lambda ids, created: _in_range(ids, created).values(*fields),
+    )
+
+
+async def update_by_ids(summary_ids: Iterable[int], **values: Any) -> int:
+    """Update summaries with the ids, skipping partitions of other months if they are all found.
+
+    Get the number of updated summaries.
+    """
+    summary_ids = list(summary_ids)
+    created = await creation_range(summary_ids)
+    updated = await _in_range(summary_ids, created).update(**values)
+    if updated >= len(set(summary_ids)) or created == NO_CREATION_RANGE:
+        return updated
+    # Only rows outside of the range, so none of them is updated twice.
+    return updated + await TextSummary.filter(
+        Q(created_at__lt=created.since) | Q(created_at__gte=created.until), id__in=summary_ids,
+    ).update(**values)
+
+
+def _in_range(summary_ids: List[int], created: CreationRange) -> QuerySet:
+    return TextSummary.filter(
+        id__in=summary_ids, created_at__gte=created.since, created_at__lt=created.until,
+    )
+
+
+def _creation_range(
+        last_ids: List[MonthLastId], row_id: int, open_since: datetime,
+) -> CreationRange:
+    month = next((month for month, last_id in last_ids if row_id <= last_id), None)
+    if month is None:
+        return CreationRange(open_since, NO_CREATION_RANGE.until)
+    return CreationRange(month, add_months(month, 2))
+
+
+async def _partitions(table: str) -> List[dict]:
+    """Get monthly partitions of a table, both attached and detached, oldest first."""
+    return await TextSummary._meta.db.execute_query_dict(
+        PARTITIONS_SQL, [f'^{table}_[0-9]{{4}}_[0-9]{{2}}$'],
+    )
+
+
+async def _archive(partition: str, archive_dir: Path) -> Path:
+    """Save a detached partition to a gzip-compressed CSV file and drop it."""
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    archive = archive_dir / f'{partition}.csv.gz'
+    # The file gets its final name only when complete, so partial archives are never kept.
+    partial_archive = archive_dir / f'{partition}.csv.gz.partial'
+    db = TextSummary._meta.db
+    async with db.acquire_connection() as connection:
+        with gzip.open(partial_archive, 'wb') as output:
+            await connection.copy_from_table(partition, output=output, format='csv', header=True)
+    os.replace(partial_archive, archive)
+    await db.execute_script(f'DROP TABLE "{partition}"')
+    return archive
+
+
+async def main() -> None:
+    """Maintain summary partitions configured from environment settings."""
+    settings = get_settings()
+    await Tortoise.init(config=TORTOISE_ORM)
+    try:
+        if TextSummary._meta.db.capabilities.dialect != 'postgres':
+            logger.warning('Summaries are partitioned only on Postgres')
+            return
+        await maintain_partitions(
+            timezone.now(),
+            settings.partitions_ahead,
+            settings.retention_months,
+            Path(settings.archive_dir),
+        )
+    finally:
+        await Tortoise.close_connections()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,207 @@
+"""Opt-in profiling of slow requests and summary generation.
+
+A `profile_sample_rate` share of requests and summary generations, and every request with a valid
+profiling token in the `X-Profile-Token` header, run under cProfile while a thread samples the stack
+of the event loop. Profiles of runs slower than `profile_threshold` seconds, and all requested ones,
+are kept in memory, the last `profile_history` of them, to be downloaded from admin endpoints.
+
+One run is profiled at a time, and the profile includes everything the event loop did meanwhile.
+Get a token valid for an hour with `python -m app.profiling 3600`.
+"""
+import cProfile
+import hashlib
+import hmac
+import itertools
+import marshal
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from types import FrameType
+from typing import Awaitable, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from fastapi import Request, Response
+from tortoise import timezone
+
+from app.config import get_settings
+
+PROFILE_TOKEN_HEADER = 'X-Profile-Token'  # noqa: S105
+SAMPLING_INTERVAL = 0.005
+UNPROFILED_PATHS = ('/admin/', '/metrics')
+
+
+class Profile(NamedTuple):
+    """Profile of a slow or requested run."""
+
+    id: int  # noqa: VNE003
+    name: str
+    started_at: datetime
+    duration: float
+    requested: bool
+    # Profile in the format of `cProfile.Profile.dump_stats`, read by `pstats`.
+    stats: bytes
+    stacks: Dict[str, int]
+
+    def folded_stacks(self) -> str:
+        """Get sampled stacks in the folded format of flame graph tools, one per line."""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.items())
+
+
+class StackSampler:
+    """Thread counting the stacks of another thread, sampled every `interval` seconds."""
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampling thread."""
+        self._stopped.set()
+        self._thread.join()
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[fold_stack(frame)] += 1
+
+
+def fold_stack(frame: FrameType) -> str:
+    """Get a stack from the outermost call to a frame as a line of folded stacks."""
+    calls: List[str] = []
+    current: Optional[FrameType] = frame
+    while current is not None:
+        code = current.f_code
+        calls.append(f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})')
+        current = current.f_back
+    return ';'.join(reversed(calls))
+
+
+class Profiler:
+    """Profiles a sampled share of runs and keeps the profiles of slow ones in a ring buffer."""
+
+    def __init__(
+            self,
+            sample_rate: float,
+            threshold: float,
+            history: int,
+            sampling_interval: float = SAMPLING_INTERVAL,
+            sample: Callable[[], float] = random.random,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.sampling_interval = sampling_interval
+        self._sample = sample
+        self._profiles: deque = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        self._active = False
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def profiles(self) -> List[Profile]:
+        """Get kept profiles, the latest first."""
+        return list(reversed(self._profiles))
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        """Get a kept profile by id."""
+        return next((profile for profile in self._profiles if profile.id == profile_id), None)
+
+    @contextmanager
+    def profile(self, name: str, requested: bool = False) -> Iterator[None]:
+        """Profile the code inside the context if it's sampled or requested and nothing else is.
+
+        Works across awaits, as long as the context is entered and left in the event loop thread.
+        """
+        if self._active or not (requested or self._sample() < self.sample_rate):
+            yield
+            return
+
+        self._active = True
+        started_at = timezone.now()
+        profile = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident(), self.sampling_interval)
+        started = time.perf_counter()
+        sampler.start()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            sampler.stop()
+            self._active = False
+            duration = time.perf_counter() - started
+            if requested or duration >= self.threshold:
+                self._keep(name, started_at, duration, requested, profile, sampler)
+
+    def _keep(
+            self,
+            name: str,
+            started_at: datetime,
+            duration: float,
+            requested: bool,
+            profile: cProfile.Profile,
+            sampler: StackSampler,
+    ) -> None:
+        profile.create_stats()
+        self._profiles.append(Profile(
+            next(self._ids), name, started_at, duration, requested,
+            marshal.dumps(profile.stats), dict(sampler.stacks),
+        ))
+
+
+@lru_cache()
+def get_profiler() -> Profiler:
+    """Get profiler configured from environment settings."""
+    settings = get_settings()
+    return Profiler(
+        settings.profile_sample_rate, settings.profile_threshold, settings.profile_history,
+    )
+
+
+def sign_profile_token(secret: str, expires_at: int) -> str:
+    """Get a profiling token valid until a Unix time."""
+    signature = hmac.new(secret.encode(), str(expires_at).encode(), hashlib.sha256).hexdigest()
+    return f'{expires_at}.{signature}'
+
+
+def verify_profile_token(secret: Optional[str], token: Optional[str]) -> bool:
+    """Check that a profiling token is signed with the secret and not expired."""
+    if not secret or not token:
+        return False
+    expires_at, _, _ = token.partition('.')
+    if not expires_at.isdigit() or int(expires_at) < time.time():
+        return False
+    return hmac.compare_digest(token, sign_profile_token(secret, int(expires_at)))
+
+
+async def profile_requests(
+    request: Request,
+    call_next: Callable[[Request], Awaitable[Response]],
+) -> Response:
+    """Profile sampled requests and requests with a valid profiling token."""
+    if request.url.path.startswith(UNPROFILED_PATHS):
+        return await call_next(request)
+    requested = verify_profile_token(
+        get_settings().profile_secret, request.headers.get(PROFILE_TOKEN_HEADER),
+    )
+    with get_profiler().profile(f'{request.method} {request.url.path}', requested):
+        return await call_next(request)
+
+
+if __name__ == '__main__':
+    secret = get_settings().profile_secret
+    if not secret:
+        sys.exit('Set PROFILE_SECRET to profile requests on demand')
+    sys.stdout.write(sign_profile_token(secret, int(time.time() + float(sys.argv[1]))) + '\n')
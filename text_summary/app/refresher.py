@@ -0,0 +1,156 @@
+"""Periodic refresh of summaries of web pages that may have changed since they were fetched.
+
+Run as `python -m app.refresher`, one per database. Pages are revalidated with conditional
+requests, and articles are summarized again only if their extracted text has changed.
+"""
+import asyncio
+import logging
+import signal
+from collections import defaultdict
+from contextlib import suppress
+from datetime import timedelta
+from typing import Dict, List
+
+from tortoise import Tortoise, timezone
+
+from app import partitions, search
+from app.config import get_settings
+from app.contents import ArticleSummary
+from app.db import TORTOISE_ORM
+from app.engine import get_engine
+from app.fetcher import get_fetcher
+from app.metrics import REFRESHED_PAGES
+from app.models import SummaryStatus, TextSummary
+from app.nlp import limit_summary
+from app.notifications import notify_summaries_changed
+from app.summarizer import summarize_url
+
+STALE_SUMMARY_FIELDS = ('id', 'url', 'content_id', 'max_sentences', 'max_chars')
+
+logger = logging.getLogger('uvicorn')
+
+
+class SummaryRefresher:
+    """Revalidates pages of the stalest summaries, a batch every `interval` seconds."""
+
+    def __init__(
+            self, stale_after: float, batch_size: int, concurrency: int, interval: float,
+    ) -> None:
+        self.stale_after = stale_after
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.interval = interval
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        """Stop refreshing after the current batch."""
+        logger.info('Stopping summary refresher...')
+        self._stopping.set()
+
+    async def run(self, until_idle: bool = False) -> None:
+        """Refresh summaries until stopped, or until none are stale if `until_idle` is set."""
+        while not self._stopping.is_set():
+            refreshed = await self.refresh_stale()
+            if until_idle and not refreshed:
+                break
+            await self._wait()
+
+    async def refresh_stale(self) -> int:
+        """Refresh a batch of summaries fetched more than `stale_after` seconds ago.
+
+        Summaries of the same page share one fetch. Returns the number of refreshed pages.
+        """
+        stale_before = timezone.now() - timedelta(seconds=self.stale_after)
+        stale = TextSummary.filter(status=SummaryStatus.DONE, fetched_at__lt=stale_before)
+        stale_summaries = await stale.order_by('fetched_at').limit(self.batch_size).values(
+            *STALE_SUMMARY_FIELDS,
+        )
+        summaries_by_url: Dict[str, List[dict]] = defaultdict(list)
+        for summary in stale_summaries:
+            summaries_by_url[summary['url']].append(summary)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def refresh(url: str, summaries: List[dict]) -> None:
+            async with semaphore:
+                await refresh_page(url, summaries)
+
+        await asyncio.gather(*(
+            refresh(url, summaries) for url, summaries in summaries_by_url.items()
+        ))
+        return len(summaries_by_url)
+
+    async def _wait(self) -> None:
+        """Sleep until the next batch or until the refresher is stopped."""
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+
+
+async def refresh_page(url: str, summaries: List[dict]) -> None:
+    """Revalidate a web page and update its summaries if its article text has changed."""
+    try:
+        summarized = await summarize_url(url)
+    except Exception:
+        # Summaries of failed pages stay as they are until the next staleness window.
+        logger.exception(f'Failed to refresh summaries of {url}')
+        REFRESHED_PAGES.labels('failed').inc()
+        await _mark_fetched(summaries)
+        return
+
+    changed = [
+        summary for summary in summaries if summary['content_id'] != summarized.content_hash
+    ]
+    await _mark_fetched([summary for summary in summaries if summary not in changed])
+    if changed:
+        await _update_summaries(changed, summarized)
+    REFRESHED_PAGES.labels('changed' if changed else 'unchanged').inc()
+
+
+async def _mark_fetched(summaries: List[dict]) -> None:
+    if summaries:
+        await partitions.update_by_ids(
+            (summary['id'] for summary in summaries), fetched_at=timezone.now(),
+        )
+
+
+async def _update_summaries(summaries: List[dict], summarized: ArticleSummary) -> None:
+    for summary in summaries:
+        text = limit_summary(summarized.summary, summary['max_sentences'], summary['max_chars'])
+        await partitions.update_by_ids(
+            [summary['id']],
+            summary=text,
+            content_id=summarized.content_hash,
+            fetched_at=timezone.now(),
+            **search.search_values(text),
+        )
+        search.index_summaries([(summary['id'], text)])
+    await notify_summaries_changed([summary['id'] for summary in summaries])
+
+
+async def main() -> None:
+    """Run a summary refresher configured from environment settings."""
+    settings = get_settings()
+    refresher = SummaryRefresher(
+        stale_after=settings.refresh_stale_after,
+        batch_size=settings.refresh_batch_size,
+        concurrency=settings.refresh_concurrency,
+        interval=settings.refresh_interval,
+    )
+
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, refresher.stop)
+
+    await Tortoise.init(config=TORTOISE_ORM)
+    try:
+        await get_engine().warm_up()
+        await refresher.run()
+    finally:
+        get_engine().shutdown()
+        await get_fetcher().close()
+        await Tortoise.close_connections()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
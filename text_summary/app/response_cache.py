@@ -0,0 +1,196 @@
+"""Cache of serialized summary API responses, dropped when summaries change."""
+import hashlib
+from functools import lru_cache
+from types import ModuleType
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+from app.cache import LRUCache
+from app.config import get_settings
+
+KEY_PREFIX = 'text-summary:'
+VERSION_KEY = 'summaries:version'
+
+
+class CachedResponse(NamedTuple):
+    """Serialized response body, its entity tag and the cursor of the next page of a list."""
+
+    body: bytes
+    etag: str
+    next_cursor: Optional[str] = None
+
+
+def make_response(body: bytes, next_cursor: Optional[str] = None) -> CachedResponse:
+    """Tag a serialized response body with an ETag of its content."""
+    digest = hashlib.blake2b(body, digest_size=16)
+    digest.update((next_cursor or '').encode())
+    return CachedResponse(body, f'"{digest.hexdigest()}"', next_cursor)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check whether a client already has the current version of a response."""
+    if not if_none_match:
+        return False
+    # GET revalidation uses weak comparison, so W/ prefixes don't matter.
+    tags = {tag.strip().replace('W/', '', 1) for tag in if_none_match.split(',')}
+    return '*' in tags or etag in tags
+
+
+class MemoryBackend:
+    """Responses cached in the memory of this process."""
+
+    shared = False
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._entries = LRUCache(maxsize, ttl)
+        # Counters live outside of the LRU: an evicted version would bring back stale responses.
+        self._counters: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get a cached value."""
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        """Store a value."""
+        self._entries.set(key, value)
+
+    async def delete(self, *keys: str) -> None:
+        """Remove values."""
+        for key in keys:
+            self._entries.delete(key)
+
+    async def counter(self, key: str) -> int:
+        """Get the current value of a counter."""
+        return self._counters.get(key, 0)
+
+    async def incr(self, key: str) -> int:
+        """Increment a counter."""
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def delete_all(self) -> None:
+        """Remove all values, keeping counters."""
+        self._entries.clear()
+
+    def clear(self) -> None:
+        """Remove all cached values."""
+        self._entries.clear()
+        self._counters.clear()
+
+
+class RedisBackend:
+    """Responses cached in Redis, or a store with a compatible client, shared by all processes."""
+
+    shared = True
+
+    def __init__(self, client: Any, ttl: float) -> None:
+        self.client = client
+        self.ttl = max(round(ttl), 1)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get a cached value."""
+        return await self.client.get(KEY_PREFIX + key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        """Store a value until it expires."""
+        await self.client.set(KEY_PREFIX + key, value, ex=self.ttl)
+
+    async def delete(self, *keys: str) -> None:
+        """Remove values."""
+        await self.client.delete(*(KEY_PREFIX + key for key in keys))
+
+    async def counter(self, key: str) -> int:
+        """Get the current value of a counter."""
+        return int(await self.client.get(KEY_PREFIX + key) or 0)
+
+    async def incr(self, key: str) -> int:
+        """Increment a counter."""
+        return await self.client.incr(KEY_PREFIX + key)
+
+
+class ResponseCache:
+    """Serialized summaries and pages of summary lists with their entity tags."""
+
+    def __init__(self, backend: Any) -> None:
+        self.backend = backend
+
+    @property
+    def shared(self) -> bool:
+        """Whether all processes see the same cache, so it needs no invalidation broadcasts."""
+        return self.backend.shared
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        """Get a cached response."""
+        value = await self.backend.get(key)
+        if value is None:
+            return None
+        etag, next_cursor, body = value.split(b'\n', 2)
+        return CachedResponse(body, etag.decode(), next_cursor.decode() or None)
+
+    async def version(self) -> int:
+        """Get the version of summaries, incremented on every change of any of them."""
+        return await self.backend.counter(VERSION_KEY)
+
+    async def set(self, key: str, response: CachedResponse, version: int) -> None:
+        """Cache a response built from summaries of the given version, unless they changed since.
+
+        A response built from summaries read before a change would bring the old data back.
+        """
+        if await self.version() != version:
+            return
+        cursor = (response.next_cursor or '').encode()
+        await self.backend.set(key, b'\n'.join((response.etag.encode(), cursor, response.body)))
+
+    async def invalidate(self, summary_ids: Iterable[int]) -> None:
+        """Drop cached responses for changed summaries and all cached pages of summary lists."""
+        keys = [summary_key(summary_id) for summary_id in summary_ids]
+        if keys:
+            await self.backend.delete(*keys)
+        await self.backend.incr(VERSION_KEY)
+
+    async def invalidate_all(self) -> None:
+        """Drop all responses cached by this process, as when notifications of changes are missed.
+
+        Shared caches are kept, as they are invalidated by every change.
+        """
+        if self.shared:
+            return
+        await self.backend.delete_all()
+        await self.backend.incr(VERSION_KEY)
+
+
+def summary_key(summary_id: int) -> str:
+    """Get the key of a single summary response."""
+    return f'summary:{summary_id}'
+
+
+def list_key(query: str, version: int) -> str:
+    """Get the key of a page of summary list.
+
+    Keys include the version of summaries, so any change drops all cached pages at once.
+    """
+    return f'summaries:{version}:{query}'
+
+
+def search_key(query: str, version: int) -> str:
+    """Get the key of a page of search results, dropped on any change like pages of lists."""
+    return f'search:{version}:{query}'
+
+
+@lru_cache()
+def get_response_cache() -> ResponseCache:
+    """Get response cache configured from environment settings."""
+    settings = get_settings()
+    if settings.response_cache_url:
+        client = _aioredis().from_url(settings.response_cache_url)
+        return ResponseCache(RedisBackend(client, settings.response_cache_ttl))
+    return ResponseCache(MemoryBackend(settings.response_cache_size, settings.response_cache_ttl))
+
+
+def _aioredis() -> ModuleType:
+    try:
+        import aioredis
+    except ImportError as error:
+        raise RuntimeError(
+            'aioredis is not installed, install text_summary with the `redis` extra',
+        ) from error
+    return aioredis
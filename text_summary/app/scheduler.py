@@ -0,0 +1,174 @@
+"""Scheduling of summaries generated inside the web process.
+
+Summaries requested interactively are generated before bulk ones, at most `concurrency` at a time.
+Clients are admitted by per-client token buckets, and nobody is admitted while the queue is full.
+"""
+import asyncio
+import itertools
+import logging
+import math
+import time
+from functools import lru_cache
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from app.cache import LRUCache
+from app.config import get_settings
+from app.metrics import REJECTED_SUMMARIES, SCHEDULED_SUMMARIES
+from app.models import Priority
+from app.profiling import get_profiler
+from app.summarizer import generate_summary
+
+MAX_CLIENTS = 10000
+# Smoothing factor of the average generation time used to estimate when the queue frees up.
+DURATION_SMOOTHING = 0.1
+
+logger = logging.getLogger('uvicorn')
+
+
+class SchedulerBusy(Exception):
+    """Summaries can't be scheduled now, the client should retry after `retry_after` seconds."""
+
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(f'{reason}, retry after {retry_after:.0f} seconds')
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Allows `rate` summaries per second on average and bursts of `burst` summaries."""
+
+    def __init__(
+            self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated_at = clock()
+
+    def time_to_full(self) -> float:
+        """Get the seconds until the bucket is full again, paying off any debt first."""
+        return max(self.burst - self._tokens, 0) / self.rate
+
+    def take(self, count: int) -> float:
+        """Take tokens for `count` summaries, or get the seconds to wait for them.
+
+        A batch larger than the burst is admitted once the bucket is full and takes it into debt,
+        so large batches are slowed down instead of being rejected forever.
+        """
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        needed = min(count, self.burst)
+        if self._tokens < needed:
+            return (needed - self._tokens) / self.rate
+        self._tokens -= count
+        return 0
+
+
+class Scheduler:
+    """Priority queue of summaries to generate, drained by a fixed number of tasks."""
+
+    def __init__(
+            self,
+            concurrency: int,
+            queue_size: int,
+            client_rate: Optional[float] = None,
+            client_burst: int = 1,
+            clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.average_duration = 1.0
+        self._clock = clock
+        # A bucket unused long enough to be full again is the same as a new one, so it expires then.
+        self._buckets = LRUCache(MAX_CLIENTS, 0, clock)
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._order = itertools.count()
+        self._workers: List[asyncio.Task] = []
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        """Start tasks generating scheduled summaries."""
+        if not self._workers:
+            self._workers = [
+                asyncio.ensure_future(self._work()) for _ in range(self.concurrency)
+            ]
+
+    async def stop(self) -> None:
+        """Stop generating summaries, the queued ones stay pending."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if len(self):
+            logger.warning(f'{len(self)} scheduled summaries are not generated')
+
+    def admit(self, client: str, count: int, queued: Optional[int] = None) -> None:
+        """Check that a client may schedule `count` more summaries, raise SchedulerBusy if not.
+
+        Summaries queued elsewhere, like in the job queue, are bounded by passing their number.
+        """
+        if count <= 0:
+            return
+        queued = len(self) if queued is None else queued
+        if queued + count > self.queue_size:
+            REJECTED_SUMMARIES.labels('queue_full').inc(count)
+            raise SchedulerBusy('Too many summaries are scheduled', self._queue_wait(queued))
+        if self.client_rate:
+            bucket = self._bucket(client)
+            wait = bucket.take(count)
+            # Buckets in debt are kept until it's paid off, or clients would skip the debt.
+            self._buckets.set(client, bucket, bucket.time_to_full())
+            if wait:
+                REJECTED_SUMMARIES.labels('rate_limited').inc(count)
+                raise SchedulerBusy('Too many summaries are requested', wait)
+
+    def schedule(self, priority: Priority, summaries: Sequence[Tuple[int, str]]) -> None:
+        """Queue admitted summaries for generation.
+
+        Admission and queueing are separate steps, so concurrent requests may slightly overfill
+        the queue; this is fine, as they are admitted only while it has room.
+        """
+        for summary_id, url in summaries:
+            self._queue.put_nowait((priority, next(self._order), summary_id, url))
+            SCHEDULED_SUMMARIES.labels(priority.name.lower()).inc()
+
+    def _bucket(self, client: str) -> TokenBucket:
+        bucket = self._buckets.get(client)
+        if bucket is not None:
+            return bucket
+        return TokenBucket(self.client_rate, self.client_burst, self._clock)
+
+    def _queue_wait(self, queued: int) -> float:
+        """Estimate how long it takes for queued summaries to be generated."""
+        return max(math.ceil(queued * self.average_duration / self.concurrency), 1)
+
+    async def _work(self) -> None:
+        while True:
+            priority, _, summary_id, url = await self._queue.get()
+            SCHEDULED_SUMMARIES.labels(priority.name.lower()).dec()
+            started_at = time.monotonic()
+            try:
+                with get_profiler().profile(f'generate_summary {summary_id}'):
+                    await generate_summary(summary_id, url)
+            except Exception:
+                logger.exception(f'Failed to generate summary {summary_id} for {url}')
+            duration = time.monotonic() - started_at
+            self.average_duration += DURATION_SMOOTHING * (duration - self.average_duration)
+
+
+@lru_cache()
+def get_scheduler() -> Scheduler:
+    """Get scheduler configured from environment settings."""
+    settings = get_settings()
+    return Scheduler(
+        settings.scheduler_concurrency,
+        settings.scheduler_queue_size,
+        settings.client_rate_limit,
+        settings.client_rate_burst,
+    )
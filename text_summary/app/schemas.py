@@ -1,22 +1,105 @@
 """Pydantic schemes for summarizer app."""
-from pydantic import BaseModel, AnyHttpUrl
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel, AnyHttpUrl, Field
 from tortoise.contrib.pydantic import pydantic_model_creator
-from app.models import TextSummary
+from app.models import SummaryStatus, TextSummary
+from app.nlp import SUMMARY_SENTENCES
 
 
-class SummaryPayloadSchema(BaseModel):
-    """Schema of the request for creating a summary."""
+class SummaryUrlSchema(BaseModel):
+    """Schema of the address of a summarized web page."""
     url: AnyHttpUrl
 
 
-class SummaryResponseSchema(SummaryPayloadSchema):
+class SummaryPayloadSchema(SummaryUrlSchema):
+    """Schema of the request for creating a summary, optionally shorter than the default one."""
+    max_sentences: Optional[int] = Field(None, ge=1, le=SUMMARY_SENTENCES)
+    max_chars: Optional[int] = Field(None, ge=1)
+
+
+class SummaryResponseSchema(SummaryUrlSchema):
     """Schema of the response for creating a summary."""
     id: int  # noqa: VNE003
 
 
-class SummaryUpdatePayloadSchema(SummaryPayloadSchema):
+class SummaryUpdatePayloadSchema(SummaryUrlSchema):
     """Schema of the request for updating a summary."""
     summary: str
 
 
-SummarySchema = pydantic_model_creator(TextSummary)
+class SummaryBatchUpdateItemSchema(SummaryUpdatePayloadSchema):
+    """Schema of a single summary update in a batch."""
+    id: int  # noqa: VNE003
+
+
+class SummaryIdsSchema(BaseModel):
+    """Schema of a list of summary ids."""
+    ids: List[int]
+
+
+class SummaryField(str, Enum):
+    """Summary field that can be requested when listing summaries."""
+    ID = 'id'
+    URL = 'url'
+    SUMMARY = 'summary'
+    STATUS = 'status'
+    ERROR = 'error'
+    ATTEMPTS = 'attempts'
+    CREATED_AT = 'created_at'
+    STARTED_AT = 'started_at'
+    FINISHED_AT = 'finished_at'
+    FETCHED_AT = 'fetched_at'
+
+
+SUMMARY_FIELDS = tuple(field.value for field in SummaryField)
+
+
+class ExportFormat(str, Enum):
+    """File format of summaries export."""
+    NDJSON = 'ndjson'
+    CSV = 'csv'
+
+
+class SummaryFilterSchema(BaseModel):
+    """Filters for listing summaries."""
+    url_prefix: Optional[str] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    has_summary: Optional[bool] = None
+    status: Optional[SummaryStatus] = None
+
+
+class SummaryListItemSchema(BaseModel):
+    """Summary in a list, containing only requested fields."""
+    id: Optional[int]  # noqa: VNE003
+    url: Optional[str]
+    summary: Optional[str]
+    status: Optional[SummaryStatus]
+    error: Optional[str]
+    attempts: Optional[int]
+    created_at: Optional[datetime]
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    fetched_at: Optional[datetime]
+
+
+SummarySchema = pydantic_model_creator(
+    TextSummary, exclude=('search_vector', 'max_sentences', 'max_chars'),
+)
+
+
+class SummarySearchResultSchema(SummarySchema):  # type: ignore
+    """Summary found by a search query, with its relevance."""
+    rank: float
+
+
+class ProfileSchema(BaseModel):
+    """Schema of a kept profile of a slow or requested run."""
+    id: int  # noqa: VNE003
+    name: str
+    started_at: datetime
+    duration: float
+    requested: bool
@@ -0,0 +1,143 @@
+"""Full-text search over stored summaries.
+
+Postgres keeps a `tsvector` document of every summary, indexed with GIN. Other databases,
+used in tests, search an inverted index kept in the memory of the process.
+"""
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Set, Tuple
+
+from pypika.terms import Function, Term
+
+from app.models import TextSummary
+from app.schemas import SUMMARY_FIELDS
+
+SEARCH_CONFIG = 'english'
+WORD_PATTERN = re.compile(r'\w+')
+SEARCH_SQL = (
+    'SELECT {fields}, ts_rank_cd("search_vector", "query") AS "rank" '  # noqa: S608
+    'FROM "textsummary", websearch_to_tsquery(\'{config}\', $1) AS "query" '
+    'WHERE "search_vector" @@ "query" '
+    'ORDER BY "rank" DESC, "id" DESC LIMIT $2 OFFSET $3'
+).format(fields=', '.join(f'"{field}"' for field in SUMMARY_FIELDS), config=SEARCH_CONFIG)
+
+
+class InvertedIndex:
+    """Words of summaries with the summaries containing them, ranked with TF-IDF."""
+
+    def __init__(self) -> None:
+        self.loaded = False
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._documents: Dict[int, Counter] = {}
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(self, summary_id: int, text: str) -> None:
+        """Index a summary, replacing its previous text."""
+        self.remove(summary_id)
+        words = Counter(tokenize(text))
+        if not words:
+            return
+        self._documents[summary_id] = words
+        for word, count in words.items():
+            self._postings.setdefault(word, {})[summary_id] = count
+
+    def remove(self, summary_id: int) -> None:
+        """Forget a summary."""
+        for word in self._documents.pop(summary_id, ()):
+            postings = self._postings[word]
+            del postings[summary_id]
+            if not postings:
+                del self._postings[word]
+
+    def search(self, query: str) -> List[Tuple[int, float]]:
+        """Get ids and ranks of summaries containing all words of a query, best first.
+
+        Only summaries from the shortest posting list are checked, not the whole index.
+        """
+        postings = [self._postings.get(word, {}) for word in set(tokenize(query))]
+        if not postings:
+            return []
+        postings.sort(key=len)
+        matches: Set[int] = set(postings[0]).intersection(*postings[1:])
+        ranks = [(summary_id, self._rank(summary_id, postings)) for summary_id in matches]
+        return sorted(ranks, key=lambda rank: (rank[1], rank[0]), reverse=True)
+
+    def _rank(self, summary_id: int, postings: List[Dict[int, int]]) -> float:
+        length = sum(self._documents[summary_id].values())
+        return sum(
+            word_postings[summary_id] / length * math.log(1 + len(self) / len(word_postings))
+            for word_postings in postings
+        )
+
+
+def tokenize(text: str) -> List[str]:
+    """Split a text into lowercase words."""
+    return WORD_PATTERN.findall(text.lower())
+
+
+@lru_cache()
+def get_search_index() -> InvertedIndex:
+    """Get the in-process search index, used when the database has no full-text search."""
+    return InvertedIndex()
+
+
+def search_values(summary: str) -> dict:
+    """Get the search document to store together with a summary text."""
+    if not _has_full_text_search():
+        return {}
+    return {'search_vector': to_tsvector(summary)}
+
+
+def to_tsvector(text: str) -> Term:
+    """Get an expression computing the search document of a text in an ORM update."""
+    return Function('to_tsvector', SEARCH_CONFIG, text)
+
+
+def index_summaries(summaries: Iterable[Tuple[int, str]]) -> None:
+    """Add written summaries to the in-process search index, if it is used."""
+    if _has_full_text_search():
+        return
+    search_index = get_search_index()
+    for summary_id, summary in summaries:
+        search_index.add(summary_id, summary)
+
+
+def unindex_summaries(summary_ids: Iterable[int]) -> None:
+    """Remove deleted summaries from the in-process search index, if it is used."""
+    if _has_full_text_search():
+        return
+    search_index = get_search_index()
+    for summary_id in summary_ids:
+        search_index.remove(summary_id)
+
+
+async def search(query: str, limit: int, offset: int) -> List[dict]:
+    """Find summaries matching a query, ordered by rank."""
+    if _has_full_text_search():
+        return await TextSummary._meta.db.execute_query_dict(
+            SEARCH_SQL, [query, limit, offset],
+        )
+
+    search_index = get_search_index()
+    if not search_index.loaded:
+        await _load(search_index)
+    ranks = dict(search_index.search(query)[offset:offset + limit])
+    summaries = await TextSummary.filter(id__in=list(ranks)).values(*SUMMARY_FIELDS)
+    for summary in summaries:
+        summary['rank'] = ranks[summary['id']]
+    return sorted(summaries, key=lambda summary: (summary['rank'], summary['id']), reverse=True)
+
+
+async def _load(search_index: InvertedIndex) -> None:
+    summaries = await TextSummary.exclude(summary='').values_list('id', 'summary')
+    for summary_id, summary in summaries:
+        search_index.add(summary_id, summary)
+    search_index.loaded = True
+
+
+def _has_full_text_search() -> bool:
+    return TextSummary._meta.db.capabilities.dialect == 'postgres'
@@ -1,22 +1,157 @@
 """Module for extracting info from a web page and text summarization."""
-import nltk
-from newspaper import Article
+import asyncio
+import logging
+from functools import partial
+from typing import Any
 
-from app.models import TextSummary
+import httpx
+from tortoise import timezone
+from tortoise.expressions import F
+
+from app import contents, pages, partitions, search
+from app.cache import get_summary_cache, SingleFlight
+from app.config import get_settings
+from app.contents import ArticleSummary
+from app.engine import get_engine
+from app.fetcher import get_fetcher
+from app.metrics import (
+    DUPLICATE_CONTENTS, NOT_MODIFIED_PAGES, SUMMARIES_IN_PROGRESS, track_stage,
+)
+from app.models import SummaryStatus
+from app.nlp import limit_summary, parse_article, ParsedArticle, summarize_parsed
+from app.notifications import notify_summaries_changed, notify_summary_ready
+
+RETRIED_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+logger = logging.getLogger('uvicorn')
+# Pages with the same text summarized at the same time share one summarization.
+content_flights = SingleFlight()
 
 
 async def generate_summary(summary_id: int, url: str) -> None:
-    """Parse a web page and retrieve a summary about it's content."""
-    article = Article(url)
-    article.download()
-    article.parse()
-
-    try:
-        nltk.data.find('tokenizers/punkt')
-    except LookupError:
-        nltk.download('punkt')
-    finally:
-        article.nlp()
-
-    summary = article.summary
-    await TextSummary.filter(id=summary_id).update(summary=summary)
+    """Parse a web page and retrieve a summary about it's content, retrying transient failures."""
+    max_attempts = get_settings().summary_max_attempts
+    for attempt in range(1, max_attempts + 1):
+        try:
+            await attempt_summary(summary_id, url, can_retry=attempt < max_attempts)
+        except Exception as error:
+            if attempt == max_attempts or not is_transient(error):
+                raise
+            await asyncio.sleep(retry_delay(attempt))
+        else:
+            return
+
+
+async def attempt_summary(summary_id: int, url: str, can_retry: bool) -> None:
+    """Try to generate a summary once, tracking the attempt in the summary status."""
+    await partitions.update_by_ids(
+        [summary_id],
+        status=SummaryStatus.RUNNING,
+        attempts=F('attempts') + 1,
+        started_at=timezone.now(),
+        finished_at=None,
+    )
+    await notify_summaries_changed([summary_id])
+    with SUMMARIES_IN_PROGRESS.track_inprogress(), track_stage('generate'):
+        try:
+            summary, content_hash = await get_summary_cache().get_or_compute(
+                url, partial(summarize_url, url),
+            )
+        except Exception as error:
+            retried = can_retry and is_transient(error)
+            await _finish(
+                summary_id,
+                status=SummaryStatus.PENDING if retried else SummaryStatus.FAILED,
+                error=repr(error),
+            )
+            raise
+
+        with track_stage('store'):
+            summary = await _limit(summary_id, summary)
+            await _finish(
+                summary_id,
+                status=SummaryStatus.DONE,
+                error=None,
+                summary=summary,
+                content_id=content_hash,
+                fetched_at=timezone.now(),
+                **search.search_values(summary),
+            )
+            search.index_summaries([(summary_id, summary)])
+
+
+async def _limit(summary_id: int, summary: str) -> str:
+    # Pages and their contents keep the full summary shared by all requests, cut per request here.
+    budget = await partitions.read_by_ids([summary_id], 'max_sentences', 'max_chars')
+    if not budget:
+        return summary
+    return limit_summary(summary, budget[0]['max_sentences'], budget[0]['max_chars'])
+
+
+async def _finish(summary_id: int, **values: Any) -> None:
+    await partitions.update_by_ids([summary_id], finished_at=timezone.now(), **values)
+    await notify_summaries_changed([summary_id])
+    if values['status'] != SummaryStatus.PENDING:
+        await notify_summary_ready(summary_id)
+
+
+def is_transient(error: Exception) -> bool:
+    """Check whether a failure may go away if the web page is fetched again later."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRIED_STATUSES
+    return isinstance(error, httpx.TransportError)
+
+
+def retry_delay(attempt: int) -> float:
+    """Get exponential backoff delay before the next attempt, in seconds."""
+    settings = get_settings()
+    return min(settings.summary_retry_delay * 2 ** (attempt - 1), settings.summary_retry_max_delay)
+
+
+async def summarize_url(url: str) -> ArticleSummary:
+    """Download a web page, or revalidate its stored version, and summarize it."""
+    page = await pages.get(url)
+    with track_stage('fetch'):
+        fetched = await get_fetcher().fetch(
+            url, *((page.etag, page.last_modified) if page else ()),
+        )
+    if page and fetched.not_modified:
+        NOT_MODIFIED_PAGES.inc()
+        return ArticleSummary(page.summary, page.content_id)
+
+    with track_stage('parse'):
+        article = await get_engine().run_cpu(
+            parse_article, url, fetched.html, get_settings().article_max_chars,
+        )
+    summarized = await summarize_content(article)
+
+    await pages.save(url, fetched, summarized)
+    return summarized
+
+
+async def summarize_content(article: ParsedArticle) -> ArticleSummary:
+    """Summarize an article, reusing the stored summary of the same text found on another page."""
+    if not article.text:
+        return ArticleSummary(await _run_nlp(article))
+
+    text_hash = contents.content_hash(article.text)
+    summary = await contents.get_summary(text_hash)
+    if summary is not None:
+        DUPLICATE_CONTENTS.inc()
+    else:
+        summary = await content_flights.do(text_hash, partial(_summarize_new, text_hash, article))
+    return ArticleSummary(summary, text_hash)
+
+
+async def _summarize_new(text_hash: str, article: ParsedArticle) -> str:
+    summary = await _run_nlp(article)
+    await contents.save(text_hash, article.text, summary)
+    return summary
+
+
+async def _run_nlp(article: ParsedArticle) -> str:
+    with track_stage('nlp'):
+        settings = get_settings()
+        return await get_engine().run_cpu(
+            summarize_parsed, article, settings.summarizer_backend, settings.nlp_chunk_size,
+        )
@@ -0,0 +1,118 @@
+"""Standalone worker that drains the summary job queue.
+
+Run as `python -m app.worker`. Any number of workers can share one database.
+"""
+import asyncio
+import logging
+import signal
+from typing import Set
+
+from prometheus_client import start_http_server
+from tortoise import Tortoise
+
+from app import jobs
+from app.config import get_settings
+from app.db import TORTOISE_ORM
+from app.engine import get_engine
+from app.fetcher import get_fetcher
+from app.summarizer import attempt_summary, is_transient, retry_delay
+
+logger = logging.getLogger('uvicorn')
+
+
+class SummaryWorker:
+    """Claims queued jobs and generates summaries with bounded concurrency."""
+
+    def __init__(
+            self, concurrency: int, poll_interval: float, lease_timeout: float, max_attempts: int,
+    ) -> None:
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self._tasks: Set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        """Stop claiming new jobs and let running ones finish."""
+        logger.info('Stopping summary worker...')
+        self._stopping.set()
+
+    async def run(self, until_idle: bool = False) -> None:
+        """Process jobs until stopped, or until the queue is empty if `until_idle` is set."""
+        while not self._stopping.is_set():
+            claimed = await self._claim_jobs()
+            if until_idle and not claimed and not self._tasks:
+                break
+            await self._wait()
+        if self._tasks:
+            await asyncio.wait(self._tasks)
+
+    async def _claim_jobs(self) -> int:
+        free_slots = self.concurrency - len(self._tasks)
+        if free_slots <= 0:
+            return 0
+
+        claimed_jobs = await jobs.claim(free_slots, self.lease_timeout)
+        for job in claimed_jobs:
+            task = asyncio.create_task(self._process(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return len(claimed_jobs)
+
+    async def _wait(self) -> None:
+        """Sleep until a job finishes, the worker is stopped or it's time to poll again."""
+        stopping = asyncio.create_task(self._stopping.wait())
+        await asyncio.wait(
+            {stopping, *self._tasks},
+            timeout=self.poll_interval,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        stopping.cancel()
+
+    async def _process(self, job: dict) -> None:
+        logger.info(f'Generating summary {job["summary_id"]} for {job["url"]}')
+        can_retry = job['attempts'] < self.max_attempts
+        try:
+            await attempt_summary(job['summary_id'], job['url'], can_retry)
+        except Exception as error:
+            if can_retry and is_transient(error):
+                logger.warning(f'Summary job {job["id"]} will be retried: {error!r}')
+                await jobs.retry(job['id'], repr(error), retry_delay(job['attempts']))
+                return
+            logger.exception(f'Summary job {job["id"]} failed')
+            await jobs.fail(job['id'], repr(error))
+        else:
+            await jobs.complete(job['id'])
+
+
+async def main() -> None:
+    """Run a summary worker configured from environment settings."""
+    settings = get_settings()
+    worker = SummaryWorker(
+        concurrency=settings.worker_concurrency,
+        poll_interval=settings.worker_poll_interval,
+        lease_timeout=settings.job_lease_timeout,
+        max_attempts=settings.summary_max_attempts,
+    )
+
+    if settings.worker_metrics_port:
+        start_http_server(settings.worker_metrics_port)
+
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, worker.stop)
+
+    await Tortoise.init(config=TORTOISE_ORM)
+    try:
+        await get_engine().warm_up()
+        await worker.run()
+    finally:
+        get_engine().shutdown()
+        await get_fetcher().close()
+        await Tortoise.close_connections()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""Compare two benchmark results files, e.g. of a base branch and of a change:
+    python -m benchmarks.compare base.json current.json [--threshold 10]
+
+Exits with code 1 if throughput dropped or latency grew by more than the threshold percent.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+HIGHER_IS_BETTER_SUFFIX = '_per_second'
+LOWER_IS_BETTER_SUFFIXES = ('_ms', '_us')
+FAILURE_COUNTS = frozenset({'errors', 'failed'})
+
+
+def load_results(path: Path) -> Dict[str, dict]:
+    """Read results of a benchmark run by their names."""
+    document = json.loads(path.read_text())
+    return {result['name']: result for result in document['results']}
+
+
+def change_percent(base: float, current: float) -> Optional[float]:
+    """Get relative change of a value, if the base one is not zero."""
+    if not base:
+        return None
+    return (current - base) / base * 100
+
+
+def is_regression(metric: str, base: float, current: float, threshold: float) -> bool:
+    """Check whether a metric got worse by more than the threshold or new failures appeared."""
+    if metric in FAILURE_COUNTS:
+        return current > base
+    change = change_percent(base, current)
+    if change is None:
+        return False
+    if metric.endswith(HIGHER_IS_BETTER_SUFFIX):
+        return change < -threshold
+    if metric.endswith(LOWER_IS_BETTER_SUFFIXES):
+        return change > threshold
+    return False
+
+
+def compare(base: Dict[str, dict], current: Dict[str, dict], threshold: float) -> List[str]:
+    """Write changes of every measured metric and get descriptions of regressions."""
+    regressions = []
+    for name in [name for name in base if name in current]:
+        for metric, base_value, current_value in _numeric_metrics(base[name], current[name]):
+            line = _format_change(name, metric, base_value, current_value)
+            if is_regression(metric, base_value, current_value, threshold):
+                regressions.append(line)
+                line += '  REGRESSION'
+            sys.stdout.write(line + '\n')
+    return regressions
+
+
+def _format_change(name: str, metric: str, base: float, current: float) -> str:
+    """Describe a change of a metric as a table row."""
+    change = change_percent(base, current)
+    change_text = 'n/a' if change is None else f'{change:+.1f}%'
+    return f'{name:<16}{metric:<24}{base:>14.2f}{current:>14.2f}{change_text:>10}'
+
+
+def _numeric_metrics(base: dict, current: dict) -> List[Tuple[str, float, float]]:
+    """Get metrics measured in both results with their values."""
+    return [
+        (metric, base_value, current[metric])
+        for metric, base_value in base.items()
+        if isinstance(base_value, (int, float)) and isinstance(current.get(metric), (int, float))
+    ]
+
+
+def main() -> None:
+    """Compare results files from command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('base', type=Path)
+    parser.add_argument('current', type=Path)
+    parser.add_argument('--threshold', type=float, default=10, help='Allowed change in percent.')
+    args = parser.parse_args()
+
+    regressions = compare(load_results(args.base), load_results(args.current), args.threshold)
+    if regressions:
+        sys.stdout.write(f'{len(regressions)} metrics regressed by more than {args.threshold}%\n')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
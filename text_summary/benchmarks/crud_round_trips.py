@@ -0,0 +1,115 @@
+"""Count DB round trips of summary updates and deletes before and after RETURNING queries.
+
+Run against the database from DATABASE_URL (tables must exist):
+    python -m benchmarks.crud_round_trips
+"""
+import asyncio
+import sys
+import time
+from functools import partial
+from typing import Awaitable, Callable, List
+
+from tortoise import Tortoise
+
+from app.api import crud
+from app.db import TORTOISE_ORM
+from app.instrumentation import instrument_db_clients, track_queries
+from app.models import TextSummary
+from app.schemas import SummaryUpdatePayloadSchema
+
+SUMMARIES_COUNT = 100
+URL = 'http://example.com/benchmark'
+
+
+async def update_before(summary_id: int, payload: SummaryUpdatePayloadSchema) -> None:
+    """Update as it was done before: UPDATE, then SELECT of the updated row."""
+    updated = await TextSummary.filter(id=summary_id).first().update(
+        url=payload.url, summary=payload.summary,
+    )
+    if updated:
+        await TextSummary.filter(id=summary_id).first().values()
+
+
+async def delete_before(summary_id: int) -> None:
+    """Delete as the endpoint did before: SELECT to return the row, then DELETE."""
+    summary = await crud.read(summary_id)
+    if summary:
+        await TextSummary.filter(id=summary_id).first().delete()
+
+
+async def measure(name: str, operation: Callable[[], Awaitable], requests: int) -> dict:
+    """Run an operation and report round trips and latency per request."""
+    started_at = time.perf_counter()
+    with track_queries() as stats:
+        await operation()
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        'name': name,
+        'round_trips_per_request': stats.count / requests,
+        'ms_per_request': elapsed * 1000 / requests,
+    }
+
+
+async def create_summaries() -> List[int]:
+    """Create summaries to update and delete."""
+    return await crud.create_many(
+        [SummaryUpdatePayloadSchema(url=URL, summary='')] * SUMMARIES_COUNT,
+        [None] * SUMMARIES_COUNT,
+    )
+
+
+async def run_benchmarks() -> List[dict]:
+    """Measure single and bulk updates and deletes with old and new implementations."""
+    payload = SummaryUpdatePayloadSchema(url=URL, summary='benchmark summary')
+
+    async def update_each(update: Callable) -> None:
+        for summary_id in summary_ids:
+            await update(summary_id, payload)
+
+    async def delete_each(delete: Callable) -> None:
+        for summary_id in summary_ids:
+            await delete(summary_id)
+
+    summary_ids = await create_summaries()
+    results = [
+        await measure('update (before)', partial(update_each, update_before), SUMMARIES_COUNT),
+        await measure('update', partial(update_each, crud.update), SUMMARIES_COUNT),
+        await measure('bulk update', partial(
+            crud.update_many, summary_ids, [payload] * SUMMARIES_COUNT,
+        ), 1),
+        await measure('delete (before)', partial(delete_each, delete_before), SUMMARIES_COUNT),
+    ]
+
+    summary_ids = await create_summaries()
+    results.append(await measure('delete', partial(delete_each, crud.delete), SUMMARIES_COUNT))
+
+    summary_ids = await create_summaries()
+    results.append(await measure('bulk delete', partial(crud.delete_many, summary_ids), 1))
+
+    return results
+
+
+def report(results: List[dict]) -> None:
+    """Write benchmark results as a table."""
+    sys.stdout.write(f'{"operation":<20}{"round trips":>15}{"ms":>10}\n')
+    for result in results:
+        sys.stdout.write(
+            f'{result["name"]:<20}'
+            f'{result["round_trips_per_request"]:>15.2f}'
+            f'{result["ms_per_request"]:>10.2f}\n',
+        )
+
+
+async def main() -> None:
+    """Run benchmarks against the configured database."""
+    instrument_db_clients()
+    await Tortoise.init(config=TORTOISE_ORM)
+    try:
+        report(await run_benchmarks())
+    finally:
+        await Tortoise.close_connections()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,153 @@
+"""Load test the summaries API of a local app instance.
+
+Migrates the database from DATABASE_URL with `aerich upgrade` and starts the app with uvicorn
+against it, or uses an already running instance from --url, and sends create, read, list, update
+and delete requests from concurrent clients:
+    python -m benchmarks.load [--requests 1000] [--concurrency 20] [--output load.json]
+
+Summaries are only queued (USE_JOB_QUEUE=1) and no worker runs, so only the API and DB are measured.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess  # noqa: S404
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterator, List, Tuple
+
+import httpx
+
+from benchmarks.results import latency_summary, report, write_results
+
+STARTUP_TIMEOUT = 30
+COLUMNS = ('requests_per_second', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms')
+
+
+async def run_concurrently(
+        send: Callable[[int], Awaitable[Any]], requests: int, concurrency: int,
+) -> Tuple[List[Any], List[float], float]:
+    """Make `requests` calls from `concurrency` clients.
+
+    Returns call results, latency of every call and the total time in seconds.
+    """
+    results: List[Any] = [None] * requests
+    latencies = [0.0] * requests
+    indexes = iter(range(requests))
+
+    async def client() -> None:
+        for index in indexes:
+            started_at = time.perf_counter()
+            results[index] = await send(index)
+            latencies[index] = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return results, latencies, time.perf_counter() - started_at
+
+
+async def run_scenario(
+        name: str,
+        send: Callable[[int], Awaitable[httpx.Response]],
+        requests: int,
+        concurrency: int,
+) -> Tuple[dict, List[httpx.Response]]:
+    """Send requests of a scenario and measure throughput, latency and errors."""
+    responses, latencies, elapsed = await run_concurrently(send, requests, concurrency)
+    result = {
+        'name': name,
+        'requests': requests,
+        'errors': sum(response.status_code >= 400 for response in responses),
+        'requests_per_second': requests / elapsed,
+        **latency_summary(latencies),
+    }
+    return result, responses
+
+
+async def run_load(url: str, requests: int, concurrency: int) -> List[dict]:
+    """Create, read, list, update and delete summaries."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        create, created = await run_scenario('create', lambda index: client.post(
+            '/summaries/', json={'url': f'http://example.com/load/{index}'},
+        ), requests, concurrency)
+        summary_ids = [response.json()['id'] for response in created if not response.is_error]
+
+        scenarios = [create]
+        for name, send in (
+            ('read', lambda index: client.get(f'/summaries/{summary_ids[index]}/')),
+            ('list', lambda index: client.get('/summaries/', params={'limit': 100})),
+            ('update', lambda index: client.put(
+                f'/summaries/{summary_ids[index]}/',
+                json={'url': f'http://example.com/load/{index}', 'summary': 'Load test summary.'},
+            )),
+            ('delete', lambda index: client.delete(f'/summaries/{summary_ids[index]}/')),
+        ):
+            result, _ = await run_scenario(name, send, len(summary_ids), concurrency)
+            scenarios.append(result)
+    return scenarios
+
+
+def free_port() -> int:
+    """Find a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_app() -> Iterator[str]:
+    """Run the app with uvicorn in a subprocess and get its URL."""
+    # The app doesn't create tables itself, so a fresh database is migrated first.
+    aerich = Path(sys.executable).with_name('aerich')
+    subprocess.run([str(aerich), 'upgrade'], check=True)  # noqa: S603
+    port = free_port()
+    command = [sys.executable, '-m', 'uvicorn', 'app.main:app', '--port', str(port)]
+    server = subprocess.Popen(  # noqa: S603
+        [*command, '--log-level', 'warning'],
+        env={**os.environ, 'USE_JOB_QUEUE': '1'},
+    )
+    url = f'http://127.0.0.1:{port}'
+    try:
+        wait_until_ready(url, server)
+        yield url
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def wait_until_ready(url: str, server: subprocess.Popen) -> None:
+    """Wait for the app to answer requests."""
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline and server.poll() is None:
+        try:
+            httpx.get(f'{url}/summaries/', params={'limit': 1}).raise_for_status()
+        except httpx.HTTPError:
+            time.sleep(0.1)
+        else:
+            return
+    raise RuntimeError(f'App at {url} did not start in {STARTUP_TIMEOUT} seconds')
+
+
+def main() -> None:
+    """Run load test with parameters from command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', help='URL of a running app; a local one is started if omitted.')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--output', type=Path, help='JSON file to save results to.')
+    args = parser.parse_args()
+
+    with (nullcontext(args.url) if args.url else local_app()) as url:
+        results = asyncio.run(run_load(url, args.requests, args.concurrency))
+
+    report(results, COLUMNS)
+    if args.output:
+        parameters = {'requests': args.requests, 'concurrency': args.concurrency}
+        write_results(args.output, 'load', parameters, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Machine-readable benchmark results, to compare runs across commits."""
+import json
+import math
+import platform
+import subprocess  # noqa: S404
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional, Sequence
+from urllib.parse import urlsplit
+
+from app.config import get_settings
+
+PERCENTILES = {'p50_ms': 0.5, 'p95_ms': 0.95, 'p99_ms': 0.99, 'max_ms': 1.0}
+
+
+def git_commit() -> Optional[str]:
+    """Get the current commit of the working tree, if it's a git checkout."""
+    try:
+        completed = subprocess.run(  # noqa: S603, S607
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, check=True, text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+def latency_summary(latencies: Sequence[float]) -> dict:
+    """Get median, tail and worst latencies in milliseconds."""
+    ordered = sorted(latencies)
+    return {name: _percentile(ordered, fraction) * 1000 for name, fraction in PERCENTILES.items()}
+
+
+def write_results(path: Path, benchmark: str, parameters: dict, results: List[dict]) -> None:
+    """Save benchmark results with the commit and environment they were measured on."""
+    document = {
+        'benchmark': benchmark,
+        'commit': git_commit(),
+        'measured_at': datetime.now(timezone.utc).isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'database': urlsplit(get_settings().database_url).scheme,
+        },
+        'parameters': parameters,
+        'results': results,
+    }
+    path.write_text(json.dumps(document, indent=2) + '\n')
+    sys.stdout.write(f'Results are saved to {path}\n')
+
+
+def report(results: List[dict], columns: Sequence[str]) -> None:
+    """Write results as a table of the given numeric columns."""
+    sys.stdout.write(f'{"name":<16}' + ''.join(f'{column:>20}' for column in columns) + '\n')
+    for result in results:
+        values = ''.join(f'{result[column]:>20.2f}' for column in columns)
+        sys.stdout.write(f'{result["name"]:<16}{values}\n')
+
+
+def _percentile(ordered: Sequence[float], fraction: float) -> float:
+    """Get nearest-rank percentile of sorted values."""
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
@@ -0,0 +1,107 @@
+"""Measure per-row cost of serializing `read_all_summaries` responses.
+
+Compares validation through the response model, `jsonable_encoder` and stdlib json, as FastAPI does
+for routes returning dicts, with orjson serialization of rows as they are read from the DB:
+    python -m benchmarks.serialization [--rows 10 100 1000] [--repeat 20] [--output json.json]
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, List, Sequence
+
+import orjson
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.api.summaries import router
+from app.models import SummaryStatus
+from benchmarks.results import report, write_results
+
+COLUMNS = ('per_row_us', 'rows_per_second')
+SUMMARY = ' '.join(['Cats are small furry animals that like to sleep on warm blankets.'] * 8)
+
+
+def make_rows(count: int) -> List[dict]:
+    """Make summaries as they are read from the DB."""
+    created_at = datetime(2021, 3, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+    return [
+        {
+            'id': index,
+            'url': f'https://example.com/articles/{index}',
+            'summary': SUMMARY,
+            'status': SummaryStatus.DONE,
+            'error': None,
+            'attempts': 1,
+            'created_at': created_at + timedelta(seconds=index),
+            'started_at': created_at + timedelta(seconds=index),
+            'finished_at': created_at + timedelta(seconds=index + 1),
+            'fetched_at': created_at + timedelta(seconds=index + 1),
+        }
+        for index in range(count)
+    ]
+
+
+def serialize_with_model(rows: List[dict]) -> bytes:
+    """Serialize rows like FastAPI does with the response model of the list route."""
+    route = next(
+        route for route in router.routes
+        if isinstance(route, APIRoute) and route.name == 'read_all_summaries'
+    )
+    content = asyncio.get_event_loop().run_until_complete(serialize_response(
+        field=route.secure_cloned_response_field, response_content=rows, exclude_unset=True,
+    ))
+    return JSONResponse(content).body
+
+
+def serialize_rows(rows: List[dict]) -> bytes:
+    """Serialize rows like the list route does."""
+    return orjson.dumps(rows)
+
+
+def measure(name: str, serialize: Callable[[List[dict]], bytes], rows: int, repeat: int) -> dict:
+    """Serialize a page of rows many times and get the best time per row."""
+    page = make_rows(rows)
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        serialize(page)
+        timings.append(time.perf_counter() - started_at)
+    per_row = min(timings) / rows
+    return {
+        'name': f'{name} ({rows})',
+        'per_row_us': per_row * 1_000_000,
+        'rows_per_second': 1 / per_row,
+    }
+
+
+def run_benchmarks(row_counts: Sequence[int], repeat: int) -> List[dict]:
+    """Measure both serialization paths on pages of different sizes."""
+    sample = make_rows(1)
+    if orjson.loads(serialize_rows(sample)) != orjson.loads(serialize_with_model(sample)):
+        raise RuntimeError('Serialization paths produce different JSON')
+    return [
+        measure(name, serialize, rows, repeat)
+        for rows in row_counts
+        for name, serialize in (('model', serialize_with_model), ('orjson', serialize_rows))
+    ]
+
+
+def main() -> None:
+    """Run benchmarks with parameters from command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', type=Path, help='JSON file to save results to.')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.rows, args.repeat)
+    report(results, COLUMNS)
+    if args.output:
+        parameters = {'rows': args.rows, 'repeat': args.repeat}
+        write_results(args.output, 'serialization', parameters, results)
+
+
+if __name__ == '__main__':
+    main()
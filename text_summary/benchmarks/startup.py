@@ -0,0 +1,57 @@
+"""Measure web app startup time in fresh interpreters.
+
+Reports time to import `app.main` (which creates the app once), time of another
+`create_application` call and heavy NLP libraries that got imported on the way:
+    python -m benchmarks.startup [--runs 10]
+"""
+import argparse
+import json
+import statistics
+import subprocess  # noqa: S404
+import sys
+from typing import List
+
+HEAVY_MODULES = ('newspaper', 'nltk', 'numpy', 'bs4', 'lxml')
+MEASURE_SCRIPT = f"""
+import json, sys, time
+started_at = time.perf_counter()
+from app.main import create_application
+imported_at = time.perf_counter()
+create_application()
+created_at = time.perf_counter()
+heavy_modules = [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+import_ms = (imported_at - started_at) * 1000
+create_ms = (created_at - imported_at) * 1000
+print(json.dumps(dict(import_ms=import_ms, create_ms=create_ms, heavy_modules=heavy_modules)))
+"""
+
+
+def measure_once() -> dict:
+    """Start a fresh interpreter and measure app startup in it."""
+    completed = subprocess.run(  # noqa: S603
+        [sys.executable, '-c', MEASURE_SCRIPT], capture_output=True, check=True, text=True,
+    )
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def report(results: List[dict]) -> None:
+    """Write median and worst startup times."""
+    for key in ('import_ms', 'create_ms'):
+        values = [result[key] for result in results]
+        sys.stdout.write(
+            f'{key:<12}median {statistics.median(values):>8.1f}  max {max(values):>8.1f}\n',
+        )
+    sys.stdout.write(f'heavy modules imported: {results[-1]["heavy_modules"] or "none"}\n')
+
+
+def main() -> None:
+    """Run benchmark with a number of runs from command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    report([measure_once() for _ in range(args.runs)])
+
+
+if __name__ == '__main__':
+    main()
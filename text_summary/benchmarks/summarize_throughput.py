@@ -0,0 +1,138 @@
+"""Measure end-to-end summarization throughput: fetch, parse, summarize and store pages.
+
+Pages of the fixture corpus are served by a local stub server, so no network is involved.
+Summaries are stored in the database from DATABASE_URL (tables must exist):
+    python -m benchmarks.summarize_throughput [--pages 200] [--concurrency 10] [--output e2e.json]
+
+Every served copy of a page gets a unique paragraph, so all pages are summarized;
+with --duplicates copies are identical and deduplicated by content.
+"""
+import argparse
+import asyncio
+import threading
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from tortoise import Tortoise
+
+from app.config import get_settings
+from app.db import TORTOISE_ORM
+from app.engine import get_engine
+from app.fetcher import get_fetcher
+from app.models import SummaryStatus, TextSummary
+from app.summarizer import generate_summary
+from benchmarks.load import run_concurrently
+from benchmarks.results import latency_summary, report, write_results
+
+CORPUS_DIR = Path(__file__).parent / 'corpus'
+COLUMNS = ('pages_per_second', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms')
+
+
+def load_corpus() -> Dict[str, str]:
+    """Read HTML pages of the fixture corpus by their names."""
+    return {path.stem: path.read_text() for path in sorted(CORPUS_DIR.glob('*.html'))}
+
+
+def make_handler(corpus: Dict[str, str], duplicates: bool) -> type:
+    """Create a request handler serving corpus pages at /<copy>/<name>."""
+    class CorpusHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            copy, _, name = self.path.strip('/').partition('/')
+            if name not in corpus:
+                self.send_error(HTTPStatus.NOT_FOUND)
+                return
+            html = corpus[name]
+            if not duplicates:
+                html = html.replace('</article>', f'<p>This is copy number {copy}.</p></article>')
+            body = html.encode()
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: object) -> None:
+            """Keep benchmark output clean."""
+
+    return CorpusHandler
+
+
+@contextmanager
+def corpus_server(duplicates: bool) -> Iterator[str]:
+    """Serve the fixture corpus in a background thread and get the server URL."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(load_corpus(), duplicates))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+async def run_throughput(server_url: str, pages: int, concurrency: int) -> List[dict]:
+    """Summarize pages of the corpus server and measure throughput and latency."""
+    names = sorted(load_corpus())
+    urls = [f'{server_url}/{index}/{names[index % len(names)]}' for index in range(pages)]
+    summaries = [await TextSummary.create(url=url, summary='') for url in urls]
+
+    async def summarize(index: int) -> None:
+        await generate_summary(summaries[index].id, urls[index])
+
+    _, latencies, elapsed = await run_concurrently(summarize, pages, concurrency)
+    failed = await TextSummary.filter(
+        id__in=[summary.id for summary in summaries], status=SummaryStatus.FAILED,
+    ).count()
+    result = {
+        'name': 'summarize',
+        'pages': pages,
+        'failed': failed,
+        'pages_per_second': pages / elapsed,
+        **latency_summary(latencies),
+    }
+    return [result]
+
+
+async def run_benchmark(server_url: str, pages: int, concurrency: int) -> List[dict]:
+    """Start the summarization engine and the DB connection like the app does, then measure."""
+    await Tortoise.init(config=TORTOISE_ORM)
+    engine = get_engine()
+    await engine.warm_up()
+    try:
+        return await run_throughput(server_url, pages, concurrency)
+    finally:
+        await get_fetcher().close()
+        engine.shutdown()
+        await Tortoise.close_connections()
+
+
+def main() -> None:
+    """Run the benchmark with parameters from command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--duplicates', action='store_true', help='Serve identical copies.')
+    parser.add_argument('--output', type=Path, help='JSON file to save results to.')
+    args = parser.parse_args()
+
+    with corpus_server(args.duplicates) as server_url:
+        results = asyncio.run(run_benchmark(server_url, args.pages, args.concurrency))
+
+    report(results, COLUMNS)
+    if args.output:
+        settings = get_settings()
+        parameters = {
+            'pages': args.pages,
+            'concurrency': args.concurrency,
+            'duplicates': args.duplicates,
+            'summarizer_backend': settings.summarizer_backend,
+            'nlp_processes': settings.nlp_processes,
+        }
+        write_results(args.output, 'summarize_throughput', parameters, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Compare latency and throughput of summarizer backends on a local corpus of HTML pages.
+
+Pages are parsed once up front, so only summarization is measured:
+    python -m benchmarks.summarizer_backends path/to/corpus [--backends newspaper numpy]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List, Sequence
+
+from app.config import SummarizerBackendName
+from app.nlp import get_backend, parse_article, ParsedArticle
+
+BATCH_SIZE = 32
+
+
+def load_corpus(corpus_dir: Path) -> List[ParsedArticle]:
+    """Parse every HTML page of a directory tree."""
+    articles = []
+    for path in sorted(corpus_dir.rglob('*.htm*')):
+        article = parse_article(path.as_uri(), path.read_text(errors='ignore'))
+        if article.text:
+            articles.append(article)
+    return articles
+
+
+def measure(name: str, articles: Sequence[ParsedArticle], batch_size: int) -> dict:
+    """Summarize all articles in batches and report latency and throughput."""
+    backend = get_backend(SummarizerBackendName(name))
+    backend.summarize(articles[0])
+
+    latencies = []
+    started_at = time.perf_counter()
+    for start in range(0, len(articles), batch_size):
+        batch_started_at = time.perf_counter()
+        backend.summarize_batch(articles[start:start + batch_size])
+        latencies.append(time.perf_counter() - batch_started_at)
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        'name': f'{name} (batch {batch_size})',
+        'articles_per_second': len(articles) / elapsed,
+        'median_ms': statistics.median(latencies) * 1000,
+        'max_ms': max(latencies) * 1000,
+    }
+
+
+def run_benchmarks(articles: Sequence[ParsedArticle], backends: Sequence[str]) -> List[dict]:
+    """Measure every backend on single articles and, if it can score them together, on batches."""
+    results = []
+    for name in backends:
+        results.append(measure(name, articles, 1))
+        if name != SummarizerBackendName.NEWSPAPER:
+            results.append(measure(name, articles, BATCH_SIZE))
+    return results
+
+
+def report(results: List[dict]) -> None:
+    """Write benchmark results as a table."""
+    sys.stdout.write(f'{"backend":<20}{"articles/s":>12}{"median ms":>12}{"max ms":>12}\n')
+    for result in results:
+        sys.stdout.write(
+            f'{result["name"]:<20}'
+            f'{result["articles_per_second"]:>12.1f}'
+            f'{result["median_ms"]:>12.2f}'
+            f'{result["max_ms"]:>12.2f}\n',
+        )
+
+
+def main() -> None:
+    """Run benchmarks on a corpus from command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('corpus', type=Path, help='Directory with HTML pages.')
+    parser.add_argument(
+        '--backends',
+        nargs='+',
+        default=[backend.value for backend in SummarizerBackendName],
+        choices=[backend.value for backend in SummarizerBackendName],
+    )
+    args = parser.parse_args()
+
+    articles = load_corpus(args.corpus)
+    sys.stdout.write(f'{len(articles)} articles\n')
+    report(run_benchmarks(articles, args.backends))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,9 @@
+"""Gunicorn settings for summarizer web app in production."""
+from gunicorn.arbiter import Arbiter
+from gunicorn.workers.base import Worker
+from prometheus_client import multiprocess
+
+
+def child_exit(server: Arbiter, worker: Worker) -> None:
+    """Drop live metrics of a stopped worker."""
+    multiprocess.mark_process_dead(worker.pid)
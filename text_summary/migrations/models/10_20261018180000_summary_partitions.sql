@@ -0,0 +1,67 @@
+-- upgrade --
+ALTER TABLE "summaryjob" DROP CONSTRAINT IF EXISTS "summaryjob_summary_id_fkey";
+CREATE INDEX IF NOT EXISTS "idx_summaryjob_summary_1bb273" ON "summaryjob" ("summary_id");
+ALTER SEQUENCE "textsummary_id_seq" OWNED BY NONE;
+ALTER TABLE "textsummary" RENAME TO "textsummary_unpartitioned";
+ALTER TABLE "textsummary_unpartitioned" RENAME CONSTRAINT "textsummary_pkey" TO "textsummary_unpartitioned_pkey";
+CREATE TABLE "textsummary" (
+    LIKE "textsummary_unpartitioned" INCLUDING DEFAULTS INCLUDING COMMENTS,
+    PRIMARY KEY ("id", "created_at")
+) PARTITION BY RANGE ("created_at");
+COMMENT ON TABLE "textsummary" IS 'Summary for a web page.';
+CREATE TABLE "textsummary_default" PARTITION OF "textsummary" DEFAULT;
+-- Monthly partitions from the oldest summary to two months ahead, in UTC like `app.partitions`.
+-- aerich splits migrations on semicolons at line ends, so the block has none inside.
+DO $$ BEGIN EXECUTE (
+    SELECT string_agg(format(
+        'CREATE TABLE %I PARTITION OF "textsummary" FOR VALUES FROM (%L) TO (%L)',
+        'textsummary_' || to_char("month", 'YYYY_MM'),
+        "month" AT TIME ZONE 'UTC',
+        ("month" + INTERVAL '1 month') AT TIME ZONE 'UTC'
+    ), '; ')
+    FROM generate_series(
+        date_trunc('month', COALESCE(
+            (SELECT min("created_at") FROM "textsummary_unpartitioned"), now()
+        ) AT TIME ZONE 'UTC'),
+        date_trunc('month', now() AT TIME ZONE 'UTC') + INTERVAL '2 months',
+        INTERVAL '1 month'
+    ) AS "month"
+); END $$;
+INSERT INTO "textsummary" SELECT * FROM "textsummary_unpartitioned";
+DROP TABLE "textsummary_unpartitioned";
+ALTER SEQUENCE "textsummary_id_seq" OWNED BY "textsummary"."id";
+ALTER TABLE "textsummary" ADD CONSTRAINT "fk_textsumm_articlec_5a8d2a4e" FOREIGN KEY ("content_id") REFERENCES "articlecontent" ("content_hash") ON DELETE SET NULL;
+CREATE INDEX IF NOT EXISTS "idx_textsummary_content_b22c50" ON "textsummary" ("content_id");
+CREATE INDEX IF NOT EXISTS "idx_textsummary_created_e61935" ON "textsummary" ("created_at", "id");
+CREATE INDEX IF NOT EXISTS "idx_textsummary_created_with_summary" ON "textsummary" ("created_at", "id") WHERE "summary" <> '';
+CREATE INDEX IF NOT EXISTS "idx_textsummary_url_hash" ON "textsummary" USING HASH ("url");
+CREATE INDEX IF NOT EXISTS "idx_textsummary_url_trgm" ON "textsummary" USING GIN ("url" gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS "idx_textsummary_status_832827" ON "textsummary" ("status", "id");
+CREATE INDEX IF NOT EXISTS "idx_textsummary_status_214937" ON "textsummary" ("status", "fetched_at");
+CREATE INDEX IF NOT EXISTS "idx_textsummary_search_vector" ON "textsummary" USING GIN ("search_vector");
+-- downgrade --
+DELETE FROM "summaryjob" WHERE NOT EXISTS (
+    SELECT 1 FROM "textsummary" WHERE "textsummary"."id" = "summaryjob"."summary_id"
+);
+ALTER SEQUENCE "textsummary_id_seq" OWNED BY NONE;
+ALTER TABLE "textsummary" RENAME TO "textsummary_partitioned";
+ALTER TABLE "textsummary_partitioned" RENAME CONSTRAINT "textsummary_pkey" TO "textsummary_partitioned_pkey";
+CREATE TABLE "textsummary" (
+    LIKE "textsummary_partitioned" INCLUDING DEFAULTS INCLUDING COMMENTS,
+    PRIMARY KEY ("id")
+);
+COMMENT ON TABLE "textsummary" IS 'Summary for a web page.';
+INSERT INTO "textsummary" SELECT * FROM "textsummary_partitioned";
+DROP TABLE "textsummary_partitioned";
+ALTER SEQUENCE "textsummary_id_seq" OWNED BY "textsummary"."id";
+ALTER TABLE "textsummary" ADD CONSTRAINT "fk_textsumm_articlec_5a8d2a4e" FOREIGN KEY ("content_id") REFERENCES "articlecontent" ("content_hash") ON DELETE SET NULL;
+CREATE INDEX IF NOT EXISTS "idx_textsummary_content_b22c50" ON "textsummary" ("content_id");
+CREATE INDEX IF NOT EXISTS "idx_textsummary_created_e61935" ON "textsummary" ("created_at", "id");
+CREATE INDEX IF NOT EXISTS "idx_textsummary_created_with_summary" ON "textsummary" ("created_at", "id") WHERE "summary" <> '';
+CREATE INDEX IF NOT EXISTS "idx_textsummary_url_hash" ON "textsummary" USING HASH ("url");
+CREATE INDEX IF NOT EXISTS "idx_textsummary_url_trgm" ON "textsummary" USING GIN ("url" gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS "idx_textsummary_status_832827" ON "textsummary" ("status", "id");
+CREATE INDEX IF NOT EXISTS "idx_textsummary_status_214937" ON "textsummary" ("status", "fetched_at");
+CREATE INDEX IF NOT EXISTS "idx_textsummary_search_vector" ON "textsummary" USING GIN ("search_vector");
+DROP INDEX IF EXISTS "idx_summaryjob_summary_1bb273";
+ALTER TABLE "summaryjob" ADD CONSTRAINT "summaryjob_summary_id_fkey" FOREIGN KEY ("summary_id") REFERENCES "textsummary" ("id") ON DELETE CASCADE;
@@ -0,0 +1,8 @@
+-- upgrade --
+ALTER TABLE "summaryjob" ADD "priority" SMALLINT NOT NULL  DEFAULT 0;
+DROP INDEX IF EXISTS "idx_summaryjob_status_8a555b";
+CREATE INDEX IF NOT EXISTS "idx_summaryjob_status_3f6b1e" ON "summaryjob" ("status", "priority", "id");
+-- downgrade --
+DROP INDEX IF EXISTS "idx_summaryjob_status_3f6b1e";
+CREATE INDEX IF NOT EXISTS "idx_summaryjob_status_8a555b" ON "summaryjob" ("status", "id");
+ALTER TABLE "summaryjob" DROP COLUMN "priority";
@@ -0,0 +1,16 @@
+-- upgrade --
+CREATE TABLE IF NOT EXISTS "summaryjob" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "url" TEXT NOT NULL,
+    "status" VARCHAR(7) NOT NULL  DEFAULT 'pending',
+    "attempts" INT NOT NULL  DEFAULT 0,
+    "error" TEXT,
+    "locked_at" TIMESTAMPTZ,
+    "created_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "summary_id" INT NOT NULL REFERENCES "textsummary" ("id") ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS "idx_summaryjob_status_8a555b" ON "summaryjob" ("status", "id");
+COMMENT ON COLUMN "summaryjob"."status" IS 'PENDING: pending\nRUNNING: running\nFAILED: failed';
+COMMENT ON TABLE "summaryjob" IS 'Queued summary generation for a web page.';
+-- downgrade --
+DROP TABLE IF EXISTS "summaryjob";
@@ -0,0 +1,4 @@
+-- upgrade --
+CREATE INDEX IF NOT EXISTS "idx_textsummary_url_hash" ON "textsummary" USING HASH ("url");
+-- downgrade --
+DROP INDEX IF EXISTS "idx_textsummary_url_hash";
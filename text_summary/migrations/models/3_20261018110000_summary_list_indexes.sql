@@ -0,0 +1,9 @@
+-- upgrade --
+CREATE INDEX IF NOT EXISTS "idx_textsummary_created_e61935" ON "textsummary" ("created_at", "id");
+CREATE INDEX IF NOT EXISTS "idx_textsummary_created_with_summary" ON "textsummary" ("created_at", "id") WHERE "summary" <> '';
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS "idx_textsummary_url_trgm" ON "textsummary" USING GIN ("url" gin_trgm_ops);
+-- downgrade --
+DROP INDEX IF EXISTS "idx_textsummary_url_trgm";
+DROP INDEX IF EXISTS "idx_textsummary_created_with_summary";
+DROP INDEX IF EXISTS "idx_textsummary_created_e61935";
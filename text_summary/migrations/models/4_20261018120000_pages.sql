@@ -0,0 +1,12 @@
+-- upgrade --
+CREATE TABLE IF NOT EXISTS "page" (
+    "url_hash" VARCHAR(64) NOT NULL  PRIMARY KEY,
+    "url" TEXT NOT NULL,
+    "etag" TEXT,
+    "last_modified" TEXT,
+    "summary" TEXT NOT NULL,
+    "fetched_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP
+);
+COMMENT ON TABLE "page" IS 'Validators of the last fetched version of a web page and its summary.';
+-- downgrade --
+DROP TABLE IF EXISTS "page";
@@ -0,0 +1,22 @@
+-- upgrade --
+CREATE TABLE IF NOT EXISTS "articlecontent" (
+    "content_hash" VARCHAR(64) NOT NULL  PRIMARY KEY,
+    "text" BYTEA NOT NULL,
+    "compression" VARCHAR(4) NOT NULL  DEFAULT 'none',
+    "summary" TEXT NOT NULL,
+    "created_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP
+);
+COMMENT ON COLUMN "articlecontent"."compression" IS 'NONE: none\nZLIB: zlib\nZSTD: zstd';
+COMMENT ON TABLE "articlecontent" IS 'Extracted article text and its summary, stored once for all pages with the same text.';
+ALTER TABLE "textsummary" ADD "content_id" VARCHAR(64);
+ALTER TABLE "textsummary" ADD CONSTRAINT "fk_textsumm_articlec_5a8d2a4e" FOREIGN KEY ("content_id") REFERENCES "articlecontent" ("content_hash") ON DELETE SET NULL;
+CREATE INDEX IF NOT EXISTS "idx_textsummary_content_b22c50" ON "textsummary" ("content_id");
+ALTER TABLE "page" ADD "content_id" VARCHAR(64);
+ALTER TABLE "page" ADD CONSTRAINT "fk_page_articlec_0e1b7d3c" FOREIGN KEY ("content_id") REFERENCES "articlecontent" ("content_hash") ON DELETE SET NULL;
+-- downgrade --
+ALTER TABLE "page" DROP CONSTRAINT IF EXISTS "fk_page_articlec_0e1b7d3c";
+ALTER TABLE "page" DROP COLUMN "content_id";
+DROP INDEX IF EXISTS "idx_textsummary_content_b22c50";
+ALTER TABLE "textsummary" DROP CONSTRAINT IF EXISTS "fk_textsumm_articlec_5a8d2a4e";
+ALTER TABLE "textsummary" DROP COLUMN "content_id";
+DROP TABLE IF EXISTS "articlecontent";
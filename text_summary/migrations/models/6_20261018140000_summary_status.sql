@@ -0,0 +1,22 @@
+-- upgrade --
+ALTER TABLE "textsummary" ADD "status" VARCHAR(7) NOT NULL  DEFAULT 'pending';
+ALTER TABLE "textsummary" ADD "error" TEXT;
+ALTER TABLE "textsummary" ADD "attempts" INT NOT NULL  DEFAULT 0;
+ALTER TABLE "textsummary" ADD "started_at" TIMESTAMPTZ;
+ALTER TABLE "textsummary" ADD "finished_at" TIMESTAMPTZ;
+COMMENT ON COLUMN "textsummary"."status" IS 'PENDING: pending\nRUNNING: running\nDONE: done\nFAILED: failed';
+UPDATE "textsummary" SET "status" = 'done', "finished_at" = "created_at" WHERE "summary" <> '';
+UPDATE "textsummary" SET "status" = 'failed', "error" = 'Unknown: generated before status tracking'
+WHERE "summary" = '' AND NOT EXISTS (
+    SELECT 1 FROM "summaryjob" WHERE "summaryjob"."summary_id" = "textsummary"."id" AND "summaryjob"."status" <> 'failed'
+);
+CREATE INDEX IF NOT EXISTS "idx_textsummary_status_832827" ON "textsummary" ("status", "id");
+ALTER TABLE "summaryjob" ADD "run_at" TIMESTAMPTZ;
+-- downgrade --
+ALTER TABLE "summaryjob" DROP COLUMN "run_at";
+DROP INDEX IF EXISTS "idx_textsummary_status_832827";
+ALTER TABLE "textsummary" DROP COLUMN "finished_at";
+ALTER TABLE "textsummary" DROP COLUMN "started_at";
+ALTER TABLE "textsummary" DROP COLUMN "attempts";
+ALTER TABLE "textsummary" DROP COLUMN "error";
+ALTER TABLE "textsummary" DROP COLUMN "status";
@@ -0,0 +1,7 @@
+-- upgrade --
+ALTER TABLE "textsummary" ADD "search_vector" TSVECTOR;
+UPDATE "textsummary" SET "search_vector" = to_tsvector('english', "summary") WHERE "summary" <> '';
+CREATE INDEX IF NOT EXISTS "idx_textsummary_search_vector" ON "textsummary" USING GIN ("search_vector");
+-- downgrade --
+DROP INDEX IF EXISTS "idx_textsummary_search_vector";
+ALTER TABLE "textsummary" DROP COLUMN "search_vector";
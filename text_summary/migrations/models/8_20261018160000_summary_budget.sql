@@ -0,0 +1,6 @@
+-- upgrade --
+ALTER TABLE "textsummary" ADD "max_sentences" SMALLINT;
+ALTER TABLE "textsummary" ADD "max_chars" INT;
+-- downgrade --
+ALTER TABLE "textsummary" DROP COLUMN "max_chars";
+ALTER TABLE "textsummary" DROP COLUMN "max_sentences";
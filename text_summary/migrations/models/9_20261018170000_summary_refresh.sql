@@ -0,0 +1,7 @@
+-- upgrade --
+ALTER TABLE "textsummary" ADD "fetched_at" TIMESTAMPTZ;
+UPDATE "textsummary" SET "fetched_at" = COALESCE("finished_at", "created_at") WHERE "status" = 'done';
+CREATE INDEX IF NOT EXISTS "idx_textsummary_status_214937" ON "textsummary" ("status", "fetched_at");
+-- downgrade --
+DROP INDEX IF EXISTS "idx_textsummary_status_214937";
+ALTER TABLE "textsummary" DROP COLUMN "fetched_at";
@@ -1,14 +1,30 @@
 """Settings and test preparation for summarizer web app tests."""
+import asyncio
 import json
 import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import pytest
 from starlette.testclient import TestClient
 from tortoise.contrib.fastapi import register_tortoise
 
+from app import summarizer
 from app.api import summaries
 from app.main import create_application
 from app.config import get_settings, Settings
+from app.fetcher import Fetcher
+from app.response_cache import get_response_cache
+from app.scheduler import Scheduler
+from app.search import get_search_index
+
+STUB_ARTICLE_HTML = (
+    '<html><head><title>Stub article</title></head><body><article><h1>Stub article</h1>'
+    '<p>Cats are small furry animals. Cats like to sleep on warm furry blankets. '
+    'Many cats and other animals sleep all day.</p></article></body></html>'
+)
+STUB_ETAG = '"v1"'
 
 
 def pytest_configure(config):
@@ -23,6 +39,12 @@ def get_settings_override():
     return Settings(testing=1, database_url=os.getenv('DATABASE_TEST_URL'))
 
 
+@pytest.fixture(scope='session')
+def run_async():
+    """Run a coroutine in the event loop shared with test clients."""
+    return asyncio.get_event_loop().run_until_complete
+
+
 @pytest.fixture(scope='session')
 def test_app():
     """Basic client for summarizer app tests without DB."""
@@ -50,6 +72,18 @@ def test_app_with_db():
         yield test_client
 
 
+@pytest.fixture(scope='function', autouse=True)
+def empty_response_cache():
+    """Start every test with no cached responses, as tests change summaries right in the DB."""
+    get_response_cache().backend.clear()
+
+
+@pytest.fixture(scope='function', autouse=True)
+def empty_search_index():
+    """Start every test with the in-process search index loaded again from the DB."""
+    get_search_index.cache_clear()
+
+
 @pytest.fixture(scope='function')
 def existing_summary(test_app_with_db, mocked_summarizer):
     """Prepare a summary to use in tests."""
@@ -63,7 +97,121 @@ def existing_summary(test_app_with_db, mocked_summarizer):
 
 @pytest.fixture(scope='function')
 def mocked_summarizer(monkeypatch):
-    """Mock web page parsing and summarization engine."""
-    def mock_generate_summary(summary_id, url):
-        return 'summary'
-    monkeypatch.setattr(summaries, 'generate_summary', mock_generate_summary)
+    """Replace the summary scheduler with one that keeps summaries queued, never generating them."""
+    summary_scheduler = Scheduler(concurrency=1, queue_size=10000)
+    monkeypatch.setattr(summaries, 'get_scheduler', lambda: summary_scheduler)
+    return summary_scheduler
+
+
+class StubPageHandler(BaseHTTPRequestHandler):
+    """Serves web pages for fetcher tests and records requests it gets."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):  # noqa: N802
+        """Serve a page and track concurrent requests and client connections."""
+        server = self.server
+        with server.lock:
+            server.connections.add(self.client_address)
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            self.serve()
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def serve(self):
+        """Write a response for the requested path."""
+        routes = {
+            '/article': self.serve_article,
+            '/slow': self.serve_slow,
+            '/large': self.serve_large,
+            '/chunked': self.serve_chunked,
+        }
+        routes.get(self.path, self.serve_missing)()
+
+    def serve_article(self):
+        """Serve a page that supports revalidation by ETag."""
+        if self.headers.get('If-None-Match') == STUB_ETAG:
+            self.send_response(304)
+            self.send_header('ETag', STUB_ETAG)
+            self.end_headers()
+        else:
+            self.send_body(STUB_ARTICLE_HTML.encode(), {'ETag': STUB_ETAG})
+
+    def serve_slow(self):
+        """Serve a page after a delay."""
+        time.sleep(0.05)
+        self.send_body(STUB_ARTICLE_HTML.encode())
+
+    def serve_large(self):
+        """Serve a page of declared size above the test fetcher limit."""
+        self.send_body(b'x' * 2048)
+
+    def serve_chunked(self):
+        """Stream a page of unknown size above the test fetcher limit."""
+        self.send_response(200)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for _ in range(4):
+            self.wfile.write(b'400\r\n' + b'x' * 1024 + b'\r\n')
+        self.wfile.write(b'0\r\n\r\n')
+
+    def serve_missing(self):
+        """Respond that a page is not found."""
+        self.send_body(b'Not found', status=404)
+
+    def send_body(self, body, headers=None, status=200):
+        """Write a response with a body of known length."""
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """Keep test output clean."""
+
+
+@pytest.fixture(scope='session')
+def stub_server():
+    """Local HTTP server with test web pages."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubPageHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope='function')
+def stub_url(stub_server):
+    """Get URL of a stub server page and reset its request stats."""
+    stub_server.connections = set()
+    stub_server.active = 0
+    stub_server.max_active = 0
+
+    def url(path):
+        host, port = stub_server.server_address
+        return f'http://{host}:{port}{path}'
+    return url
+
+
+@pytest.fixture(scope='function')
+def fetcher(monkeypatch, run_async):
+    """Fetcher with small limits used by the summarizer."""
+    page_fetcher = Fetcher(
+        max_connections=10,
+        max_connections_per_host=2,
+        timeout=5,
+        max_body_size=1024,
+        user_agent='test',
+    )
+    monkeypatch.setattr(summarizer, 'get_fetcher', lambda: page_fetcher)
+    yield page_fetcher
+    run_async(page_fetcher.close())
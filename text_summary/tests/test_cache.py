@@ -0,0 +1,207 @@
+"""Tests for summary cache."""
+import asyncio
+import json
+import uuid
+from datetime import timedelta
+
+import pytest
+from tortoise import timezone
+
+from app import cache, contents
+from app.api import summaries
+from app.cache import LRUCache, normalize_url, SingleFlight, SummaryCache
+from app.contents import ArticleSummary
+from app.instrumentation import track_queries
+from app.models import SummaryStatus, TextSummary
+
+SUMMARIES_ENDPOINT = 'summaries'
+
+
+@pytest.mark.parametrize(
+    'url,normalized_url',
+    [
+        ('HTTP://Example.COM/', 'http://example.com'),
+        ('http://example.com:80/page/', 'http://example.com/page'),
+        ('https://example.com:8443/page', 'https://example.com:8443/page'),
+        ('http://example.com/page?b=2&a=1#section', 'http://example.com/page?a=1&b=2'),
+        (
+            'http://example.com/page?id=1&utm_source=x&UTM_Medium=y&fbclid=z',
+            'http://example.com/page?id=1',
+        ),
+    ],
+    ids=['case and slash', 'default port', 'custom port', 'query order and fragment', 'tracking'],
+)
+def test_normalize_url(url, normalized_url):
+    assert normalize_url(url) == normalized_url, f'Invalid normalized URL for {url}'
+
+
+def test_lru_cache_evicts_least_recently_used():
+    lru_cache = LRUCache(maxsize=2, ttl=60)
+    lru_cache.set('a', 1)
+    lru_cache.set('b', 2)
+    lru_cache.get('a')
+    lru_cache.set('c', 3)
+
+    assert lru_cache.get('b') is None, 'Least recently used value is not evicted'
+    assert lru_cache.get('a') == 1, 'Recently used value is evicted'
+    assert lru_cache.get('c') == 3, 'New value is not stored'
+
+
+def test_lru_cache_expires_values(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now)
+    lru_cache = LRUCache(maxsize=2, ttl=60)
+    lru_cache.set('a', 1)
+
+    now += 61
+
+    assert lru_cache.get('a') is None, 'Expired value is returned'
+    assert len(lru_cache) == 0, 'Expired value is not removed'
+
+
+def test_single_flight_coalesces_calls(run_async):
+    single_flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'summary'
+
+    async def fetch_concurrently():
+        return await asyncio.gather(*(single_flight.do('key', fetch) for _ in range(5)))
+
+    results = run_async(fetch_concurrently())
+
+    assert results == ['summary'] * 5, f'Invalid results: {results}'
+    assert len(calls) == 1, f'Function is called {len(calls)} times'
+    assert 'key' not in single_flight, 'Finished call is not forgotten'
+
+
+def test_summary_cache_computes_once(run_async):
+    summary_cache = SummaryCache(maxsize=10, ttl=60, use_db=False)
+    calls = []
+
+    async def summarize():
+        calls.append(1)
+        return 'summary'
+
+    run_async(summary_cache.get_or_compute('http://example.com/', summarize))
+    summary = run_async(summary_cache.get_or_compute('http://EXAMPLE.com', summarize))
+
+    assert summary == 'summary', f'Invalid summary: {summary}'
+    assert len(calls) == 1, f'Summary is computed {len(calls)} times'
+
+
+@pytest.fixture(scope='function')
+def generated_summary(test_app_with_db, mocked_summarizer, run_async):
+    """Prepare summaries generated from articles fetched `fetched_ago` seconds ago."""
+    def create(url, summary, fetched_ago=0, **budget):
+        response = test_app_with_db.post(f'{SUMMARIES_ENDPOINT}/', json={'url': url, **budget})
+        summary_id = response.json()['id']
+        text_hash = contents.content_hash(summary)
+        run_async(contents.save(text_hash, summary, summary))
+        run_async(TextSummary.filter(id=summary_id).update(
+            summary=summary,
+            status=SummaryStatus.DONE,
+            content_id=text_hash,
+            fetched_at=timezone.now() - timedelta(seconds=fetched_ago),
+        ))
+        return summary_id
+    return create
+
+
+def test_summary_cache_uses_stored_summaries(run_async, generated_summary):
+    summary_url = f'http://example.com/{uuid.uuid4()}'
+    generated_summary(summary_url, 'stored summary')
+    summary_cache = SummaryCache(maxsize=10, ttl=60, use_db=True)
+
+    summary = run_async(summary_cache.get(summary_url))
+
+    expected = ArticleSummary('stored summary', contents.content_hash('stored summary'))
+    assert summary == expected, f'Invalid summary: {summary}'
+
+
+def test_summary_cache_skips_summaries_cut_to_budget(run_async, generated_summary):
+    summary_url = f'http://example.com/{uuid.uuid4()}'
+    generated_summary(summary_url, 'cut summary', max_sentences=1)
+    summary_cache = SummaryCache(maxsize=10, ttl=60, use_db=True)
+
+    summary = run_async(summary_cache.get(summary_url))
+
+    assert summary is None, f'Summary cut to a budget is reused: {summary}'
+
+
+def test_summary_cache_skips_summaries_fetched_long_ago(run_async, generated_summary):
+    summary_url = f'http://example.com/{uuid.uuid4()}'
+    generated_summary(summary_url, 'outdated summary', fetched_ago=61)
+    summary_cache = SummaryCache(maxsize=10, ttl=60, use_db=True)
+
+    summary = run_async(summary_cache.get(summary_url))
+
+    assert summary is None, f'Summary fetched long ago is reused: {summary}'
+
+
+def test_summary_cache_skips_written_summaries(test_app_with_db, run_async, generated_summary):
+    written_url, edited_url = (f'http://example.com/{uuid.uuid4()}' for _ in range(2))
+    created = test_app_with_db.post(f'{SUMMARIES_ENDPOINT}/', json={'url': written_url})
+    edited_id = generated_summary(edited_url, 'generated summary')
+    test_app_with_db.put(
+        f'{SUMMARIES_ENDPOINT}/{created.json()["id"]}/',
+        json={'url': written_url, 'summary': 'written summary'},
+    )
+    test_app_with_db.put(
+        f'{SUMMARIES_ENDPOINT}/batch/',
+        json=[{'id': edited_id, 'url': edited_url, 'summary': 'edited summary'}],
+    )
+    summary_cache = SummaryCache(maxsize=10, ttl=60, use_db=True)
+
+    summaries = run_async(summary_cache.get_many([written_url, edited_url]))
+
+    assert summaries == [None, None], f'Summaries written by clients are reused: {summaries}'
+
+
+def test_summary_cache_gets_many_with_one_query(run_async, generated_summary):
+    cached_url, stored_url, missing_url = (
+        f'http://example.com/{uuid.uuid4()}' for _ in range(3)
+    )
+    generated_summary(stored_url, 'stored summary')
+    summary_cache = SummaryCache(maxsize=10, ttl=60, use_db=True)
+    summary_cache._memory.set(normalize_url(cached_url), ArticleSummary('cached summary'))
+
+    async def get_many():
+        with track_queries() as stats:
+            summaries = await summary_cache.get_many([cached_url, stored_url, missing_url])
+        return summaries, stats.count
+
+    summaries, query_count = run_async(get_many())
+
+    stored = ArticleSummary('stored summary', contents.content_hash('stored summary'))
+    expected = [ArticleSummary('cached summary'), stored, None]
+    assert summaries == expected, f'Invalid summaries: {summaries}'
+    assert query_count == 1, f'Summaries are read with {query_count} queries'
+
+
+def test_create_cached_summary(test_app, mocked_summarizer, monkeypatch):
+    summary_cache = SummaryCache(maxsize=10, ttl=60, use_db=False)
+    summary_cache._memory.set(
+        normalize_url('http://example.com'), ArticleSummary('cached summary', 'content hash'),
+    )
+    monkeypatch.setattr(summaries, 'get_summary_cache', lambda: summary_cache)
+
+    created = []
+
+    async def mock_create(payload, cached_summary=None):
+        created.append(cached_summary)
+        return 1
+
+    monkeypatch.setattr(summaries.crud, 'create', mock_create)
+
+    response = test_app.post(
+        f'{SUMMARIES_ENDPOINT}/', data=json.dumps({'url': 'http://example.com'}),
+    )
+
+    assert response.status_code == 201, f'Invalid response code: {response.status_code}'
+    cached = ArticleSummary('cached summary', 'content hash')
+    assert created == [cached], f'Summary is not created from cache: {created}'
+    assert len(mocked_summarizer) == 0, 'Cached summary is generated again'
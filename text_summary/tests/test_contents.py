@@ -0,0 +1,101 @@
+"""Tests for deduplicated and compressed storage of article contents."""
+import asyncio
+
+import pytest
+
+from app import contents, summarizer
+from app.config import Compression
+from app.contents import ArticleSummary
+from app.engine import SummarizationEngine
+from app.models import ArticleContent
+from app.nlp import ParsedArticle
+
+ARTICLE_TEXT = 'Cats are small furry animals. ' * 100
+
+
+@pytest.fixture(scope='function')
+def counted_nlp(test_app_with_db, monkeypatch, run_async):
+    """Summarization in the test process that records summarized texts, with no stored contents."""
+    engine = SummarizationEngine(fetch_threads=1, nlp_processes=0)
+    summarized = []
+
+    def summarize_parsed(article, backend, chunk_size):
+        summarized.append(article.text)
+        return f'summary {len(summarized)}'
+
+    monkeypatch.setattr(summarizer, 'get_engine', lambda: engine)
+    monkeypatch.setattr(summarizer, 'summarize_parsed', summarize_parsed)
+    run_async(ArticleContent.all().delete())
+    yield summarized
+    engine.shutdown()
+
+
+@pytest.mark.parametrize('compression', list(Compression))
+def test_compress_round_trip(compression):
+    if compression == Compression.ZSTD:
+        pytest.importorskip('zstandard', reason='zstd extra is not installed')
+    data, used_compression = contents.compress(ARTICLE_TEXT, compression, min_size=100)
+
+    assert used_compression == compression, f'Invalid compression: {used_compression}'
+    assert contents.decompress(data, used_compression) == ARTICLE_TEXT, 'Text is corrupted'
+    if compression != Compression.NONE:
+        assert len(data) < len(ARTICLE_TEXT), f'Text is not compressed: {len(data)} bytes'
+
+
+def test_compress_skips_small_texts():
+    data, compression = contents.compress('Short text.', Compression.ZLIB, min_size=100)
+
+    assert (data, compression) == (b'Short text.', Compression.NONE), 'Small text is compressed'
+
+
+def test_content_hash_ignores_whitespace():
+    assert contents.content_hash('A  text.\nMore.') == contents.content_hash(' A text. More. '), (
+        'Texts differing in whitespace have different hashes'
+    )
+
+
+def test_save_content(test_app_with_db, run_async):
+    text_hash = contents.content_hash(ARTICLE_TEXT)
+    run_async(ArticleContent.filter(content_hash=text_hash).delete())
+
+    run_async(contents.save(text_hash, ARTICLE_TEXT, 'first summary'))
+    run_async(contents.save(text_hash, ARTICLE_TEXT, 'second summary'))
+
+    stored = run_async(ArticleContent.get(content_hash=text_hash))
+    assert stored.compression == Compression.ZLIB, f'Invalid compression: {stored.compression}'
+    assert len(stored.text) < len(ARTICLE_TEXT), 'Stored text is not compressed'
+    assert run_async(contents.get_text(text_hash)) == ARTICLE_TEXT, 'Invalid stored text'
+    assert run_async(contents.get_summary(text_hash)) == 'first summary', 'Summary is replaced'
+
+
+def test_summarize_duplicate_content(counted_nlp, run_async):
+    original = ParsedArticle('Cats', ARTICLE_TEXT)
+    mirror = ParsedArticle('Cats | Mirror', f'\n{ARTICLE_TEXT}\n')
+
+    first = run_async(summarizer.summarize_content(original))
+    second = run_async(summarizer.summarize_content(mirror))
+
+    assert counted_nlp == [ARTICLE_TEXT], f'Same text is summarized {len(counted_nlp)} times'
+    assert first == second == ArticleSummary('summary 1', contents.content_hash(ARTICLE_TEXT)), (
+        f'Invalid summaries: {first}, {second}'
+    )
+
+
+def test_summarize_duplicate_content_concurrently(counted_nlp, run_async):
+    async def summarize_mirrors():
+        return await asyncio.gather(*(
+            summarizer.summarize_content(ParsedArticle(f'Mirror {index}', ARTICLE_TEXT))
+            for index in range(3)
+        ))
+
+    summaries = run_async(summarize_mirrors())
+
+    assert len(counted_nlp) == 1, f'Same text is summarized {len(counted_nlp)} times'
+    assert {summary.summary for summary in summaries} == {'summary 1'}, 'Summaries differ'
+
+
+def test_summarize_empty_content(counted_nlp, run_async):
+    summary = run_async(summarizer.summarize_content(ParsedArticle('Title only', '')))
+
+    assert summary == ArticleSummary('summary 1'), f'Invalid summary: {summary}'
+    assert not run_async(ArticleContent.all().count()), 'Empty text is stored'
@@ -0,0 +1,27 @@
+"""Tests for summaries CRUD operations working with a DB."""
+import json
+import uuid
+
+from app.api import crud
+from app.schemas import SummaryFilterSchema
+
+SUMMARIES_ENDPOINT = 'summaries'
+
+
+def test_iterate_all_in_chunks(test_app_with_db, run_async, mocked_summarizer):
+    url_prefix = f'http://example.com/{uuid.uuid4()}/'
+    summary_urls = [f'{url_prefix}{index}' for index in range(5)]
+    test_app_with_db.post(
+        f'{SUMMARIES_ENDPOINT}/batch/',
+        data=json.dumps([{'url': summary_url} for summary_url in summary_urls]),
+    )
+
+    async def collect_chunks():
+        filters = SummaryFilterSchema(url_prefix=url_prefix)
+        return [chunk async for chunk in crud.iterate_all(2, filters)]
+
+    chunks = run_async(collect_chunks())
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1], f'Invalid chunks: {chunks}'
+    iterated_urls = [summary['url'] for chunk in chunks for summary in chunk]
+    assert iterated_urls == summary_urls[::-1], f'Invalid iterated summaries: {iterated_urls}'
@@ -0,0 +1,91 @@
+"""Tests for summarization execution engine."""
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.engine import SummarizationEngine
+
+
+INITIALIZED_ENV = 'TEST_ENGINE_INITIALIZED'
+
+
+def current_thread_name(*args):
+    return threading.current_thread().name
+
+
+def initialize_process():
+    os.environ[INITIALIZED_ENV] = '1'
+
+
+def is_initialized():
+    return os.environ.get(INITIALIZED_ENV) == '1'
+
+
+def fail_to_initialize():
+    raise RuntimeError('Missing model')
+
+
+@pytest.fixture(scope='function')
+def engine():
+    """Engine with real worker pools that is stopped after the test."""
+    summarization_engine = SummarizationEngine(fetch_threads=2, nlp_processes=1)
+    yield summarization_engine
+    summarization_engine.shutdown()
+
+
+def test_run_io_in_thread_pool(engine, run_async):
+    thread_name = run_async(engine.run_io(current_thread_name))
+
+    assert thread_name.startswith('summary-io'), f'Function ran in a wrong thread: {thread_name}'
+
+
+def test_run_cpu_in_process_pool(engine, run_async):
+    result = run_async(engine.run_cpu(sum, [1, 2, 3]))
+
+    assert result == 6, f'Invalid result: {result}'
+
+
+def test_run_cpu_without_processes(run_async):
+    engine = SummarizationEngine(fetch_threads=1, nlp_processes=0)
+
+    thread_name = run_async(engine.run_cpu(current_thread_name))
+    engine.shutdown()
+
+    assert thread_name.startswith('summary-io'), f'Function ran in a wrong thread: {thread_name}'
+
+
+def test_shutdown(engine, run_async):
+    run_async(engine.run_io(current_thread_name))
+    engine.shutdown()
+
+    assert not engine.started, 'Engine is still running after shutdown'
+
+
+def test_warm_up_initializes_processes(run_async):
+    engine = SummarizationEngine(fetch_threads=1, nlp_processes=2, initializer=initialize_process)
+
+    run_async(engine.warm_up())
+    initialized = run_async(engine.run_cpu(is_initialized))
+    engine.shutdown()
+
+    assert initialized, 'Worker process is not initialized'
+
+
+def test_warm_up_without_processes(run_async):
+    engine = SummarizationEngine(fetch_threads=1, nlp_processes=0, initializer=initialize_process)
+
+    run_async(engine.warm_up())
+    engine.shutdown()
+
+    assert os.environ.pop(INITIALIZED_ENV, None), 'Current process is not initialized'
+
+
+@pytest.mark.negative
+def test_warm_up_fails_fast(run_async):
+    engine = SummarizationEngine(fetch_threads=1, nlp_processes=1, initializer=fail_to_initialize)
+
+    with pytest.raises(BrokenProcessPool):
+        run_async(engine.warm_up())
+    engine.shutdown()
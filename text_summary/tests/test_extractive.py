@@ -0,0 +1,73 @@
+"""Tests for vectorized extractive summarization."""
+import pytest
+
+from app.config import SummarizerBackendName
+from app.extractive import ExtractiveSummarizer, get_stopwords, split_sentences
+from app.nlp import get_backend, NumpyBackend, parse_article, summarize_parsed
+
+ANIMALS_TEXT = (
+    'Cats are small furry animals. Cats like to sleep on warm furry blankets. '
+    'The stock market fell today. Many cats and other animals sleep all day.'
+)
+PYTHON_TEXT = (
+    'Python is a programming language. Python code is readable. '
+    'I had lunch. Programming in the Python language is fun.'
+)
+ARTICLE_HTML = f"""
+<html><head><title>About cats</title></head>
+<body><article><h1>About cats</h1><p>{ANIMALS_TEXT}</p><p>{ANIMALS_TEXT}</p></article></body>
+</html>
+"""
+
+
+@pytest.fixture(scope='module')
+def summarizer():
+    """Summarizer picking two sentences."""
+    return ExtractiveSummarizer(max_sentences=2, stopwords=get_stopwords())
+
+
+@pytest.mark.parametrize(
+    'text,sentences',
+    [
+        ('First one. Second one! Third?', ['First one.', 'Second one!', 'Third?']),
+        ('Version 3.8 is out. "Quoted." Next', ['Version 3.8 is out.', '"Quoted."', 'Next']),
+        ('Title\n\nParagraph text', ['Title', 'Paragraph text']),
+    ],
+    ids=['punctuation', 'numbers and quotes', 'paragraphs'],
+)
+def test_split_sentences(text, sentences):
+    assert split_sentences(text) == sentences, f'Invalid sentences of {text!r}'
+
+
+def test_summarize_picks_central_sentences(summarizer):
+    summary = summarizer.summarize_batch([ANIMALS_TEXT])[0]
+
+    assert summary == 'Cats are small furry animals.\nMany cats and other animals sleep all day.', (
+        f'Invalid summary: {summary}'
+    )
+
+
+def test_summarize_batch_matches_single_articles(summarizer):
+    texts = [ANIMALS_TEXT, '', PYTHON_TEXT, 'One sentence only.']
+
+    summaries = summarizer.summarize_batch(texts)
+
+    assert summaries == [summarizer.summarize_batch([text])[0] for text in texts], (
+        'Batch summaries differ from single article summaries'
+    )
+    assert summaries[1] == '', f'Invalid summary of empty text: {summaries[1]}'
+    assert summaries[3] == 'One sentence only.', f'Invalid summary of a sentence: {summaries[3]}'
+
+
+def test_summarize_stopwords_only(summarizer):
+    summaries = summarizer.summarize_batch(['It is. It was.'])
+
+    assert summaries == ['It is.\nIt was.'], f'Invalid summaries: {summaries}'
+
+
+def test_summarize_article_with_numpy_backend():
+    article = parse_article('http://example.com/cats', ARTICLE_HTML)
+    summary = summarize_parsed(article, SummarizerBackendName.NUMPY)
+
+    assert isinstance(get_backend(SummarizerBackendName.NUMPY), NumpyBackend), 'Invalid backend'
+    assert 'Cats are small furry animals.' in summary, f'Invalid summary: {summary}'
@@ -0,0 +1,72 @@
+"""Tests for asynchronous web page fetching and revalidation."""
+import asyncio
+
+import httpx
+import pytest
+
+from app import pages, summarizer
+from app.engine import SummarizationEngine
+from app.fetcher import FetchError
+from app.models import ArticleContent, Page
+from tests.conftest import STUB_ARTICLE_HTML, STUB_ETAG
+
+
+def test_fetch_page(fetcher, stub_url, stub_server, run_async):
+    first = run_async(fetcher.fetch(stub_url('/article')))
+    second = run_async(fetcher.fetch(stub_url('/slow')))
+
+    assert first.html == STUB_ARTICLE_HTML, f'Invalid page: {first.html}'
+    assert first.etag == STUB_ETAG, f'Invalid ETag: {first.etag}'
+    assert not second.not_modified, 'Downloaded page is reported as not modified'
+    assert len(stub_server.connections) == 1, 'Connection is not reused'
+
+
+def test_fetch_not_modified(fetcher, stub_url, run_async):
+    page = run_async(fetcher.fetch(stub_url('/article'), etag=STUB_ETAG))
+
+    assert page.not_modified, 'Page is downloaded again'
+    assert page.etag == STUB_ETAG, f'Invalid ETag: {page.etag}'
+
+
+def test_fetch_per_host_limit(fetcher, stub_url, stub_server, run_async):
+    async def fetch_many():
+        return await asyncio.gather(*(fetcher.fetch(stub_url('/slow')) for _ in range(6)))
+
+    fetched = run_async(fetch_many())
+
+    assert len(fetched) == 6, f'Invalid number of pages: {len(fetched)}'
+    assert stub_server.max_active == 2, f'Invalid concurrency: {stub_server.max_active}'
+    assert not fetcher.host_limiter._semaphores, 'Idle hosts are not forgotten'
+
+
+@pytest.mark.negative
+@pytest.mark.parametrize('path', ['/large', '/chunked'], ids=['declared size', 'streamed size'])
+def test_fetch_too_large(fetcher, stub_url, run_async, path):
+    with pytest.raises(FetchError):
+        run_async(fetcher.fetch(stub_url(path)))
+
+
+@pytest.mark.negative
+def test_fetch_error_status(fetcher, stub_url, run_async):
+    with pytest.raises(httpx.HTTPStatusError):
+        run_async(fetcher.fetch(stub_url('/missing')))
+
+
+def test_summarize_url_revalidates_page(
+        test_app_with_db, fetcher, stub_url, monkeypatch, run_async,
+):
+    url = stub_url('/article')
+    engine = SummarizationEngine(fetch_threads=1, nlp_processes=0)
+    monkeypatch.setattr(summarizer, 'get_engine', lambda: engine)
+    monkeypatch.setattr(summarizer, 'summarize_parsed', lambda *args: 'fresh summary')
+    run_async(Page.filter(url_hash=pages.page_key(url)).delete())
+    run_async(ArticleContent.all().delete())
+
+    first_summary = run_async(summarizer.summarize_url(url))
+    run_async(Page.filter(url_hash=pages.page_key(url)).update(summary='stored summary'))
+    second_summary = run_async(summarizer.summarize_url(url))
+    engine.shutdown()
+
+    assert first_summary.summary == 'fresh summary', f'Invalid summary: {first_summary}'
+    assert second_summary.summary == 'stored summary', 'Not modified page is summarized again'
+    assert second_summary.content_hash == first_summary.content_hash, 'Page content is lost'
@@ -0,0 +1,55 @@
+"""Tests for DB connection config and query instrumentation."""
+from app import instrumentation
+from app.config import Settings
+from app.db import get_connection_config
+from app.instrumentation import QUERY_COUNT_HEADER, QUERY_TIME_HEADER
+
+SUMMARIES_ENDPOINT = 'summaries'
+METRICS_ENDPOINT = 'metrics'
+
+
+def test_connection_config_postgres():
+    settings = Settings(
+        database_url='postgres://user:password@db:5432/web',
+        db_pool_min_size=2,
+        db_pool_max_size=10,
+        db_statement_cache_size=0,
+        db_command_timeout=5,
+    )
+
+    credentials = get_connection_config(settings)['credentials']
+
+    assert credentials['minsize'] == 2, 'Invalid pool min size'
+    assert credentials['maxsize'] == 10, 'Invalid pool max size'
+    assert credentials['statement_cache_size'] == 0, 'Invalid statement cache size'
+    assert credentials['command_timeout'] == 5, 'Invalid command timeout'
+
+
+def test_connection_config_sqlite():
+    config = get_connection_config(Settings(database_url='sqlite://sqlite.db'))
+
+    assert 'maxsize' not in config['credentials'], 'Pool settings passed to SQLite'
+
+
+def test_query_stats_headers(test_app_with_db, existing_summary):
+    summary_id, _ = existing_summary
+
+    response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+
+    assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+    assert int(response.headers[QUERY_COUNT_HEADER]) == 1, 'Invalid query count'
+    assert float(response.headers[QUERY_TIME_HEADER]) > 0, 'Query time is not recorded'
+
+
+def test_query_stats_metrics(test_app_with_db, existing_summary, monkeypatch):
+    summary_id, _ = existing_summary
+    prod_settings = Settings(environment='prod', database_url='sqlite://sqlite.db')
+    monkeypatch.setattr(instrumentation, 'get_settings', lambda: prod_settings)
+
+    test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+    response = test_app_with_db.get(METRICS_ENDPOINT)
+
+    assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+    assert QUERY_COUNT_HEADER not in response.headers, 'Query stats exposed in prod'
+    assert 'summarizer_db_queries_per_request_count' in response.text, 'No query count metric'
+    assert 'summarizer_db_time_per_request_seconds_sum' in response.text, 'No query time metric'
@@ -0,0 +1,201 @@
+"""Tests for summary job queue and worker."""
+import json
+
+import pytest
+
+from app import jobs, worker
+from app.api import summaries
+from app.config import get_settings, Settings
+from app.models import JobStatus, SummaryJob
+from app.response_cache import get_response_cache, list_key, make_response
+from app.scheduler import Scheduler
+
+SUMMARIES_ENDPOINT = 'summaries'
+
+
+@pytest.fixture(scope='function')
+def job_queue_settings(test_app_with_db):
+    """Enable the persistent job queue for API calls."""
+    test_app_with_db.app.dependency_overrides[get_settings] = lambda: Settings(
+        database_url=get_settings().database_url, use_job_queue=True,
+    )
+    yield
+    del test_app_with_db.app.dependency_overrides[get_settings]
+
+
+@pytest.fixture(scope='function')
+def empty_queue(test_app_with_db, run_async):
+    """Remove jobs left by other tests."""
+    run_async(SummaryJob.all().delete())
+
+
+@pytest.fixture(scope='function')
+def mocked_worker_summarizer(monkeypatch):
+    """Mock summarization in worker, failing for URLs containing 'fail'."""
+    processed_summary_ids = []
+
+    async def mock_attempt_summary(summary_id, url, can_retry):
+        if 'fail' in url:
+            raise ValueError('Download failed')
+        processed_summary_ids.append(summary_id)
+
+    monkeypatch.setattr(worker, 'attempt_summary', mock_attempt_summary)
+    yield processed_summary_ids
+
+
+def create_summary(test_app, url):
+    response = test_app.post(f'{SUMMARIES_ENDPOINT}/', data=json.dumps({'url': url}))
+    return response.json()['id']
+
+
+def test_create_summary_enqueues_job(test_app_with_db, run_async, empty_queue, job_queue_settings):
+    summary_id = create_summary(test_app_with_db, 'http://example.com')
+
+    queued_jobs = run_async(SummaryJob.filter(summary_id=summary_id).values())
+
+    assert len(queued_jobs) == 1, f'Invalid number of queued jobs: {queued_jobs}'
+    assert queued_jobs[0]['status'] == JobStatus.PENDING, f'Invalid job status: {queued_jobs[0]}'
+
+
+def test_create_summaries_batch_enqueues_jobs(
+        test_app_with_db, run_async, empty_queue, job_queue_settings,
+):
+    response = test_app_with_db.post(
+        f'{SUMMARIES_ENDPOINT}/batch/',
+        data=json.dumps([{'url': f'http://example.com/{index}'} for index in range(3)]),
+    )
+    summary_ids = [summary['id'] for summary in response.json()]
+
+    queued_jobs = run_async(SummaryJob.all().order_by('id').values('summary_id', 'url'))
+
+    assert queued_jobs == [
+        {'summary_id': summary_id, 'url': f'http://example.com/{index}'}
+        for index, summary_id in enumerate(summary_ids)
+    ], f'Invalid queued jobs: {queued_jobs}'
+
+
+def test_create_summary_refreshes_cached_list(
+        test_app_with_db, run_async, empty_queue, job_queue_settings, monkeypatch,
+):
+    enqueue = jobs.enqueue
+
+    async def enqueue_and_list(summary_id, url):
+        await enqueue(summary_id, url)
+        # A list read by another request before the new summary is committed.
+        response_cache = get_response_cache()
+        version = await response_cache.version()
+        await response_cache.set(list_key('', version), make_response(b'[]'), version)
+
+    monkeypatch.setattr(jobs, 'enqueue', enqueue_and_list)
+    summary_id = create_summary(test_app_with_db, 'http://example.com')
+
+    response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/')
+
+    assert summary_id in [summary['id'] for summary in response.json()], (
+        f'New summary is missing in list: {response.json()}'
+    )
+
+
+@pytest.mark.negative
+def test_create_summary_job_queue_full(
+        test_app_with_db, run_async, empty_queue, job_queue_settings, monkeypatch,
+):
+    monkeypatch.setattr(summaries, 'get_scheduler', lambda: Scheduler(concurrency=1, queue_size=1))
+    create_summary(test_app_with_db, 'http://example.com')
+
+    response = test_app_with_db.post(
+        f'{SUMMARIES_ENDPOINT}/', data=json.dumps({'url': 'http://example.com'}),
+    )
+
+    assert response.status_code == 429, f'Invalid response code: {response.status_code}'
+    assert run_async(SummaryJob.all().count()) == 1, 'Rejected summary is enqueued'
+
+
+def test_claim_does_not_return_claimed_jobs(
+        test_app_with_db, run_async, empty_queue, mocked_summarizer,
+):
+    summary_id = create_summary(test_app_with_db, 'http://example.com')
+    run_async(jobs.enqueue(summary_id, 'http://example.com'))
+    run_async(jobs.enqueue(summary_id, 'http://example.com'))
+
+    first_claim = run_async(jobs.claim(limit=1, lease_timeout=60))
+    second_claim = run_async(jobs.claim(limit=5, lease_timeout=60))
+
+    assert len(first_claim) == 1, f'Invalid first claim: {first_claim}'
+    assert len(second_claim) == 1, f'Invalid second claim: {second_claim}'
+    assert first_claim[0]['id'] != second_claim[0]['id'], 'The same job was claimed twice'
+    assert run_async(jobs.claim(limit=5, lease_timeout=60)) == [], 'Claimed jobs are still pending'
+
+
+def test_claim_interactive_jobs_first(
+        test_app_with_db, run_async, empty_queue, mocked_summarizer,
+):
+    summary_id = create_summary(test_app_with_db, 'http://example.com')
+    run_async(jobs.enqueue_many([summary_id] * 3, ['http://example.com/bulk'] * 3))
+    run_async(jobs.enqueue(summary_id, 'http://example.com/interactive'))
+
+    claimed = run_async(jobs.claim(limit=1, lease_timeout=60))
+
+    claimed_urls = [job['url'] for job in claimed]
+    assert claimed_urls == ['http://example.com/interactive'], (
+        f'Interactive job is not claimed before earlier batch jobs: {claimed_urls}'
+    )
+
+
+def test_claim_abandoned_job(test_app_with_db, run_async, empty_queue, mocked_summarizer):
+    summary_id = create_summary(test_app_with_db, 'http://example.com')
+    run_async(jobs.enqueue(summary_id, 'http://example.com'))
+    run_async(jobs.claim(limit=1, lease_timeout=60))
+
+    reclaimed = run_async(jobs.claim(limit=1, lease_timeout=-1))
+
+    assert len(reclaimed) == 1, f'Abandoned job is not claimed again: {reclaimed}'
+    assert reclaimed[0]['attempts'] == 2, f'Invalid attempts count: {reclaimed[0]}'
+
+
+def test_worker_drains_queue(
+        test_app_with_db, run_async, empty_queue, job_queue_settings, mocked_worker_summarizer,
+):
+    summary_ids = [create_summary(test_app_with_db, 'http://example.com') for _ in range(3)]
+    failing_summary_id = create_summary(test_app_with_db, 'http://example.com/fail')
+
+    summary_worker = worker.SummaryWorker(
+        concurrency=2, poll_interval=0.01, lease_timeout=60, max_attempts=3,
+    )
+    run_async(summary_worker.run(until_idle=True))
+
+    assert sorted(mocked_worker_summarizer) == summary_ids, (
+        f'Invalid processed summaries: {mocked_worker_summarizer}',
+    )
+    remaining_jobs = run_async(SummaryJob.all().values('summary_id', 'status', 'error'))
+    failed_job = {
+        'summary_id': failing_summary_id,
+        'status': JobStatus.FAILED,
+        'error': "ValueError('Download failed')",
+    }
+    assert remaining_jobs == [failed_job], f'Invalid remaining jobs: {remaining_jobs}'
+
+
+def test_delete_summary_deletes_jobs(
+        test_app_with_db, run_async, empty_queue, job_queue_settings,
+):
+    summary_ids = [create_summary(test_app_with_db, 'http://example.com') for _ in range(3)]
+
+    test_app_with_db.delete(f'{SUMMARIES_ENDPOINT}/{summary_ids[0]}/')
+    test_app_with_db.post(
+        f'{SUMMARIES_ENDPOINT}/batch/delete/', data=json.dumps({'ids': [summary_ids[1]]}),
+    )
+
+    queued_jobs = run_async(SummaryJob.all().values_list('summary_id', flat=True))
+    assert queued_jobs == summary_ids[2:], f'Jobs of deleted summaries are kept: {queued_jobs}'
+
+
+def test_delete_orphaned_jobs(test_app_with_db, run_async, empty_queue, job_queue_settings):
+    summary_id = create_summary(test_app_with_db, 'http://example.com')
+    run_async(jobs.enqueue(999999, 'http://example.com/archived'))
+
+    deleted = run_async(jobs.delete_orphaned())
+
+    queued_jobs = run_async(SummaryJob.all().values_list('summary_id', flat=True))
+    assert deleted == 1, f'Invalid number of deleted jobs: {deleted}'
+    assert queued_jobs == [summary_id], f'Invalid remaining jobs: {queued_jobs}'
@@ -0,0 +1,82 @@
+"""Tests for summarization pipeline metrics."""
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from app import summarizer
+from app.contents import ArticleSummary
+from app.engine import SummarizationEngine
+from app.metrics import render_metrics
+from app.nlp import ParsedArticle
+
+SUMMARIES_ENDPOINT = 'summaries'
+METRICS_ENDPOINT = 'metrics'
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture(scope='function')
+def thread_engine(monkeypatch):
+    """Summarization engine that runs everything in threads of the test process."""
+    engine = SummarizationEngine(fetch_threads=1, nlp_processes=0)
+    monkeypatch.setattr(summarizer, 'get_engine', lambda: engine)
+    yield engine
+    engine.shutdown()
+
+
+def test_route_latency(test_app_with_db, existing_summary):
+    summary_id, _ = existing_summary
+    labels = {'method': 'GET', 'route': '/summaries/{summary_id}/'}
+    found_before = sample('summarizer_request_duration_seconds_count', status='200', **labels)
+    missing_before = sample('summarizer_request_duration_seconds_count', status='404', **labels)
+
+    test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+    test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/999999/')
+
+    found = sample('summarizer_request_duration_seconds_count', status='200', **labels)
+    missing = sample('summarizer_request_duration_seconds_count', status='404', **labels)
+    assert found == found_before + 1, 'Successful request is not recorded'
+    assert missing == missing_before + 1, 'Failed request is not recorded'
+
+
+def test_stage_durations(
+        test_app_with_db, thread_engine, fetcher, stub_url, monkeypatch, run_async,
+):
+    monkeypatch.setattr(summarizer, 'parse_article', lambda *args: ParsedArticle('', ''))
+    monkeypatch.setattr(summarizer, 'summarize_parsed', lambda *args: 'summary')
+    stages = ('fetch', 'parse', 'nlp')
+    counts_before = [
+        sample('summarizer_stage_duration_seconds_count', stage=stage) for stage in stages
+    ]
+
+    summary = run_async(summarizer.summarize_url(stub_url('/slow')))
+
+    counts = [sample('summarizer_stage_duration_seconds_count', stage=stage) for stage in stages]
+    assert summary == ArticleSummary('summary'), f'Invalid summary: {summary}'
+    assert counts == [count + 1 for count in counts_before], 'Stage durations are not recorded'
+
+
+def test_stage_errors(test_app_with_db, fetcher, stub_url, run_async):
+    errors_before = sample('summarizer_stage_errors_total', stage='fetch')
+
+    with pytest.raises(httpx.HTTPStatusError):
+        run_async(summarizer.summarize_url(stub_url('/missing')))
+
+    errors = sample('summarizer_stage_errors_total', stage='fetch')
+    assert errors == errors_before + 1, 'Stage error is not counted'
+
+
+def test_metrics_endpoint(test_app):
+    response = test_app.get(METRICS_ENDPOINT)
+
+    assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+    assert 'summarizer_stage_duration_seconds' in response.text, 'No stage metrics'
+    assert 'summarizer_queued_jobs' not in response.text, 'Queue depth reported without a queue'
+
+
+def test_render_queue_depth():
+    metrics = render_metrics(queued_jobs=3).decode()
+
+    assert 'summarizer_queued_jobs 3.0' in metrics, 'Invalid queue depth'
@@ -0,0 +1,111 @@
+"""Tests for lazy loading of parsing and summarization libraries."""
+import subprocess  # noqa: S404
+import sys
+
+import nltk.data
+import pytest
+
+from app import nlp
+from app.config import SummarizerBackendName
+from app.nlp import NewspaperBackend
+
+
+def test_app_import_skips_nlp_libraries():
+    script = (
+        'import sys, app.main; '
+        'print(",".join(name for name in ("newspaper", "nltk", "numpy") if name in sys.modules))'
+    )
+
+    completed = subprocess.run(  # noqa: S603
+        [sys.executable, '-c', script], capture_output=True, check=True, text=True,
+    )
+
+    assert completed.stdout.strip() == '', f'Heavy modules are imported: {completed.stdout}'
+
+
+@pytest.mark.negative
+def test_missing_tokenizer_fails_fast(monkeypatch):
+    def missing_resource(resource_url, *args, **kwargs):
+        raise LookupError(resource_url)
+    downloads = []
+    monkeypatch.setattr(nltk.data, 'load', missing_resource)
+    monkeypatch.setattr(nltk, 'download', downloads.append)
+
+    with pytest.raises(RuntimeError):
+        NewspaperBackend(max_sentences=5)
+    assert not downloads, 'Tokenizer is downloaded at runtime'
+
+
+def test_warm_up_loads_backend(monkeypatch):
+    nlp.get_backend.cache_clear()
+
+    nlp.warm_up(SummarizerBackendName.NUMPY)
+
+    assert nlp.get_backend.cache_info().currsize == 1, 'Backend is not loaded'
+
+
+@pytest.mark.parametrize(
+    'text,max_chars,truncated',
+    [
+        ('Cats sleep all day.', None, 'Cats sleep all day.'),
+        ('Cats sleep all day.', 100, 'Cats sleep all day.'),
+        ('Cats sleep all day.', 12, 'Cats sleep'),
+        ('Cats sleep all day.', 10, 'Cats sleep'),
+        ('Catsleepallday.', 5, 'Catsl'),
+    ],
+    ids=['no limit', 'short text', 'whitespace cut', 'cut at limit', 'no whitespace'],
+)
+def test_truncate_text(text, max_chars, truncated):
+    assert nlp.truncate_text(text, max_chars) == truncated, f'Invalid truncation of {text!r}'
+
+
+def test_split_chunks():
+    text = 'First paragraph.\n\nSecond one.\n\nThird paragraph is long enough to be cut.'
+
+    chunks = nlp.split_chunks(text, 30)
+
+    assert chunks == [
+        'First paragraph.\n\nSecond one.',
+        'Third paragraph is long enough',
+        'to be cut.',
+    ], f'Invalid chunks: {chunks}'
+    assert all(len(chunk) <= 30 for chunk in chunks), 'Chunk is longer than the limit'
+
+
+@pytest.mark.parametrize(
+    'max_sentences,max_chars,limited',
+    [
+        (None, None, 'One.\nTwo.\nThree.'),
+        (2, None, 'One.\nTwo.'),
+        (None, 10, 'One.\nTwo.'),
+        (3, 3, 'One'),
+    ],
+    ids=['no budget', 'sentences', 'characters', 'first sentence cut'],
+)
+def test_limit_summary(max_sentences, max_chars, limited):
+    summary = nlp.limit_summary('One.\nTwo.\nThree.', max_sentences, max_chars)
+
+    assert summary == limited, f'Invalid summary: {summary!r}'
+
+
+def test_summarize_long_article_by_chunks(monkeypatch):
+    sentences = [f'Cats number {index} sleep on warm furry blankets.' for index in range(200)]
+    text = '\n\n'.join(' '.join(sentences[start:start + 5]) for start in range(0, 200, 5))
+    batches = []
+    backend = nlp.get_backend(SummarizerBackendName.NUMPY)
+    summarize_batch = backend.summarize_batch
+
+    def record_batch(articles):
+        batches.append([len(article.text) for article in articles])
+        return summarize_batch(articles)
+
+    monkeypatch.setattr(backend, 'summarize_batch', record_batch)
+    summary = nlp.summarize_parsed(
+        nlp.ParsedArticle('Cats', text), SummarizerBackendName.NUMPY, chunk_size=2000,
+    )
+
+    assert len(batches[0]) > 1, f'Long article is not split: {batches}'
+    assert all(size <= 2000 for size in batches[0]), f'Chunk is too long: {batches[0]}'
+    assert len(batches) == 2, f'Chunk summaries are not merged: {batches}'
+    assert 0 < len(summary.split('\n')) <= nlp.SUMMARY_SENTENCES, f'Invalid summary: {summary}'
+    assert set(summary.split('\n')) <= set(sentences), f'Invalid summary: {summary}'
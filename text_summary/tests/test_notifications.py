@@ -0,0 +1,170 @@
+"""Tests for waiting for generated summaries."""
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from app import notifications
+from app.config import get_settings, Settings
+from app.db import get_connection_config
+from app.models import SummaryStatus, TextSummary
+from app.notifications import NotificationHub, notify_summary_ready
+from app.response_cache import get_response_cache, make_response, summary_key
+
+SUMMARIES_ENDPOINT = 'summaries'
+
+
+@pytest.fixture(scope='function')
+def finish_summary_later():
+    """Generate a summary in the event loop shared with test clients after a delay."""
+    def schedule(summary_id, delay=0.1):
+        async def finish():
+            await TextSummary.filter(id=summary_id).update(
+                summary='generated summary', status=SummaryStatus.DONE,
+            )
+            await notify_summary_ready(summary_id)
+
+        asyncio.get_event_loop().call_later(delay, asyncio.ensure_future, finish())
+
+    return schedule
+
+
+@pytest.fixture(scope='function')
+def events_settings(test_app_with_db, monkeypatch):
+    """Settings with short summary event stream timeouts."""
+    settings = Settings(
+        testing=1,
+        database_url=os.getenv('DATABASE_TEST_URL'),
+        summary_events_timeout=1,
+        summary_events_keep_alive=0.05,
+    )
+    monkeypatch.setitem(test_app_with_db.app.dependency_overrides, get_settings, lambda: settings)
+    return settings
+
+
+def test_hub_wakes_subscribers(run_async):
+    hub = NotificationHub()
+
+    async def wait_for_publish():
+        with hub.subscribe(1) as ready, hub.subscribe(2) as other:
+            hub.publish(1)
+            await asyncio.wait_for(ready.wait(), 1)
+            return other.is_set()
+
+    other_set = run_async(wait_for_publish())
+
+    assert not other_set, 'Subscriber of another summary is woken up'
+    assert not hub._waiters, 'Subscribers are not forgotten'
+
+
+def test_read_summary_wait(test_app_with_db, existing_summary, finish_summary_later):
+    summary_id, _ = existing_summary
+    finish_summary_later(summary_id)
+
+    started_at = time.monotonic()
+    response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/?wait=5')
+
+    assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+    assert response.json()['summary'] == 'generated summary', f'Invalid summary: {response.json()}'
+    assert time.monotonic() - started_at < 5, 'Request is not woken up by the notification'
+
+
+def test_read_summary_wait_timeout(test_app_with_db, existing_summary):
+    summary_id, _ = existing_summary
+
+    started_at = time.monotonic()
+    response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/?wait=0.2')
+
+    assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+    assert response.json()['summary'] == '', f'Invalid summary: {response.json()}'
+    assert time.monotonic() - started_at >= 0.2, 'Request does not wait'
+
+
+@pytest.mark.negative
+def test_read_summary_wait_negative(test_app_with_db, existing_summary):
+    summary_id, _ = existing_summary
+
+    response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/?wait=-1')
+
+    assert response.status_code == 422, f'Invalid response code: {response.status_code}'
+
+
+def test_summary_events(test_app_with_db, existing_summary, finish_summary_later, events_settings):
+    summary_id, summary_url = existing_summary
+    finish_summary_later(summary_id, delay=0.2)
+
+    response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/events/')
+
+    messages = response.text.split('\n\n')
+    event, data = messages[-2].split('\n')
+    summary = json.loads(data[len('data: '):])
+    assert response.headers['content-type'].startswith('text/event-stream'), 'Invalid media type'
+    assert ': keep-alive' in messages, 'No keep-alive comments while waiting'
+    assert event == 'event: summary', f'Invalid event: {event}'
+    assert summary['summary'] == 'generated summary', f'Invalid summary: {summary}'
+    assert summary['url'] == summary_url, f'Invalid summary URL: {summary}'
+
+
+@pytest.mark.negative
+def test_summary_events_not_found(test_app_with_db):
+    response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/999999/events/')
+
+    assert response.status_code == 404, f'Invalid response code: {response.status_code}'
+
+
+def test_notifications_across_processes(test_app_with_db, existing_summary, run_async):
+    connection_config = get_connection_config(
+        Settings(database_url=os.getenv('DATABASE_TEST_URL')),
+    )
+    if TextSummary._meta.db.capabilities.dialect != 'postgres':
+        pytest.skip('Notifications between processes need Postgres')
+    summary_id, _ = existing_summary
+    # A separate hub stands for another web process.
+    hub = NotificationHub()
+
+    async def notify_other_process():
+        await hub.start(connection_config)
+        try:
+            with hub.subscribe(summary_id) as ready:
+                await notify_summary_ready(summary_id)
+                await asyncio.wait_for(ready.wait(), 5)
+        finally:
+            await hub.stop()
+
+    run_async(notify_other_process())
+
+
+def test_notifications_after_reconnect(test_app_with_db, existing_summary, run_async, monkeypatch):
+    connection_config = get_connection_config(
+        Settings(database_url=os.getenv('DATABASE_TEST_URL')),
+    )
+    if TextSummary._meta.db.capabilities.dialect != 'postgres':
+        pytest.skip('Notifications between processes need Postgres')
+    monkeypatch.setattr(notifications, 'RECONNECT_DELAY', 0.01)
+    summary_id, _ = existing_summary
+    hub = NotificationHub()
+    response_cache = get_response_cache()
+
+    async def notify_after_reconnect():
+        await hub.start(connection_config)
+        try:
+            listener = hub._listener
+            await TextSummary._meta.db.execute_query(
+                'SELECT pg_terminate_backend($1)', [listener.get_server_pid()],
+            )
+            version = await response_cache.version()
+            await response_cache.set(summary_key(summary_id), make_response(b'{}'), version)
+            while hub._listener in (None, listener):
+                await asyncio.sleep(0.01)
+            with hub.subscribe(summary_id) as ready:
+                await notify_summary_ready(summary_id)
+                await asyncio.wait_for(ready.wait(), 5)
+            return await response_cache.get(summary_key(summary_id))
+        finally:
+            await hub.stop()
+
+    cached = run_async(asyncio.wait_for(notify_after_reconnect(), 10))
+
+    assert cached is None, 'Responses cached before the reconnect are kept'
@@ -0,0 +1,182 @@
+"""Tests for summary partitions and their archival."""
+import csv
+import gzip
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app import partitions
+from app.models import TextSummary
+from app.partitions import (
+    add_months, archive_partitions, create_partitions, CreationRange, CreationRanges, month_start,
+    NO_CREATION_RANGE, partition_month, partition_name,
+)
+
+SUMMARIES_ENDPOINT = 'summaries'
+TABLE = 'partitiontest'
+
+
+@pytest.fixture(scope='function')
+def partitioned_table(test_app_with_db, run_async):
+    """Create a table partitioned like summaries, drop it with its partitions afterwards."""
+    db = TextSummary._meta.db
+    if db.capabilities.dialect != 'postgres':
+        pytest.skip('Partitions need Postgres')
+    run_async(db.execute_script(
+        f'CREATE TABLE "{TABLE}" ("id" INT NOT NULL, "created_at" TIMESTAMPTZ NOT NULL) '
+        'PARTITION BY RANGE ("created_at")',
+    ))
+    yield db
+    run_async(db.execute_script(f'DROP TABLE "{TABLE}"'))
+
+
+@pytest.fixture(scope='function')
+def wrong_creation_range(monkeypatch):
+    """Bound summaries looked up by id to months none of them is created in."""
+    async def mock_creation_range(summary_ids):
+        return CreationRange(month(2000, 1), month(2000, 3))
+
+    monkeypatch.setattr(partitions, 'creation_range', mock_creation_range)
+
+
+def month(year, month_number):
+    return datetime(year, month_number, 1, tzinfo=timezone.utc)
+
+
+def test_month_arithmetic():
+    moment = datetime.fromisoformat('2026-10-01T01:30:00+03:00')
+
+    assert month_start(moment) == month(2026, 9), 'Month is not taken in UTC'
+    assert add_months(month(2026, 11), 2) == month(2027, 1), 'Invalid month after a year end'
+    assert add_months(month(2026, 1), -13) == month(2024, 12), 'Invalid month before'
+
+
+def test_partition_name_has_month():
+    partition = partition_name('textsummary', month(2026, 3))
+
+    assert partition == 'textsummary_2026_03', f'Invalid partition name: {partition}'
+    assert partition_month(partition) == month(2026, 3), 'Month is not parsed from name'
+    assert partition_month('textsummary_default') is None, 'Default partition has a month'
+
+
+def test_create_partitions(partitioned_table, run_async):
+    created = run_async(create_partitions(TABLE, month(2026, 11), 3))
+    created_again = run_async(create_partitions(TABLE, month(2026, 12), 3))
+    run_async(partitioned_table.execute_script(
+        f"INSERT INTO \"{TABLE}\" VALUES (1, '2027-01-31T23:59:59+00:00')",
+    ))
+
+    assert created == [
+        f'{TABLE}_2026_11', f'{TABLE}_2026_12', f'{TABLE}_2027_01',
+    ], f'Invalid created partitions: {created}'
+    assert created_again == [f'{TABLE}_2027_02'], 'Existing partitions are created again'
+
+
+def test_archive_partitions(partitioned_table, run_async, tmp_path):
+    run_async(create_partitions(TABLE, month(2026, 8), 3))
+    run_async(partitioned_table.execute_script(
+        f"INSERT INTO \"{TABLE}\" VALUES (1, '2026-08-15T00:00:00+00:00'), "
+        "(2, '2026-09-30T23:00:00+00:00'), (3, '2026-10-01T00:00:00+00:00')",
+    ))
+    # A partition detached by an interrupted run is archived too.
+    run_async(partitioned_table.execute_script(
+        f'ALTER TABLE "{TABLE}" DETACH PARTITION "{TABLE}_2026_08"',
+    ))
+
+    archived = run_async(archive_partitions(TABLE, month(2026, 10), tmp_path))
+
+    archive_names = [path.name for path in archived]
+    assert archive_names == [
+        f'{TABLE}_2026_08.csv.gz', f'{TABLE}_2026_09.csv.gz',
+    ], f'Invalid archives: {archive_names}'
+    with gzip.open(archived[1], 'rt') as archive:
+        rows = list(csv.DictReader(archive))
+    assert [row['id'] for row in rows] == ['2'], f'Invalid archived rows: {rows}'
+    remaining = run_async(partitioned_table.execute_query_dict(
+        f'SELECT "id" FROM "{TABLE}"',  # noqa: S608
+    ))
+    assert remaining == [{'id': 3}], f'Invalid remaining rows: {remaining}'
+    left_partitions = run_async(create_partitions(TABLE, month(2026, 8), 2))
+    assert len(left_partitions) == 2, 'Archived partitions are not dropped'
+
+
+def test_creation_ranges(partitioned_table, run_async):
+    run_async(create_partitions(TABLE, month(2026, 1), 5))
+    # Ids of months overlap when a summary is stored a bit after it's created.
+    run_async(partitioned_table.execute_script(
+        f"INSERT INTO \"{TABLE}\" VALUES (1, '2026-01-10T00:00:00+00:00'), "
+        "(2, '2026-01-20T00:00:00+00:00'), (5, '2026-01-31T23:59:59+00:00'), "
+        "(4, '2026-02-01T00:00:00+00:00'), (6, '2026-02-10T00:00:00+00:00'), "
+        "(10, '2026-04-10T00:00:00+00:00'), (11, '2026-05-01T00:00:00+00:00')",
+    ))
+    ranges = CreationRanges(TABLE)
+    now = datetime(2026, 5, 10, tzinfo=timezone.utc)
+
+    def creation_range(*row_ids):
+        return run_async(ranges.creation_range(row_ids, now))
+
+    january = (month(2026, 1), month(2026, 3))
+    february = (month(2026, 2), month(2026, 4))
+    recent = (month(2026, 4), NO_CREATION_RANGE.until)
+    assert creation_range(2) == january, 'Invalid range in a past month'
+    assert creation_range(4) == january, 'Range skips a month with overlapping ids'
+    assert creation_range(6) == february, 'Invalid range in a later past month'
+    assert creation_range(10) == recent, 'Recent ids are not bounded by the previous month'
+    assert creation_range(2, 11) == (january[0], recent[1]), 'Invalid range of many ids'
+    assert creation_range() == NO_CREATION_RANGE, 'No ids are bounded'
+
+
+def test_creation_ranges_without_partitions(test_app_with_db, run_async):
+    ranges = CreationRanges(TextSummary._meta.db_table)
+
+    created = run_async(ranges.creation_range([1], datetime.now(timezone.utc)))
+
+    assert created == NO_CREATION_RANGE, f'Unpartitioned table is bounded: {created}'
+
+
+def test_creation_ranges_from_last_ids(run_async, monkeypatch):
+    loaded_months = []
+
+    async def mock_load_last_ids(self, current_month):
+        loaded_months.append(current_month)
+        return [(month(2026, 1), 5), (month(2026, 2), 8)]
+
+    monkeypatch.setattr(CreationRanges, '_load_last_ids', mock_load_last_ids)
+    ranges = CreationRanges(TABLE)
+
+    def creation_range(now, *row_ids):
+        return run_async(ranges.creation_range(row_ids, now))
+
+    may = datetime(2026, 5, 10, tzinfo=timezone.utc)
+    assert creation_range(may, 5) == (month(2026, 1), month(2026, 3)), 'Invalid range of last id'
+    assert creation_range(may, 6) == (month(2026, 2), month(2026, 4)), 'Invalid range of next id'
+    many_ids = (month(2026, 1), NO_CREATION_RANGE.until)
+    assert creation_range(may, 3, 9) == many_ids, 'Invalid range of many ids'
+    assert loaded_months == [month(2026, 5)], 'Last ids are loaded more than once a month'
+    creation_range(datetime(2026, 6, 1, tzinfo=timezone.utc), 1)
+    assert loaded_months[-1] == month(2026, 6), 'Last ids are not loaded in a new month'
+
+
+def test_summaries_outside_creation_range(
+        test_app_with_db, run_async, existing_summary, wrong_creation_range,
+):
+    summary_id, summary_url = existing_summary
+
+    read_response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+    batch_response = test_app_with_db.get(
+        f'{SUMMARIES_ENDPOINT}/batch/', params={'ids': [summary_id, 99999999]},
+    )
+    update_response = test_app_with_db.put(
+        f'{SUMMARIES_ENDPOINT}/{summary_id}/',
+        data=json.dumps({'url': summary_url, 'summary': 'new'}),
+    )
+    updated = run_async(partitions.update_by_ids([summary_id, 99999999], summary='newer'))
+    delete_response = test_app_with_db.delete(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+
+    assert read_response.status_code == 200, f'Summary is not read: {read_response.json()}'
+    read_ids = [summary and summary['id'] for summary in batch_response.json()]
+    assert read_ids == [summary_id, None], f'Invalid summaries read in batch: {read_ids}'
+    assert update_response.json()['summary'] == 'new', f'Not updated: {update_response.json()}'
+    assert updated == 1, f'Invalid number of updated summaries: {updated}'
+    assert delete_response.json()['summary'] == 'newer', f'Not deleted: {delete_response.json()}'
@@ -0,0 +1,135 @@
+"""Tests for profiling of slow requests and summary generation."""
+import os
+import pstats
+import time
+
+import pytest
+from starlette.testclient import TestClient
+
+from app import main, profiling
+from app.api import profiles
+from app.config import get_settings, Settings
+from app.profiling import (
+    PROFILE_TOKEN_HEADER, profile_requests, Profiler, sign_profile_token, verify_profile_token,
+)
+
+PROFILES_ENDPOINT = 'admin/profiles'
+SUMMARIES_ENDPOINT = 'summaries'
+SECRET = 'profiling secret'  # noqa: S105
+
+
+def get_profiling_settings():
+    """Override app settings to enable profiling with a secret."""
+    return Settings(testing=1, database_url=os.getenv('DATABASE_TEST_URL'), profile_secret=SECRET)
+
+
+@pytest.fixture(scope='function')
+def profiler(monkeypatch):
+    """Profiler keeping only requested profiles, enabled by a profiling secret."""
+    request_profiler = Profiler(sample_rate=0, threshold=60, history=2, sampling_interval=0.001)
+    monkeypatch.setattr(profiling, 'get_settings', get_profiling_settings)
+    monkeypatch.setattr(profiling, 'get_profiler', lambda: request_profiler)
+    monkeypatch.setattr(profiles, 'get_profiler', lambda: request_profiler)
+    return request_profiler
+
+
+@pytest.fixture(scope='function')
+def profiled_app(test_app_with_db, profiler, monkeypatch):
+    """Client for an app with profiling enabled, using the DB set up for `test_app_with_db`."""
+    monkeypatch.setattr(main, 'get_settings', get_profiling_settings)
+    app = main.create_application()
+    app.dependency_overrides[get_settings] = get_profiling_settings
+    return TestClient(app)
+
+
+def token(expires_in=60):
+    return {PROFILE_TOKEN_HEADER: sign_profile_token(SECRET, int(time.time() + expires_in))}
+
+
+def busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        continue
+
+
+def test_verify_profile_token():
+    valid = sign_profile_token(SECRET, int(time.time() + 60))
+    expired = sign_profile_token(SECRET, int(time.time() - 1))
+    forged = sign_profile_token('other secret', int(time.time() + 60))
+
+    assert verify_profile_token(SECRET, valid), 'Valid token is rejected'
+    assert not verify_profile_token(SECRET, expired), 'Expired token is accepted'
+    assert not verify_profile_token(SECRET, forged), 'Token with another secret is accepted'
+    assert not verify_profile_token(SECRET, 'garbage'), 'Malformed token is accepted'
+    assert not verify_profile_token(None, valid), 'Token is accepted without a secret'
+
+
+def test_profiler_keeps_slow_runs():
+    request_profiler = Profiler(
+        sample_rate=0.5, threshold=0.02, history=2, sampling_interval=0.001,
+        sample=iter([0.1, 0.9, 0.1, 0.1, 0.1]).__next__,
+    )
+
+    for name in ('slow', 'not sampled', 'fast', 'slow again', 'slowest'):
+        with request_profiler.profile(name):
+            busy_wait(0.03 if name.startswith('slow') else 0)
+
+    kept = [profile.name for profile in request_profiler.profiles()]
+    assert kept == ['slowest', 'slow again'], f'Invalid kept profiles: {kept}'
+    assert 'busy_wait' in request_profiler.profiles()[0].folded_stacks(), 'Stacks are not sampled'
+
+
+def test_profiler_profiles_one_run_at_a_time():
+    request_profiler = Profiler(sample_rate=1, threshold=0, history=10)
+
+    with request_profiler.profile('outer'), request_profiler.profile('inner'):
+        busy_wait(0.001)
+
+    kept = [profile.name for profile in request_profiler.profiles()]
+    assert kept == ['outer'], f'Invalid kept profiles: {kept}'
+
+
+def test_download_requested_profile(profiled_app, tmp_path):
+    profiled_app.get(f'{SUMMARIES_ENDPOINT}/', headers=token())
+    profiled_app.get(f'{SUMMARIES_ENDPOINT}/')
+
+    listed = profiled_app.get(f'{PROFILES_ENDPOINT}/', headers=token()).json()
+    names = [profile['name'] for profile in listed]
+    assert names == [f'GET /{SUMMARIES_ENDPOINT}/'], f'Invalid profiles: {names}'
+    assert listed[0]['requested'], 'Profile is not marked as requested'
+
+    profile_id = listed[0]['id']
+    response = profiled_app.get(f'{PROFILES_ENDPOINT}/{profile_id}/pstats/', headers=token())
+    assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+    stats_path = tmp_path / 'profile.pstats'
+    stats_path.write_bytes(response.content)
+    assert pstats.Stats(str(stats_path)).total_calls > 0, 'Profile has no calls'
+
+    response = profiled_app.get(f'{PROFILES_ENDPOINT}/{profile_id}/folded/', headers=token())
+    assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+    assert response.headers['content-type'].startswith('text/plain'), 'Invalid content type'
+
+
+@pytest.mark.negative
+def test_profiles_need_token(profiled_app):
+    without_token = profiled_app.get(f'{PROFILES_ENDPOINT}/')
+    expired_token = profiled_app.get(f'{PROFILES_ENDPOINT}/', headers=token(-60))
+    missing = profiled_app.get(f'{PROFILES_ENDPOINT}/999/pstats/', headers=token())
+
+    assert without_token.status_code == 403, 'Profiles are listed without a token'
+    assert expired_token.status_code == 403, 'Profiles are listed with an expired token'
+    assert missing.status_code == 404, f'Invalid response code: {missing.status_code}'
+
+
+@pytest.mark.negative
+def test_profiles_disabled_without_secret(test_app_with_db):
+    response = test_app_with_db.get(f'{PROFILES_ENDPOINT}/', headers=token())
+
+    assert response.status_code == 404, f'Invalid response code: {response.status_code}'
+
+
+def test_profiling_disabled_by_default():
+    app = main.create_application()
+    dispatches = [middleware.options.get('dispatch') for middleware in app.user_middleware]
+
+    assert profile_requests not in dispatches, 'Requests are profiled with profiling disabled'
@@ -0,0 +1,136 @@
+"""Tests for refreshing stale summaries."""
+from datetime import timedelta
+
+import pytest
+from tortoise import timezone
+
+from app import pages, summarizer
+from app.engine import SummarizationEngine
+from app.models import ArticleContent, Page, SummaryStatus, TextSummary
+from app.refresher import SummaryRefresher
+
+SUMMARIES_ENDPOINT = 'summaries'
+
+
+@pytest.fixture(scope='function')
+def summarized_texts(monkeypatch, fetcher, run_async):
+    """Summarization in the test process that records summarized texts."""
+    engine = SummarizationEngine(fetch_threads=1, nlp_processes=0)
+    texts = []
+
+    def summarize_parsed(article, backend, chunk_size):
+        texts.append(article.text)
+        return f'First summary sentence {len(texts)}.\nSecond summary sentence {len(texts)}.'
+
+    monkeypatch.setattr(summarizer, 'get_engine', lambda: engine)
+    monkeypatch.setattr(summarizer, 'summarize_parsed', summarize_parsed)
+    run_async(ArticleContent.all().delete())
+    yield texts
+    engine.shutdown()
+
+
+@pytest.fixture(scope='function')
+def stale_summary(test_app_with_db, mocked_summarizer, stub_url, run_async):
+    """Prepare a summary of the stub article fetched two days ago, create more with `budget`."""
+    url = stub_url('/article')
+    run_async(Page.filter(url_hash=pages.page_key(url)).delete())
+
+    def create(path='/article', **budget):
+        response = test_app_with_db.post(
+            f'{SUMMARIES_ENDPOINT}/', json={'url': stub_url(path), **budget},
+        )
+        summary_id = response.json()['id']
+        run_async(TextSummary.filter(id=summary_id).update(
+            summary='old summary',
+            status=SummaryStatus.DONE,
+            fetched_at=timezone.now() - timedelta(days=2),
+        ))
+        return summary_id
+    return create
+
+
+def refresh(run_async, batch_size=100):
+    refresher = SummaryRefresher(
+        stale_after=24 * 60 * 60, batch_size=batch_size, concurrency=2, interval=0,
+    )
+    return run_async(refresher.refresh_stale())
+
+
+def read(run_async, summary_id):
+    summaries = run_async(TextSummary.filter(id=summary_id).values(
+        'summary', 'content_id', 'fetched_at',
+    ))
+    return summaries[0]
+
+
+def test_refresh_changed_page(stale_summary, summarized_texts, run_async):
+    summary_id = stale_summary()
+    budget_summary_id = stale_summary(max_sentences=1)
+
+    refreshed = refresh(run_async)
+
+    summary = read(run_async, summary_id)
+    assert refreshed >= 1, f'Invalid number of refreshed pages: {refreshed}'
+    assert len(summarized_texts) == 1, 'Page is summarized once per summary'
+    assert summary['summary'] == (
+        'First summary sentence 1.\nSecond summary sentence 1.'
+    ), f'Summary is not refreshed: {summary}'
+    assert summary['content_id'] is not None, 'Content hash is not stored'
+    assert summary['fetched_at'] > timezone.now() - timedelta(minutes=1), 'Fetch is not tracked'
+    budget_summary = read(run_async, budget_summary_id)
+    assert budget_summary['summary'] == 'First summary sentence 1.', 'Budget is not applied'
+
+
+def test_refresh_not_modified_page(stale_summary, summarized_texts, run_async):
+    summary_id = stale_summary()
+    refresh(run_async)
+    run_async(TextSummary.filter(id=summary_id).update(
+        fetched_at=timezone.now() - timedelta(days=2),
+    ))
+
+    refresh(run_async)
+
+    summary = read(run_async, summary_id)
+    assert len(summarized_texts) == 1, 'Not modified page is summarized again'
+    assert summary['summary'].endswith('sentence 1.'), f'Invalid summary: {summary}'
+    assert summary['fetched_at'] > timezone.now() - timedelta(minutes=1), 'Fetch is not tracked'
+
+
+def test_refresh_same_text_skips_summarization(
+        stale_summary, summarized_texts, stub_url, run_async,
+):
+    summary_id = stale_summary()
+    refresh(run_async)
+    # Without validators the page is downloaded and parsed again, but its text is the same.
+    run_async(Page.filter(url_hash=pages.page_key(stub_url('/article'))).delete())
+    run_async(TextSummary.filter(id=summary_id).update(
+        summary='old summary', fetched_at=timezone.now() - timedelta(days=2),
+    ))
+
+    refresh(run_async)
+
+    summary = read(run_async, summary_id)
+    assert len(summarized_texts) == 1, 'Same article text is summarized again'
+    assert summary['summary'] == 'old summary', 'Summary of the same text is rewritten'
+
+
+def test_refresh_skips_fresh_summaries(stale_summary, summarized_texts, run_async):
+    summary_id = stale_summary()
+    run_async(TextSummary.filter(id=summary_id).update(fetched_at=timezone.now()))
+
+    refresh(run_async)
+
+    assert read(run_async, summary_id)['summary'] == 'old summary', 'Fresh summary is refreshed'
+
+
+@pytest.mark.negative
+def test_refresh_failed_page(stale_summary, summarized_texts, run_async):
+    summary_id = stale_summary('/missing')
+
+    refresh(run_async)
+
+    summary = read(run_async, summary_id)
+    assert summary['summary'] == 'old summary', 'Summary of a failed page is changed'
+    assert summary['fetched_at'] > timezone.now() - timedelta(minutes=1), (
+        'Failed page is not postponed until the next staleness window'
+    )
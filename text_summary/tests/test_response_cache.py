@@ -0,0 +1,234 @@
+"""Tests for cached API responses and their invalidation."""
+import asyncio
+import os
+
+import pytest
+
+from app import notifications, summarizer
+from app.cache import SummaryCache
+from app.config import Settings
+from app.contents import ArticleSummary
+from app.db import get_connection_config
+from app.models import SummaryStatus, TextSummary
+from app.notifications import NOTIFY_SQL, NotificationHub, SUMMARIES_CHANGED_CHANNEL
+from app.response_cache import (
+    etag_matches, make_response, MemoryBackend, RedisBackend, ResponseCache, summary_key,
+)
+
+SUMMARIES_ENDPOINT = 'summaries'
+
+
+class FakeRedis:
+    """Stands in for a Redis client, keeping values in a dict."""
+
+    def __init__(self):
+        self.values = {}
+        self.expirations = {}
+
+    async def get(self, key):
+        """Get a value."""
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        """Store a value and its expiration time."""
+        self.values[key] = value
+        self.expirations[key] = ex
+
+    async def delete(self, *keys):
+        """Remove values."""
+        for key in keys:
+            self.values.pop(key, None)
+
+    async def incr(self, key):
+        """Increment a counter."""
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+
+@pytest.fixture(scope='function')
+def done_summary(existing_summary, run_async):
+    """Prepare a generated summary."""
+    summary_id, summary_url = existing_summary
+    run_async(TextSummary.filter(id=summary_id).update(
+        summary='generated summary', status=SummaryStatus.DONE,
+    ))
+    return summary_id, summary_url
+
+
+def test_read_summary_etag(test_app_with_db, done_summary):
+    summary_id, _ = done_summary
+
+    response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+    etag = response.headers['ETag']
+    not_modified = test_app_with_db.get(
+        f'{SUMMARIES_ENDPOINT}/{summary_id}/', headers={'If-None-Match': etag},
+    )
+    modified = test_app_with_db.get(
+        f'{SUMMARIES_ENDPOINT}/{summary_id}/', headers={'If-None-Match': '"outdated"'},
+    )
+
+    assert response.json()['summary'] == 'generated summary', f'Invalid summary: {response.json()}'
+    assert not_modified.status_code == 304, f'Invalid response code: {not_modified.status_code}'
+    assert not_modified.content == b'', 'Not modified response has a body'
+    assert not_modified.headers['ETag'] == etag, 'Not modified response has another ETag'
+    assert modified.status_code == 200, f'Invalid response code: {modified.status_code}'
+    assert modified.json() == response.json(), 'Cached summary differs from the read one'
+
+
+def test_read_summary_cached_until_updated(test_app_with_db, done_summary, run_async):
+    summary_id, summary_url = done_summary
+    test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+
+    # Changes made right in the DB bypass invalidation, so they show that the response is cached.
+    run_async(TextSummary.filter(id=summary_id).update(summary='changed in DB'))
+    cached = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+    test_app_with_db.put(
+        f'{SUMMARIES_ENDPOINT}/{summary_id}/', json={'url': summary_url, 'summary': 'updated'},
+    )
+    updated = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+
+    assert cached.json()['summary'] == 'generated summary', 'Summary is not cached'
+    assert updated.json()['summary'] == 'updated', 'Cached summary is not dropped on update'
+    assert updated.headers['ETag'] != cached.headers['ETag'], 'ETag is not changed'
+
+
+@pytest.mark.negative
+def test_read_summary_deleted(test_app_with_db, done_summary):
+    summary_id, _ = done_summary
+    test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+
+    test_app_with_db.delete(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+    response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+
+    assert response.status_code == 404, 'Cached summary is not dropped on delete'
+
+
+def test_pending_summary_not_cached(test_app_with_db, existing_summary, run_async):
+    summary_id, _ = existing_summary
+    test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+
+    run_async(TextSummary.filter(id=summary_id).update(
+        summary='generated summary', status=SummaryStatus.DONE,
+    ))
+    response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+
+    assert response.json()['summary'] == 'generated summary', 'Pending summary is cached'
+
+
+def test_generate_summary_drops_cached_summary(
+        test_app_with_db, done_summary, monkeypatch, run_async,
+):
+    summary_id, summary_url = done_summary
+
+    async def summarize_url(url):
+        return ArticleSummary('regenerated summary')
+
+    monkeypatch.setattr(summarizer, 'summarize_url', summarize_url)
+    monkeypatch.setattr(
+        summarizer, 'get_summary_cache', lambda: SummaryCache(maxsize=10, ttl=60, use_db=False),
+    )
+    test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+    run_async(summarizer.generate_summary(summary_id, summary_url))
+    response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+
+    assert response.json()['summary'] == 'regenerated summary', 'Cached summary is not dropped'
+
+
+def test_list_cached_until_created(test_app_with_db, existing_summary, run_async):
+    params = {'limit': 2, 'fields': ['id']}
+    first_page = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/', params=params)
+
+    run_async(TextSummary.create(url='http://example.com/db', summary=''))
+    cached_page = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/', params=params)
+    created = test_app_with_db.post(f'{SUMMARIES_ENDPOINT}/', json={'url': 'http://example.com'})
+    new_page = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/', params=params)
+
+    assert cached_page.json() == first_page.json(), 'Summary list is not cached'
+    next_cursor = first_page.headers.get('X-Next-Cursor')
+    assert cached_page.headers.get('X-Next-Cursor') == next_cursor, 'Cursor is not cached'
+
+    assert new_page.json()[0] == {'id': created.json()['id']}, 'Cached list is not dropped'
+
+
+def test_list_etag(test_app_with_db, existing_summary):
+    response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/')
+
+    not_modified = test_app_with_db.get(
+        f'{SUMMARIES_ENDPOINT}/', headers={'If-None-Match': response.headers['ETag']},
+    )
+
+    assert not_modified.status_code == 304, f'Invalid response code: {not_modified.status_code}'
+
+
+@pytest.mark.parametrize(
+    'if_none_match,matches',
+    [
+        (None, False),
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"other", "abc"', True),
+        ('*', True),
+        ('"other"', False),
+    ],
+)
+def test_etag_matches(if_none_match, matches):
+    assert etag_matches(if_none_match, '"abc"') == matches, f'Invalid match of {if_none_match}'
+
+
+def test_response_cache_skips_outdated_responses(run_async):
+    response_cache = ResponseCache(MemoryBackend(maxsize=10, ttl=60))
+
+    async def set_after_change():
+        version = await response_cache.version()
+        await response_cache.invalidate([1])
+        await response_cache.set(summary_key(1), make_response(b'{}'), version)
+        return await response_cache.get(summary_key(1))
+
+    assert run_async(set_after_change()) is None, 'Response read before a change is cached'
+
+
+def test_redis_backend(run_async):
+    client = FakeRedis()
+    response_cache = ResponseCache(RedisBackend(client, ttl=60))
+    response = make_response(b'[{"id": 1}]', next_cursor='cursor')
+
+    async def set_and_invalidate():
+        version = await response_cache.version()
+        await response_cache.set(summary_key(1), response, version)
+        cached = await response_cache.get(summary_key(1))
+        await response_cache.invalidate([1])
+        return cached, await response_cache.get(summary_key(1)), await response_cache.version()
+
+    cached, invalidated, version = run_async(set_and_invalidate())
+
+    assert cached == response, f'Invalid cached response: {cached}'
+    assert client.expirations == {'text-summary:summary:1': 60}, 'Invalid expiration'
+    assert invalidated is None, 'Response is not dropped'
+    assert version == 1, f'Version is not incremented: {version}'
+
+
+def test_invalidation_across_processes(test_app_with_db, monkeypatch, run_async):
+    connection_config = get_connection_config(
+        Settings(database_url=os.getenv('DATABASE_TEST_URL')),
+    )
+    if TextSummary._meta.db.capabilities.dialect != 'postgres':
+        pytest.skip('Notifications between processes need Postgres')
+    # A separate hub and cache stand for another web process.
+    hub = NotificationHub()
+    response_cache = ResponseCache(MemoryBackend(maxsize=10, ttl=60))
+    monkeypatch.setattr(notifications, 'get_response_cache', lambda: response_cache)
+
+    async def notify_other_process():
+        await hub.start(connection_config)
+        try:
+            await response_cache.set(summary_key(1), make_response(b'{}'), 0)
+            await TextSummary._meta.db.execute_query(NOTIFY_SQL, [SUMMARIES_CHANGED_CHANNEL, '1'])
+            for _ in range(50):
+                await asyncio.sleep(0.1)
+                if await response_cache.get(summary_key(1)) is None:
+                    return True
+            return False
+        finally:
+            await hub.stop()
+
+    assert run_async(notify_other_process()), 'Cached response is not dropped'
@@ -0,0 +1,151 @@
+"""Tests for scheduling of summary generation."""
+import asyncio
+
+import pytest
+
+from app import scheduler
+from app.api import summaries
+from app.scheduler import Priority, Scheduler, SchedulerBusy, TokenBucket
+
+SUMMARIES_ENDPOINT = 'summaries'
+
+
+class FakeClock:
+    """Time that passes only when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        """Get the current time."""
+        return self.now
+
+
+def test_token_bucket_limits_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=4, clock=clock)
+
+    burst = bucket.take(4)
+    limited = bucket.take(1)
+    clock.now = 1
+    refilled = bucket.take(2)
+
+    assert burst == 0, 'Burst is not allowed'
+    assert limited == 0.5, f'Invalid wait time: {limited}'
+    assert refilled == 0, 'Tokens are not refilled'
+
+
+def test_token_bucket_admits_large_batches_into_debt():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=4, clock=clock)
+
+    batch = bucket.take(10)
+    limited = bucket.take(1)
+
+    assert batch == 0, 'Batch larger than burst is rejected with a full bucket'
+    assert limited == 3.5, f'Debt is not paid off before the next request: {limited}'
+
+
+@pytest.mark.negative
+def test_scheduler_keeps_client_debt():
+    clock = FakeClock()
+    summary_scheduler = Scheduler(
+        concurrency=1, queue_size=10000, client_rate=1, client_burst=100, clock=clock,
+    )
+    summary_scheduler.admit('client', 1000)
+    # Longer than it takes to refill a burst, shorter than to pay off the debt.
+    clock.now = 101
+
+    with pytest.raises(SchedulerBusy) as error:
+        summary_scheduler.admit('client', 1000)
+
+    assert error.value.retry_after == 899, f'Debt is forgotten: {error.value.retry_after}'
+
+
+def test_scheduler_generates_interactive_summaries_first(monkeypatch, run_async):
+    generated = []
+
+    async def generate_summary(summary_id, url):
+        generated.append(summary_id)
+
+    monkeypatch.setattr(scheduler, 'generate_summary', generate_summary)
+    summary_scheduler = Scheduler(concurrency=1, queue_size=10)
+
+    async def schedule_and_generate():
+        summary_scheduler.schedule(Priority.BULK, [(1, 'http://example.com/1')])
+        summary_scheduler.schedule(Priority.BULK, [(2, 'http://example.com/2')])
+        summary_scheduler.schedule(Priority.INTERACTIVE, [(3, 'http://example.com/3')])
+        summary_scheduler.start()
+        while len(generated) < 3:
+            await asyncio.sleep(0.01)
+        await summary_scheduler.stop()
+
+    run_async(asyncio.wait_for(schedule_and_generate(), timeout=5))
+
+    assert generated == [3, 1, 2], f'Invalid generation order: {generated}'
+
+
+def test_scheduler_caps_concurrency(monkeypatch, run_async):
+    running = []
+    max_running = []
+
+    async def generate_summary(summary_id, url):
+        running.append(summary_id)
+        max_running.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(summary_id)
+
+    monkeypatch.setattr(scheduler, 'generate_summary', generate_summary)
+    summary_scheduler = Scheduler(concurrency=2, queue_size=10)
+
+    async def generate():
+        summary_scheduler.schedule(
+            Priority.BULK, [(index, 'http://example.com') for index in range(6)],
+        )
+        summary_scheduler.start()
+        while len(max_running) < 6 or running:
+            await asyncio.sleep(0.01)
+        await summary_scheduler.stop()
+
+    run_async(asyncio.wait_for(generate(), timeout=5))
+
+    assert max(max_running) == 2, f'Invalid concurrency: {max(max_running)}'
+
+
+@pytest.mark.negative
+def test_scheduler_rejects_when_queue_is_full():
+    summary_scheduler = Scheduler(concurrency=2, queue_size=2)
+    summary_scheduler.schedule(Priority.BULK, [(1, 'http://example.com')])
+
+    summary_scheduler.admit('client', 1)
+    with pytest.raises(SchedulerBusy) as error:
+        summary_scheduler.admit('client', 2)
+
+    assert error.value.retry_after >= 1, f'Invalid retry time: {error.value.retry_after}'
+
+
+@pytest.mark.negative
+def test_create_summary_queue_full(test_app_with_db, mocked_summarizer):
+    mocked_summarizer.queue_size = 1
+    test_app_with_db.post(f'{SUMMARIES_ENDPOINT}/', json={'url': 'http://example.com'})
+
+    response = test_app_with_db.post(f'{SUMMARIES_ENDPOINT}/', json={'url': 'http://example.com'})
+
+    assert response.status_code == 429, f'Invalid response code: {response.status_code}'
+    assert int(response.headers['Retry-After']) >= 1, 'Invalid Retry-After header'
+    assert len(mocked_summarizer) == 1, 'Rejected summary is scheduled'
+
+
+@pytest.mark.negative
+def test_create_summaries_rate_limited(test_app_with_db, monkeypatch):
+    summary_scheduler = Scheduler(concurrency=1, queue_size=100, client_rate=0.1, client_burst=3)
+    monkeypatch.setattr(summaries, 'get_scheduler', lambda: summary_scheduler)
+    payloads = [{'url': f'http://example.com/{index}'} for index in range(2)]
+
+    created = test_app_with_db.post(f'{SUMMARIES_ENDPOINT}/batch/', json=payloads)
+    limited = test_app_with_db.post(f'{SUMMARIES_ENDPOINT}/batch/', json=payloads)
+
+    assert created.status_code == 201, f'Invalid response code: {created.status_code}'
+    assert limited.status_code == 429, f'Invalid response code: {limited.status_code}'
+    assert int(limited.headers['Retry-After']) == 10, 'Invalid Retry-After header'
+    assert len(summary_scheduler) == 2, 'Rate limited summaries are scheduled'
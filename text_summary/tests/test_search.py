@@ -0,0 +1,136 @@
+"""Tests for full-text search over summaries."""
+import uuid
+
+import pytest
+
+from app import summarizer
+from app.cache import SummaryCache
+from app.contents import ArticleSummary
+from app.search import InvertedIndex
+
+SEARCH_ENDPOINT = 'summaries/search/'
+
+
+@pytest.fixture(scope='function')
+def word():
+    """Make a word no other summary contains."""
+    return f'word{uuid.uuid4().hex}'
+
+
+def create_summary(test_app, text):
+    """Create a summary and set its text."""
+    url = 'http://example.com'
+    summary_id = test_app.post('summaries/', json={'url': url}).json()['id']
+    test_app.put(f'summaries/{summary_id}/', json={'url': url, 'summary': text})
+    return summary_id
+
+
+def test_search_summaries(test_app_with_db, mocked_summarizer, word):
+    matching_id = create_summary(test_app_with_db, f'Cats sleep on {word} blankets.')
+    create_summary(test_app_with_db, 'Cats sleep on warm blankets.')
+
+    response = test_app_with_db.get(SEARCH_ENDPOINT, params={'q': f'{word} cats'})
+
+    assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+    results = response.json()
+    assert [result['id'] for result in results] == [matching_id], f'Invalid results: {results}'
+    assert results[0]['summary'] == f'Cats sleep on {word} blankets.', 'Invalid summary'
+    assert results[0]['rank'] > 0, f'Invalid rank: {results[0]["rank"]}'
+
+
+def test_search_ranked_and_paginated(test_app_with_db, mocked_summarizer, word):
+    rare_id = create_summary(test_app_with_db, f'{word} is mentioned once in a long summary text.')
+    frequent_id = create_summary(test_app_with_db, f'{word} {word} {word}.')
+
+    first_page = test_app_with_db.get(SEARCH_ENDPOINT, params={'q': word, 'limit': 1})
+    second_page = test_app_with_db.get(
+        SEARCH_ENDPOINT, params={'q': word, 'limit': 1, 'offset': 1},
+    )
+
+    assert [result['id'] for result in first_page.json()] == [frequent_id], 'Invalid first page'
+    assert [result['id'] for result in second_page.json()] == [rare_id], 'Invalid second page'
+
+
+def test_search_follows_updates_and_deletes(test_app_with_db, mocked_summarizer, word):
+    summary_id = create_summary(test_app_with_db, f'Summary with {word}.')
+    deleted_id = create_summary(test_app_with_db, f'Deleted summary with {word}.')
+    found = test_app_with_db.get(SEARCH_ENDPOINT, params={'q': word})
+
+    test_app_with_db.put(
+        f'summaries/{summary_id}/', json={'url': 'http://example.com', 'summary': 'Other text.'},
+    )
+    test_app_with_db.delete(f'summaries/{deleted_id}/')
+    response = test_app_with_db.get(SEARCH_ENDPOINT, params={'q': word})
+
+    assert len(found.json()) == 2, f'Invalid results: {found.json()}'
+    assert response.json() == [], f'Changed summaries are still found: {response.json()}'
+
+
+def test_search_generated_summary(
+        test_app_with_db, existing_summary, monkeypatch, run_async, word,
+):
+    summary_id, summary_url = existing_summary
+
+    async def summarize_url(url):
+        return ArticleSummary(f'Generated summary about {word}.')
+
+    monkeypatch.setattr(summarizer, 'summarize_url', summarize_url)
+    monkeypatch.setattr(
+        summarizer, 'get_summary_cache', lambda: SummaryCache(maxsize=10, ttl=60, use_db=False),
+    )
+    run_async(summarizer.generate_summary(summary_id, summary_url))
+    response = test_app_with_db.get(SEARCH_ENDPOINT, params={'q': word})
+
+    assert [result['id'] for result in response.json()] == [summary_id], 'Summary is not found'
+
+
+def test_search_etag(test_app_with_db, mocked_summarizer, word):
+    create_summary(test_app_with_db, f'Summary with {word}.')
+    response = test_app_with_db.get(SEARCH_ENDPOINT, params={'q': word})
+
+    not_modified = test_app_with_db.get(
+        SEARCH_ENDPOINT, params={'q': word}, headers={'If-None-Match': response.headers['ETag']},
+    )
+
+    assert not_modified.status_code == 304, f'Invalid response code: {not_modified.status_code}'
+
+
+@pytest.mark.negative
+@pytest.mark.parametrize(
+    'params',
+    [
+        {},
+        {'q': ''},
+        {'q': 'cats', 'limit': 0},
+        {'q': 'cats', 'limit': 101},
+        {'q': 'cats', 'offset': -1},
+    ],
+)
+def test_search_invalid_params(test_app_with_db, params):
+    response = test_app_with_db.get(SEARCH_ENDPOINT, params=params)
+
+    assert response.status_code == 422, f'Invalid response code: {response.status_code}'
+
+
+def test_inverted_index_search():
+    index = InvertedIndex()
+    index.add(1, 'Cats sleep on warm blankets.')
+    index.add(2, 'Cats and dogs, cats and dogs.')
+    index.add(3, 'Dogs bark.')
+
+    assert [summary_id for summary_id, _ in index.search('cats')] == [2, 1], 'Invalid ranking'
+    assert [summary_id for summary_id, _ in index.search('DOGS cats')] == [2], 'Invalid match'
+    assert index.search('birds') == [], 'Unknown word is found'
+    assert index.search('') == [], 'Empty query matches summaries'
+
+
+def test_inverted_index_remove():
+    index = InvertedIndex()
+    index.add(1, 'Cats sleep.')
+    index.add(1, 'Dogs bark.')
+    index.add(2, 'Dogs sleep.')
+    index.remove(2)
+
+    assert index.search('cats') == [], 'Replaced text is found'
+    assert [summary_id for summary_id, _ in index.search('dogs')] == [1], 'Invalid match'
+    assert len(index) == 1, f'Invalid index size: {len(index)}'
@@ -1,8 +1,16 @@
 """Tests for /summaries/ resource."""
+import csv
 import json
+import uuid
 
 import pytest
 
+from app.api import summaries
+from app.cache import normalize_url, SummaryCache
+from app.contents import ArticleSummary
+from app.instrumentation import QUERY_COUNT_HEADER
+from app.schemas import SUMMARY_FIELDS, SummarySchema
+
 SUMMARIES_ENDPOINT = 'summaries'
 
 ID_FIELD = 'id'
@@ -10,6 +18,7 @@ URL_FIELD = 'url'
 SUMMARY_FIELD = 'summary'
 CREATED_AT_FIELD = 'created_at'
 ERROR_DETAIL_FIELD = 'detail'
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
 
 
 def test_create_summary(test_app_with_db, mocked_summarizer):
@@ -52,6 +61,106 @@ def test_read_all_summaries(test_app_with_db, existing_summary):
     )
 
 
+def test_summary_responses_match_response_model(test_app_with_db, existing_summary):
+    summary_id, summary_url = existing_summary
+    test_app_with_db.put(
+        f'{SUMMARIES_ENDPOINT}/{summary_id}/',
+        data=json.dumps({URL_FIELD: summary_url, SUMMARY_FIELD: 'summary'}),
+    )
+
+    summary = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/').json()
+    summaries = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/', params={'limit': 10}).json()
+
+    # Rows are serialized without validation, so the JSON must be the same as of the model.
+    for item in [summary, *summaries]:
+        assert json.loads(SummarySchema(**item).json()) == item, f'Invalid summary JSON: {item}'
+
+
+def test_read_all_summaries_pagination(test_app_with_db, mocked_summarizer):
+    url_prefix = f'http://example.com/{uuid.uuid4()}/'
+    summary_urls = [f'{url_prefix}{index}' for index in range(3)]
+    test_app_with_db.post(
+        f'{SUMMARIES_ENDPOINT}/batch/',
+        data=json.dumps([{URL_FIELD: summary_url} for summary_url in summary_urls]),
+    )
+
+    first_page = test_app_with_db.get(
+        f'{SUMMARIES_ENDPOINT}/', params={'url_prefix': url_prefix, 'limit': 2},
+    )
+    next_cursor = first_page.headers.get(NEXT_CURSOR_HEADER)
+    second_page = test_app_with_db.get(
+        f'{SUMMARIES_ENDPOINT}/',
+        params={'url_prefix': url_prefix, 'limit': 2, 'cursor': next_cursor},
+    )
+
+    assert first_page.status_code == 200, f'Invalid response code: {first_page.status_code}'
+    assert next_cursor, 'Cursor for the next page is not provided'
+    assert second_page.status_code == 200, f'Invalid response code: {second_page.status_code}'
+    assert NEXT_CURSOR_HEADER not in second_page.headers, 'Cursor is provided for the last page'
+
+    listed_urls = [summary[URL_FIELD] for summary in first_page.json() + second_page.json()]
+    assert listed_urls == summary_urls[::-1], f'Invalid listed summaries: {listed_urls}'
+
+
+def test_read_all_summaries_filters_and_fields(test_app_with_db, existing_summary):
+    summary_id, summary_url = existing_summary
+
+    response = test_app_with_db.get(
+        f'{SUMMARIES_ENDPOINT}/',
+        params={'has_summary': False, 'fields': [ID_FIELD, URL_FIELD], 'limit': 1000},
+    )
+
+    assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+
+    listed_summaries = {summary[ID_FIELD]: summary for summary in response.json()}
+    assert listed_summaries.get(summary_id) == {ID_FIELD: summary_id, URL_FIELD: summary_url}, (
+        f'Invalid listed summary: {listed_summaries.get(summary_id)}',
+    )
+
+
+def test_export_summaries_ndjson(test_app_with_db, mocked_summarizer):
+    url_prefix = f'http://example.com/{uuid.uuid4()}/'
+    summary_urls = [f'{url_prefix}{index}' for index in range(3)]
+    test_app_with_db.post(
+        f'{SUMMARIES_ENDPOINT}/batch/',
+        data=json.dumps([{URL_FIELD: summary_url} for summary_url in summary_urls]),
+    )
+
+    response = test_app_with_db.get(
+        f'{SUMMARIES_ENDPOINT}/export/', params={'format': 'ndjson', 'url_prefix': url_prefix},
+    )
+
+    assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+    assert response.headers['content-type'].startswith('application/x-ndjson'), (
+        f'Invalid content type: {response.headers["content-type"]}',
+    )
+
+    exported_summaries = [json.loads(line) for line in response.text.splitlines()]
+    assert [summary[URL_FIELD] for summary in exported_summaries] == summary_urls[::-1], (
+        f'Invalid exported summaries: {exported_summaries}',
+    )
+    assert all(summary.get(CREATED_AT_FIELD) for summary in exported_summaries), (
+        'Missing or empty created_at field'
+    )
+
+
+def test_export_summaries_csv(test_app_with_db, existing_summary):
+    summary_id, summary_url = existing_summary
+
+    response = test_app_with_db.get(
+        f'{SUMMARIES_ENDPOINT}/export/', params={'format': 'csv', 'url_prefix': summary_url},
+    )
+
+    assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+
+    exported_summaries = list(csv.DictReader(response.text.splitlines()))
+    exported_ids = [int(summary[ID_FIELD]) for summary in exported_summaries]
+    assert summary_id in exported_ids, f'Existing summary is not exported: {exported_ids}'
+    assert set(exported_summaries[0]) == set(SUMMARY_FIELDS), (
+        f'Invalid CSV header: {list(exported_summaries[0])}',
+    )
+
+
 def test_update_summary(test_app_with_db, existing_summary):
     summary_id, summary_url = existing_summary
 
@@ -72,12 +181,56 @@ def test_update_summary(test_app_with_db, existing_summary):
     assert response_json.get(CREATED_AT_FIELD), 'Missing or empty created_at field'
 
 
+def test_update_summaries_batch(test_app_with_db, mocked_summarizer):
+    summary_urls = [f'http://example.com/{index}' for index in range(2)]
+    created_summaries = test_app_with_db.post(
+        f'{SUMMARIES_ENDPOINT}/batch/',
+        data=json.dumps([{URL_FIELD: summary_url} for summary_url in summary_urls]),
+    ).json()
+
+    response = test_app_with_db.put(
+        f'{SUMMARIES_ENDPOINT}/batch/',
+        data=json.dumps([
+            {ID_FIELD: summary[ID_FIELD], URL_FIELD: summary[URL_FIELD], SUMMARY_FIELD: 'new'}
+            for summary in created_summaries
+        ]),
+    )
+
+    assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+
+    updated_summaries = {summary[ID_FIELD]: summary for summary in response.json()}
+    for summary in created_summaries:
+        updated_summary = updated_summaries.get(summary[ID_FIELD])
+        assert updated_summary, f'Summary {summary[ID_FIELD]} is not updated'
+        assert updated_summary[SUMMARY_FIELD] == 'new', f'Invalid summary: {updated_summary}'
+        assert updated_summary.get(CREATED_AT_FIELD), 'Missing or empty created_at field'
+
+
 def test_delete_summary(test_app_with_db, existing_summary):
-    summary_id, _ = existing_summary
+    summary_id, summary_url = existing_summary
 
     response = test_app_with_db.delete(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
 
     assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+    assert response.json()[ID_FIELD] == summary_id, f'Invalid id field: {response.json()}'
+    assert response.json()[URL_FIELD] == summary_url, f'Invalid url field: {response.json()}'
+
+    read_response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+    assert read_response.status_code == 404, 'Deleted summary is still available'
+
+
+def test_delete_summaries_batch(test_app_with_db, existing_summary):
+    summary_id, _ = existing_summary
+
+    response = test_app_with_db.post(
+        f'{SUMMARIES_ENDPOINT}/batch/delete/', data=json.dumps({'ids': [summary_id, 99999999]}),
+    )
+
+    assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+    assert response.json() == {'ids': [summary_id]}, f'Invalid deleted ids: {response.json()}'
+
+    read_response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+    assert read_response.status_code == 404, 'Deleted summary is still available'
 
 
 @pytest.mark.negative
@@ -93,6 +246,20 @@ def test_create_summary_incorrect_payload(test_app_with_db, payload, mocked_summ
     assert response.json().get(ERROR_DETAIL_FIELD), 'Details about the error are not provided'
 
 
+@pytest.mark.negative
+@pytest.mark.parametrize(
+    'budget',
+    [{'max_sentences': 0}, {'max_sentences': 6}, {'max_chars': 0}],
+    ids=['no sentences', 'more sentences than generated', 'no characters'],
+)
+def test_create_summary_incorrect_budget(test_app_with_db, budget, mocked_summarizer):
+    response = test_app_with_db.post(
+        f'{SUMMARIES_ENDPOINT}/', json={URL_FIELD: 'http://example.com', **budget},
+    )
+
+    assert response.status_code == 422, f'Invalid response code: {response.status_code}'
+
+
 @pytest.mark.negative
 @pytest.mark.parametrize(
     'summary_id,response_code',
@@ -106,6 +273,27 @@ def test_read_summary_incorrect_id(test_app_with_db, summary_id, response_code):
     assert response.json().get(ERROR_DETAIL_FIELD), 'Details about the error are not provided'
 
 
+@pytest.mark.negative
+def test_export_summaries_incorrect_format(test_app_with_db):
+    response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/export/', params={'format': 'xml'})
+
+    assert response.status_code == 422, f'Invalid response code: {response.status_code}'
+    assert response.json().get(ERROR_DETAIL_FIELD), 'Details about the error are not provided'
+
+
+@pytest.mark.negative
+@pytest.mark.parametrize(
+    'params',
+    [{'cursor': 'abc'}, {'limit': 0}, {'fields': 'unknown'}, {'created_after': 'yesterday'}],
+    ids=['invalid cursor', 'zero limit', 'unknown field', 'invalid date'],
+)
+def test_read_all_summaries_incorrect_params(test_app_with_db, params):
+    response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/', params=params)
+
+    assert response.status_code == 422, f'Invalid response code: {response.status_code}'
+    assert response.json().get(ERROR_DETAIL_FIELD), 'Details about the error are not provided'
+
+
 @pytest.mark.negative
 @pytest.mark.parametrize(
     'summary_id,response_code',
@@ -156,3 +344,93 @@ def test_delete_summary_incorrect_id(test_app_with_db, summary_id, response_code
 
     assert response.status_code == response_code, f'Invalid response code: {response.status_code}'
     assert response.json().get(ERROR_DETAIL_FIELD), 'Details about the error are not provided'
+
+
+def test_create_summaries_batch(test_app_with_db, mocked_summarizer):
+    summary_urls = [f'http://example.com/{index}' for index in range(3)]
+    response = test_app_with_db.post(
+        f'{SUMMARIES_ENDPOINT}/batch/',
+        data=json.dumps([{URL_FIELD: summary_url} for summary_url in summary_urls]),
+    )
+
+    assert response.status_code == 201, f'Invalid response code: {response.status_code}'
+
+    response_json = response.json()
+    assert [summary[URL_FIELD] for summary in response_json] == summary_urls, (
+        f'Invalid summary URLs: {response_json}',
+    )
+    for summary in response_json:
+        read_response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary[ID_FIELD]}/')
+        assert read_response.json()[URL_FIELD] == summary[URL_FIELD], (
+            f'Invalid stored summary: {read_response.json()}',
+        )
+
+
+def test_read_summaries_batch(test_app_with_db, mocked_summarizer):
+    created = test_app_with_db.post(
+        f'{SUMMARIES_ENDPOINT}/batch/',
+        json=[{URL_FIELD: f'http://example.com/{index}'} for index in range(3)],
+    )
+    first_id, second_id, third_id = (summary[ID_FIELD] for summary in created.json())
+    test_app_with_db.delete(f'{SUMMARIES_ENDPOINT}/{second_id}/')
+
+    response = test_app_with_db.get(
+        f'{SUMMARIES_ENDPOINT}/batch/', params={'ids': [third_id, second_id, first_id, third_id]},
+    )
+
+    assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+    assert int(response.headers[QUERY_COUNT_HEADER]) == 1, 'Summaries are not read in one query'
+    summaries = response.json()
+    read_ids = [summary and summary[ID_FIELD] for summary in summaries]
+    assert read_ids == [third_id, None, first_id, third_id], f'Invalid summaries: {summaries}'
+    read_response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{first_id}/')
+    assert summaries[2] == read_response.json(), 'Batch summary differs from the read one'
+
+
+@pytest.mark.negative
+@pytest.mark.parametrize(
+    'params',
+    [{}, {'ids': [1, 0]}, {'ids': ['abc']}, {'ids': list(range(1, 1002))}],
+    ids=['no ids', 'zero ID', 'non-digit ID', 'too many ids'],
+)
+def test_read_summaries_batch_incorrect_ids(test_app_with_db, params):
+    response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/batch/', params=params)
+
+    assert response.status_code == 422, f'Invalid response code: {response.status_code}'
+
+
+def test_create_cached_summaries_with_budget(test_app_with_db, mocked_summarizer, monkeypatch):
+    summary_cache = SummaryCache(maxsize=10, ttl=60, use_db=False)
+    summary_cache._memory.set(
+        normalize_url('http://example.com/cached'), ArticleSummary('First.\nSecond.\nThird.'),
+    )
+    monkeypatch.setattr(summaries, 'get_summary_cache', lambda: summary_cache)
+    payloads = [
+        {URL_FIELD: 'http://example.com/cached', 'max_sentences': 2},
+        {URL_FIELD: 'http://example.com/cached', 'max_chars': 6},
+        {URL_FIELD: 'http://example.com/cached'},
+    ]
+
+    response = test_app_with_db.post(f'{SUMMARIES_ENDPOINT}/batch/', json=payloads)
+
+    reads = [
+        test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary[ID_FIELD]}/')
+        for summary in response.json()
+    ]
+    stored = [read_response.json()[SUMMARY_FIELD] for read_response in reads]
+    assert stored == ['First.\nSecond.', 'First.', 'First.\nSecond.\nThird.'], (
+        f'Invalid stored summaries: {stored}'
+    )
+
+
+@pytest.mark.negative
+@pytest.mark.parametrize(
+    'payload',
+    [{URL_FIELD: 'http://example.com'}, [{URL_FIELD: 'invalid://url'}]],
+    ids=['not a list', 'incorrect url'],
+)
+def test_create_summaries_batch_incorrect_payload(test_app_with_db, payload, mocked_summarizer):
+    response = test_app_with_db.post(f'{SUMMARIES_ENDPOINT}/batch/', data=json.dumps(payload))
+
+    assert response.status_code == 422, f'Invalid response code: {response.status_code}'
+    assert response.json().get(ERROR_DETAIL_FIELD), 'Details about the error are not provided'
@@ -14,12 +14,20 @@ URL_FIELD = 'url'
 SUMMARY_FIELD = 'summary'
 CREATED_AT_FIELD = 'created_at'
 ERROR_DETAIL_FIELD = 'detail'
+GENERATED_FIELDS = {
+    'status': 'done',
+    'error': None,
+    'attempts': 1,
+    'started_at': datetime.utcnow().isoformat(),
+    'finished_at': datetime.utcnow().isoformat(),
+}
 
 SUMMARY_DATA = {
     ID_FIELD: 1,
     URL_FIELD: 'http://example.com',
     SUMMARY_FIELD: 'summary',
     CREATED_AT_FIELD: datetime.utcnow().isoformat(),
+    **GENERATED_FIELDS,
 }
 MULTIPLE_SUMMARIES_DATA = [
     {
@@ -27,12 +35,14 @@ MULTIPLE_SUMMARIES_DATA = [
         URL_FIELD: 'http://example.com',
         SUMMARY_FIELD: 'summary',
         CREATED_AT_FIELD: datetime.utcnow().isoformat(),
+        **GENERATED_FIELDS,
     },
     {
         ID_FIELD: 2,
         URL_FIELD: 'http://example.com',
         SUMMARY_FIELD: 'summary',
         CREATED_AT_FIELD: datetime.utcnow().isoformat(),
+        **GENERATED_FIELDS,
     },
 ]
 
@@ -41,6 +51,10 @@ async def mock_create(payload):
     return SUMMARY_DATA[ID_FIELD]
 
 
+async def mock_create_many(payloads, cached_summaries):
+    return [summary[ID_FIELD] for summary in MULTIPLE_SUMMARIES_DATA]
+
+
 async def mock_read(summary_id):
     return SUMMARY_DATA
 
@@ -49,7 +63,7 @@ async def mock_read_nonexistent(summary_id):
     return None
 
 
-async def mock_read_all():
+async def mock_read_all(limit, after, filters, fields):
     return MULTIPLE_SUMMARIES_DATA
 
 
@@ -61,10 +75,22 @@ async def mock_update_nonexistent(summary_id, payload):
     return None
 
 
+async def mock_update_many(summary_ids, payloads):
+    return MULTIPLE_SUMMARIES_DATA
+
+
 async def mock_delete(summary_id):
     return SUMMARY_DATA
 
 
+async def mock_delete_nonexistent(summary_id):
+    return None
+
+
+async def mock_delete_many(summary_ids):
+    return summary_ids
+
+
 def test_create_summary(test_app, monkeypatch, mocked_summarizer):
     summary_url = SUMMARY_DATA[URL_FIELD]
 
@@ -81,6 +107,21 @@ def test_create_summary(test_app, monkeypatch, mocked_summarizer):
     )
 
 
+def test_create_summaries_batch(test_app, monkeypatch, mocked_summarizer):
+    monkeypatch.setattr(crud, 'create_many', mock_create_many)
+
+    response = test_app.post(
+        f'{SUMMARIES_ENDPOINT}/batch/',
+        data=json.dumps([{URL_FIELD: summary[URL_FIELD]} for summary in MULTIPLE_SUMMARIES_DATA]),
+    )
+
+    assert response.status_code == 201, f'Invalid response code: {response.status_code}'
+    assert response.json() == [
+        {ID_FIELD: summary[ID_FIELD], URL_FIELD: summary[URL_FIELD]}
+        for summary in MULTIPLE_SUMMARIES_DATA
+    ], 'Wrong response content'
+
+
 def test_read_summary(test_app, monkeypatch):
     monkeypatch.setattr(crud, 'read', mock_read)
 
@@ -117,8 +158,22 @@ def test_update_summary(test_app, monkeypatch):
     assert response.json() == SUMMARY_DATA, 'Wrong response content'
 
 
+def test_update_summaries_batch(test_app, monkeypatch):
+    monkeypatch.setattr(crud, 'update_many', mock_update_many)
+
+    response = test_app.put(
+        f'{SUMMARIES_ENDPOINT}/batch/',
+        data=json.dumps([
+            {ID_FIELD: summary[ID_FIELD], URL_FIELD: summary[URL_FIELD], SUMMARY_FIELD: 'new'}
+            for summary in MULTIPLE_SUMMARIES_DATA
+        ]),
+    )
+
+    assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+    assert response.json() == MULTIPLE_SUMMARIES_DATA, 'Wrong response content'
+
+
 def test_delete_summary(test_app, monkeypatch):
-    monkeypatch.setattr(crud, 'read', mock_read)
     monkeypatch.setattr(crud, 'delete', mock_delete)
 
     summary_id = SUMMARY_DATA[ID_FIELD]
@@ -126,6 +181,18 @@ def test_delete_summary(test_app, monkeypatch):
     response = test_app.delete(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
 
     assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+    assert response.json() == SUMMARY_DATA, 'Wrong response content'
+
+
+def test_delete_summaries_batch(test_app, monkeypatch):
+    monkeypatch.setattr(crud, 'delete_many', mock_delete_many)
+
+    response = test_app.post(
+        f'{SUMMARIES_ENDPOINT}/batch/delete/', data=json.dumps({'ids': [1, 2]}),
+    )
+
+    assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+    assert response.json() == {'ids': [1, 2]}, 'Wrong response content'
 
 
 @pytest.mark.negative
@@ -205,7 +272,7 @@ def test_update_summary_incorrect_payload(test_app, existing_summary, payload, m
     ids=['non-digit ID', 'zero ID', 'Nonexistent ID'],
 )
 def test_delete_summary_incorrect_id(test_app, summary_id, response_code, monkeypatch):
-    monkeypatch.setattr(crud, 'read', mock_read_nonexistent)
+    monkeypatch.setattr(crud, 'delete', mock_delete_nonexistent)
 
     response = test_app.delete(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
 
@@ -0,0 +1,186 @@
+"""Tests for summary status lifecycle and retries of failed summaries."""
+import json
+
+import httpx
+import pytest
+
+from app import jobs, summarizer, worker
+from app.cache import SummaryCache
+from app.contents import ArticleSummary
+from app.fetcher import FetchError
+from app.models import JobStatus, SummaryJob, SummaryStatus, TextSummary
+
+SUMMARIES_ENDPOINT = 'summaries'
+REQUEST = httpx.Request('GET', 'http://example.com')
+
+
+@pytest.fixture(scope='function')
+def flaky_summarize_url(monkeypatch):
+    """Summarize web pages after raising prepared errors, without waiting between attempts."""
+    errors = []
+
+    async def summarize_url(url):
+        if errors:
+            raise errors.pop(0)
+        return ArticleSummary('generated summary')
+
+    monkeypatch.setattr(summarizer, 'summarize_url', summarize_url)
+    monkeypatch.setattr(summarizer, 'retry_delay', lambda attempt: 0)
+    monkeypatch.setattr(
+        summarizer, 'get_summary_cache', lambda: SummaryCache(maxsize=10, ttl=60, use_db=False),
+    )
+    yield errors
+
+
+def read_status(run_async, summary_id):
+    statuses = run_async(TextSummary.filter(id=summary_id).values(
+        'status', 'error', 'attempts', 'started_at', 'finished_at',
+    ))
+    return statuses[0]
+
+
+def status_error(status_code):
+    response = httpx.Response(status_code, request=REQUEST)
+    return httpx.HTTPStatusError(f'HTTP {status_code}', request=REQUEST, response=response)
+
+
+@pytest.mark.parametrize(
+    'error,transient',
+    [
+        (httpx.ConnectError('Connection refused', request=REQUEST), True),
+        (httpx.ReadTimeout('Timed out', request=REQUEST), True),
+        (status_error(503), True),
+        (status_error(404), False),
+        (FetchError('Page is too large'), False),
+        (ValueError('Invalid article'), False),
+    ],
+    ids=['connection', 'timeout', 'server error', 'not found', 'too large', 'parsing'],
+)
+def test_is_transient(error, transient):
+    assert summarizer.is_transient(error) == transient, f'Invalid transient check of {error!r}'
+
+
+def test_generate_summary_done(test_app_with_db, existing_summary, flaky_summarize_url, run_async):
+    summary_id, _ = existing_summary
+    assert read_status(run_async, summary_id)['status'] == SummaryStatus.PENDING, (
+        'New summary is not pending'
+    )
+
+    run_async(summarizer.generate_summary(summary_id, 'http://example.com/done'))
+
+    status = read_status(run_async, summary_id)
+    assert status['status'] == SummaryStatus.DONE, f'Invalid status: {status}'
+    assert status['attempts'] == 1, f'Invalid attempts count: {status}'
+    assert status['started_at'] <= status['finished_at'], f'Invalid timing: {status}'
+
+
+def test_generate_summary_with_budget(test_app_with_db, mocked_summarizer, monkeypatch, run_async):
+    async def summarize_url(url):
+        return ArticleSummary('First sentence.\nSecond sentence.\nThird sentence.')
+
+    monkeypatch.setattr(summarizer, 'summarize_url', summarize_url)
+    monkeypatch.setattr(
+        summarizer, 'get_summary_cache', lambda: SummaryCache(maxsize=10, ttl=60, use_db=False),
+    )
+    created = test_app_with_db.post(
+        f'{SUMMARIES_ENDPOINT}/',
+        json={'url': 'http://example.com/budget', 'max_sentences': 2, 'max_chars': 20},
+    )
+    summary_id = created.json()['id']
+
+    run_async(summarizer.generate_summary(summary_id, 'http://example.com/budget'))
+    response = test_app_with_db.get(f'{SUMMARIES_ENDPOINT}/{summary_id}/')
+
+    assert response.json()['summary'] == 'First sentence.', 'Summary is not cut to the budget'
+
+
+def test_generate_summary_retries_transient_errors(
+        test_app_with_db, existing_summary, flaky_summarize_url, run_async,
+):
+    summary_id, _ = existing_summary
+    flaky_summarize_url.append(httpx.ConnectError('Connection refused', request=REQUEST))
+
+    run_async(summarizer.generate_summary(summary_id, 'http://example.com/flaky'))
+
+    status = read_status(run_async, summary_id)
+    assert status['status'] == SummaryStatus.DONE, f'Invalid status: {status}'
+    assert status['attempts'] == 2, f'Invalid attempts count: {status}'
+    assert status['error'] is None, f'Error of a retried attempt is kept: {status}'
+
+
+@pytest.mark.negative
+def test_generate_summary_failed(
+        test_app_with_db, existing_summary, flaky_summarize_url, run_async,
+):
+    summary_id, _ = existing_summary
+    flaky_summarize_url.append(FetchError('Page is too large'))
+
+    with pytest.raises(FetchError):
+        run_async(summarizer.generate_summary(summary_id, 'http://example.com/large'))
+
+    status = read_status(run_async, summary_id)
+    assert status['status'] == SummaryStatus.FAILED, f'Invalid status: {status}'
+    assert status['attempts'] == 1, f'Permanent error is retried: {status}'
+    assert status['error'] == "FetchError('Page is too large')", f'Invalid error: {status}'
+
+
+def test_worker_retries_transient_errors(
+        test_app_with_db, existing_summary, flaky_summarize_url, monkeypatch, run_async,
+):
+    summary_id, summary_url = existing_summary
+    run_async(SummaryJob.all().delete())
+    run_async(jobs.enqueue(summary_id, summary_url))
+    flaky_summarize_url.append(httpx.ConnectError('Connection refused', request=REQUEST))
+    summary_worker = worker.SummaryWorker(
+        concurrency=1, poll_interval=0.01, lease_timeout=60, max_attempts=3,
+    )
+    retried_attempts = []
+
+    def retry_delay(attempt):
+        retried_attempts.append(attempt)
+        return 60
+
+    monkeypatch.setattr(worker, 'retry_delay', retry_delay)
+    run_async(summary_worker.run(until_idle=True))
+
+    job = run_async(SummaryJob.get(summary_id=summary_id))
+    status = read_status(run_async, summary_id)
+    assert job.status == JobStatus.PENDING, f'Job is not put back into the queue: {job.status}'
+    assert job.run_at is not None, 'Retried job has no retry time'
+    assert retried_attempts == [1], f'Invalid retried attempts: {retried_attempts}'
+    assert status['status'] == SummaryStatus.PENDING, f'Invalid status: {status}'
+    assert 'ConnectError' in status['error'], f'Invalid error: {status}'
+
+
+def test_update_pending_summary_done(test_app_with_db, existing_summary, run_async):
+    summary_id, summary_url = existing_summary
+    run_async(TextSummary.filter(id=summary_id).update(error='Download failed'))
+
+    response = test_app_with_db.put(
+        f'{SUMMARIES_ENDPOINT}/{summary_id}/',
+        data=json.dumps({'url': summary_url, 'summary': 'written summary'}),
+    )
+    batch_response = test_app_with_db.put(
+        f'{SUMMARIES_ENDPOINT}/batch/',
+        data=json.dumps([{'id': summary_id, 'url': summary_url, 'summary': 'written again'}]),
+    )
+
+    status = read_status(run_async, summary_id)
+    assert response.json()['status'] == 'done', f'Invalid status: {response.json()}'
+    assert batch_response.json()[0]['status'] == 'done', f'Invalid status: {batch_response.json()}'
+    assert status['error'] is None, f'Error is not cleared: {status}'
+    assert status['finished_at'] is not None, f'Finish time is not set: {status}'
+
+
+def test_filter_summaries_by_status(test_app_with_db, existing_summary, run_async):
+    summary_id, _ = existing_summary
+    run_async(TextSummary.filter(id=summary_id).update(status=SummaryStatus.FAILED))
+
+    response = test_app_with_db.get(
+        f'{SUMMARIES_ENDPOINT}/', params={'status': 'failed', 'fields': ['id', 'status']},
+    )
+
+    summaries = response.json()
+    assert response.status_code == 200, f'Invalid response code: {response.status_code}'
+    assert {'id': summary_id, 'status': 'failed'} in summaries, 'Failed summary is not listed'
+    assert {summary['status'] for summary in summaries} == {'failed'}, 'Status filter is ignored'